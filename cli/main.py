@@ -2,15 +2,22 @@
 
 import sys
 import logging
-from typing import Optional
+import time
+from typing import Any, Dict, Iterator, List, Optional
 
 import typer
 
 import os
-from papers_fetcher.fetch import PubMedFetcher
-from papers_fetcher.filter import PaperFilter
+from papers_fetcher.corpus import CorpusStore
+from papers_fetcher.expand import CitationExpander
+from papers_fetcher.fetch import DATE_TYPES, PubMedFetcher, normalize_date_bound
+from papers_fetcher.filter import PaperFilter, push_down_affiliation_filter
 from papers_fetcher.export import PaperExporter
-from papers_fetcher.file_naming import generate_filename
+from papers_fetcher.file_naming import OutputCatalog
+from papers_fetcher.offline import OfflineIndex
+from papers_fetcher.pipeline import fetch_company_papers, iter_company_papers, iter_filtered_batches
+from papers_fetcher.spill import SpillBuffer, parse_size
+from papers_fetcher.trace import TraceLog, set_trace_log
 
 # Create Typer app
 app = typer.Typer(help="Fetch research papers from PubMed with pharmaceutical/biotech company affiliations")
@@ -20,9 +27,26 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 
+def _check_date(value: Optional[str]) -> Optional[str]:
+    """Validate a --from/--to date and return it in esearch form."""
+    if value is None:
+        return None
+    try:
+        return normalize_date_bound(value)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+
+def _check_date_type(value: str) -> str:
+    """Validate the --date-type option."""
+    if value not in DATE_TYPES:
+        raise typer.BadParameter(f"expected one of {', '.join(DATE_TYPES)}")
+    return value
+
+
 @app.command()
 def main(
-    query: str = typer.Argument(..., help="PubMed search query"),
+    query: Optional[str] = typer.Argument(None, help="PubMed search query (omit when using --pmids-file)"),
     file: str = typer.Option(
         None, "-f", "--file", help="Output file path for CSV results"
     ),
@@ -35,6 +59,76 @@ def main(
     email: str = typer.Option(
         ..., "--email", help="Email for NCBI API (required by PubMed)"
     ),
+    date_from: Optional[str] = typer.Option(
+        None, "--from", help="Earliest publication date to fetch (YYYY, YYYY/MM or YYYY/MM/DD)",
+        callback=_check_date,
+    ),
+    date_to: Optional[str] = typer.Option(
+        None, "--to", help="Latest publication date to fetch (YYYY, YYYY/MM or YYYY/MM/DD)",
+        callback=_check_date,
+    ),
+    date_type: str = typer.Option(
+        "pdat", "--date-type", help="PubMed date field for --from/--to (pdat, edat or mdat)",
+        callback=_check_date_type,
+    ),
+    company_pushdown: bool = typer.Option(
+        False, "--company-pushdown", help="Pre-filter on company affiliation terms inside the PubMed query"
+    ),
+    want: Optional[int] = typer.Option(
+        None, "--want", help="Stop fetching once this many company-affiliated papers are found"
+    ),
+    corpus: Optional[str] = typer.Option(
+        None, "--corpus", help="Directory of a local corpus store that fetched papers are added to"
+    ),
+    corpus_only: bool = typer.Option(
+        False, "--corpus-only", help="Filter the papers in --corpus instead of querying PubMed"
+    ),
+    cache_db: Optional[str] = typer.Option(
+        None, "--cache-db", help="SQLite full-text index that fetched papers are added to"
+    ),
+    offline: bool = typer.Option(
+        False, "--offline", help="Treat the query as an FTS5 expression over --cache-db instead of querying PubMed"
+    ),
+    parse_workers: int = typer.Option(
+        1, "--parse-workers", help="Number of processes used to parse large efetch payloads"
+    ),
+    pmids_file: Optional[str] = typer.Option(
+        None, "--pmids-file", help="File of PMIDs to fetch instead of searching ('-' reads stdin)"
+    ),
+    expand: Optional[str] = typer.Option(
+        None, "--expand", help="Follow links from the results: comma-separated citedin, refs, similar"
+    ),
+    expand_depth: int = typer.Option(
+        1, "--expand-depth", help="Number of link hops to follow with --expand"
+    ),
+    expand_budget: int = typer.Option(
+        1000, "--expand-budget", help="Maximum number of linked PMIDs to fetch with --expand"
+    ),
+    columns: Optional[str] = typer.Option(
+        None, "--columns", help="Comma-separated CSV columns to export; only the fields they need are parsed"
+    ),
+    rules: Optional[str] = typer.Option(
+        None, "--rules", help="JSON file of weighted company/academic affiliation rules"
+    ),
+    trace_file: Optional[str] = typer.Option(
+        None, "--trace", help="Append a JSONL trace of E-utilities requests and pipeline stages to this file"
+    ),
+    limit: Optional[int] = typer.Option(
+        None, "--limit", help="Output at most this many papers"
+    ),
+    page_size: Optional[int] = typer.Option(
+        None, "--page-size", help="Pause console output after this many papers (terminal only)"
+    ),
+    compact: bool = typer.Option(
+        False, "--compact", help="Print tab-separated rows instead of text blocks"
+    ),
+    dedup: bool = typer.Option(
+        False, "--dedup", help="Append to --file, skipping PMIDs already written to it by earlier runs"
+    ),
+    memory_budget: Optional[str] = typer.Option(
+        None, "--memory-budget",
+        help="Keep at most this much filtered paper data in memory (e.g. 256M), spilling the rest to disk",
+    ),
 ) -> None:
     """Fetch research papers from PubMed with pharmaceutical/biotech company affiliations.
 
@@ -44,12 +138,38 @@ def main(
         debug: Enable debug logging
         max_results: Maximum number of results to fetch
         email: Email for NCBI API (required by PubMed)
+        date_from: Earliest publication date to fetch
+        date_to: Latest publication date to fetch
+        date_type: PubMed date field for the date range
+        company_pushdown: Pre-filter on company affiliation terms inside the PubMed query
+        want: Stop fetching once this many company-affiliated papers are found
+        corpus: Directory of a local corpus store that fetched papers are added to
+        corpus_only: Filter the papers in the corpus instead of querying PubMed
+        cache_db: SQLite full-text index that fetched papers are added to
+        offline: Search the full-text index instead of querying PubMed
+        parse_workers: Number of processes used to parse large efetch payloads
+        pmids_file: File of PMIDs to fetch instead of searching ('-' reads stdin)
+        expand: Comma-separated link types to follow from the results
+        expand_depth: Number of link hops to follow
+        expand_budget: Maximum number of linked PMIDs to fetch
+        columns: Comma-separated CSV columns to export
+        rules: JSON file of weighted affiliation rules replacing the built-in keywords
+        trace_file: JSONL file that request and stage timings are appended to
+        limit: Maximum number of papers to output
+        page_size: Number of papers per console page
+        compact: Print tab-separated rows for piping
+        dedup: Append to the output file without repeating earlier PMIDs
+        memory_budget: Size of filtered papers held in memory before spilling to a temporary file
     """
+    start_time = time.perf_counter()
     # Set logging level based on debug flag
     if debug:
         logger.setLevel(logging.DEBUG)
         logging.getLogger("papers_fetcher").setLevel(logging.DEBUG)
 
+    corpus_store = None
+    offline_index = None
+    trace_log = None
     try:
         # Check if --help flag is present - if so, let Typer handle it
         # This prevents the code from trying to execute a search with an empty query
@@ -62,51 +182,258 @@ def main(
             logger.setLevel(logging.DEBUG)
             logging.getLogger("papers_fetcher").setLevel(logging.DEBUG)
         
+        if not query and not pmids_file:
+            logger.error("Provide a query or --pmids-file")
+            sys.exit(1)
+        if pmids_file and (date_from or date_to or company_pushdown):
+            # Both are esearch parameters, and --pmids-file skips esearch
+            logger.error("--from, --to and --company-pushdown only apply to searches, not to --pmids-file")
+            sys.exit(1)
+        if dedup and not (file and '.' in os.path.basename(file)):
+            # A generated filename is new on every run, so there would be nothing to deduplicate against
+            logger.error("--dedup requires --file to name a fixed output file, e.g. results.csv")
+            sys.exit(1)
+
         # Log the values for debugging
         logger.debug(f"Query: {query}")
         logger.debug(f"Max results: {max_results}")
         logger.debug(f"Email: {email}")
         logger.debug(f"File path: {file}")
         logger.debug(f"Debug mode: {debug}")
+        logger.debug(f"Date range: {date_from} - {date_to} ({date_type})")
         
+        if trace_file:
+            trace_log = TraceLog(trace_file)
+            set_trace_log(trace_log)
+
         # Initialize components
-        fetcher = PubMedFetcher(email=email, debug=debug)
-        filter_tool = PaperFilter(debug=debug)
-        exporter = PaperExporter(debug=debug)
+        fetcher_options = {"parse_workers": parse_workers} if parse_workers > 1 else {}
+        exporter_options: Dict[str, Any] = {}
+        if columns:
+            exporter_options = {"columns": [column.strip() for column in columns.split(",")]}
+        if dedup:
+            exporter_options["dedup"] = True
+        exporter = PaperExporter(debug=debug, **exporter_options)
+        if columns and not (corpus or cache_db):
+            # The filter always needs authors; everything else only if exported. Papers kept in
+            # --corpus or --cache-db are never refetched, so they need every field
+            fetcher_options["fields"] = exporter.required_fields() | {"authors"}
+        fetcher = PubMedFetcher(email=email, debug=debug, **fetcher_options)
+        filter_options = {"rules_file": rules} if rules else {}
+        filter_tool = PaperFilter(debug=debug, **filter_options)
 
         # Fetch papers
-        logger.info(f"Searching PubMed for: {query}")
-        papers = fetcher.fetch_papers(query, max_results=max_results)
-        logger.info(f"Found {len(papers)} papers from PubMed")
-        
-        # Filter papers
-        logger.info("Filtering papers for company affiliations")
-        filtered_papers = filter_tool.filter_papers(papers)
+        logger.info(f"Searching PubMed for: {query or pmids_file}")
+        fetch_options = {}
+        if date_from or date_to:
+            fetch_options = {"mindate": date_from, "maxdate": date_to, "datetype": date_type}
+        search_query = query
+        if company_pushdown and query:
+            # Push down the active rules, which --rules may have replaced
+            search_query = push_down_affiliation_filter(query, rules=filter_tool.rules)
+        logger.debug(f"Search query: {search_query}")
+
+        # Every paper fetched from PubMed, on whichever path, is added to the local stores
+        corpus_store = CorpusStore(corpus, debug=debug) if corpus else None
+        offline_index = OfflineIndex(cache_db, debug=debug) if cache_db else None
+        added_to_corpus = 0
+        # PMIDs fetched so far, filtered out or not, which --expand never fetches again
+        fetched_pmids: List[str] = []
+
+        def keep_fetched(papers: List[Dict[str, Any]]) -> None:
+            """Add a batch of freshly fetched papers to the local corpus and full-text index."""
+            nonlocal added_to_corpus
+            if expand:
+                fetched_pmids.extend(str(paper["pmid"]) for paper in papers)
+            if corpus_store is not None and not corpus_only:
+                added_to_corpus += corpus_store.add_papers(papers)
+            if offline_index is not None and not offline:
+                offline_index.add_papers(papers)
+
+        def company_batches(stop_at: Optional[int]) -> Iterator[List[Dict[str, Any]]]:
+            """Fetch and filter batch by batch, stopping once stop_at papers were found."""
+            if not pmids_file:
+                yield from iter_company_papers(fetcher, filter_tool, search_query, max_results=max_results,
+                                               want=stop_at, on_fetch=keep_fetched, **fetch_options)
+            elif stop_at is not None:
+                yield from iter_filtered_batches(fetcher, filter_tool, read_pmids(pmids_file), want=stop_at,
+                                                 on_fetch=keep_fetched)
+            else:
+                # Upload known PMIDs to the history server and skip esearch
+                for batch in fetcher.iter_pmid_batches(read_pmids(pmids_file)):
+                    keep_fetched(batch)
+                    yield filter_tool.filter_papers(batch)
+
+        # Console output is streamed batch by batch unless a step needs every paper first
+        renderer = None
+        needs_all_papers = offline or corpus_only or expand
+        if not file and not needs_all_papers:
+            if memory_budget:
+                # Streamed output holds one batch at a time; there is nothing to spill
+                logger.error("--memory-budget applies to --file output; console output is already streamed")
+                sys.exit(1)
+            renderer = exporter.console_renderer(compact=compact, limit=limit, page_size=page_size,
+                                                 start_time=start_time)
+
+        # Filtered papers are buffered batch by batch, spilling to disk past the budget
+        buffered = None
+        if memory_budget and renderer is None:
+            if needs_all_papers:
+                logger.warning("--memory-budget is ignored with --offline, --corpus-only and --expand")
+            else:
+                buffered = SpillBuffer(parse_size(memory_budget), fields=exporter.required_fields(), debug=debug)
+
+        if renderer is not None:
+            # Print each filtered batch as soon as it arrives; stop fetching once the output is done
+            for batch in company_batches(want or limit):
+                if not renderer.render(batch):
+                    break
+            filtered_papers = []
+        elif buffered is not None:
+            # Only one fetched batch and the in-memory part of the buffer are held at a time
+            for batch in company_batches(want or limit):
+                buffered.extend(batch if limit is None else batch[:limit - len(buffered)])
+                if limit is not None and len(buffered) >= limit:
+                    break
+            if buffered.spill_count:
+                logger.info(f"Spilled {buffered.spilled} papers to disk in {buffered.spill_count} batches")
+            filtered_papers = buffered
+        elif offline:
+            if offline_index is None:
+                logger.error("--offline requires --cache-db")
+                sys.exit(1)
+            # Search the local full-text index without going back to PubMed
+            papers = offline_index.search(query, limit=max_results)
+            if expand:
+                fetched_pmids.extend(str(paper["pmid"]) for paper in papers)
+            logger.info(f"Found {len(papers)} cached papers")
+            filtered_papers = filter_tool.filter_papers(papers)
+        elif corpus_only:
+            if not corpus:
+                logger.error("--corpus-only requires --corpus")
+                sys.exit(1)
+            # Re-filter the locally stored papers without going back to PubMed
+            filtered_papers = corpus_store.filter_papers(filter_tool)
+        elif want:
+            # Filter each batch as it arrives and stop once enough papers were found
+            if pmids_file:
+                filtered_papers = [paper for batch in company_batches(want) for paper in batch]
+            else:
+                filtered_papers = fetch_company_papers(fetcher, filter_tool, search_query, max_results=max_results,
+                                                       want=want, on_fetch=keep_fetched, **fetch_options)
+        else:
+            if pmids_file:
+                # Upload known PMIDs to the history server and skip esearch
+                papers = fetcher.fetch_pmids(read_pmids(pmids_file))
+            else:
+                papers = fetcher.fetch_papers(search_query, max_results=max_results, **fetch_options)
+            logger.info(f"Found {len(papers)} papers from PubMed")
+            keep_fetched(papers)
+
+            # Filter papers
+            logger.info("Filtering papers for company affiliations")
+            filtered_papers = filter_tool.filter_papers(papers)
+        if expand and filtered_papers:
+            # Grow the result set through citation/similarity links
+            # The seen-set holds at most the fetched PMIDs plus the budget; huge ones switch to a Bloom filter
+            expander = CitationExpander(fetcher, filter_tool, links=expand.split(","),
+                                        expected_size=len(fetched_pmids) + len(filtered_papers) + expand_budget,
+                                        on_fetch=keep_fetched, debug=debug)
+            filtered_papers.extend(expander.expand(
+                [paper["pmid"] for paper in filtered_papers], depth=expand_depth, budget=expand_budget,
+                fetched_pmids=fetched_pmids,
+            ))
+        fetcher.close()
+        if corpus_store is not None and not corpus_only:
+            logger.info(f"Added {added_to_corpus} new papers to corpus {corpus}")
+        if renderer is not None:
+            renderer.close()
+            if renderer.count:
+                logger.info(f"Printed {renderer.count} papers with company affiliations")
+            else:
+                logger.info("No papers found with company affiliations")
+            return
+        if limit is not None and buffered is None:
+            filtered_papers = filtered_papers[:limit]
         logger.info(f"Found {len(filtered_papers)} papers with company affiliations")
         
         # Export papers
         if filtered_papers:
             if file:
                 # Export to file
+                catalog = None
+                output_name = None
                 try:
                     # Generate dynamic filename based on search query if not explicitly provided
                     output_dir = os.path.dirname(file) if file and os.path.dirname(file) else os.getcwd()
-                    output_file = file if file and '.' in os.path.basename(file) else generate_filename(output_dir, query)
-                    exporter.export_to_csv(filtered_papers, output_file)
+                    if file and '.' in os.path.basename(file):
+                        output_file = file
+                    else:
+                        # Reserve the next free name through the directory's output catalog
+                        catalog = OutputCatalog(output_dir)
+                        output_name = catalog.allocate(query or os.path.splitext(os.path.basename(pmids_file))[0])
+                        output_file = os.path.join(output_dir, output_name)
+                    if buffered is not None:
+                        written = exporter.export_batches(buffered.batches(), output_file)
+                    elif dedup:
+                        written = exporter.append_new_papers(filtered_papers, output_file)
+                    else:
+                        exporter.export_to_csv(filtered_papers, output_file)
+                        written = len(filtered_papers)
+                    if catalog is not None:
+                        catalog.record_rows(output_name, written)
                     logger.info(f"Results exported to {output_file}")
                 except Exception as e:
+                    if output_name is not None:
+                        # Don't leave the reserved file behind
+                        catalog.release(output_name)
                     logger.error(f"Error exporting to file: {e}")
                     logger.error(f"File path attempted: {output_file}")
                     sys.exit(1)
+                finally:
+                    if catalog is not None:
+                        catalog.close()
+            elif compact or page_size:
+                # Print to console through the streaming renderer
+                console = exporter.console_renderer(compact=compact, page_size=page_size, start_time=start_time)
+                console.render(filtered_papers)
+                console.close()
             else:
                 # Print to console
                 exporter.print_to_console(filtered_papers)
         else:
             logger.info("No papers found with company affiliations")
+        if buffered is not None:
+            buffered.close()
             
     except Exception as e:
         logger.error(f"Error: {e}")
         sys.exit(1)
+    finally:
+        if corpus_store is not None:
+            corpus_store.close()
+        if offline_index is not None:
+            offline_index.close()
+        if trace_log is not None:
+            set_trace_log(None)
+            trace_log.close()
+
+
+def read_pmids(path: str) -> List[str]:
+    """Read PMIDs separated by whitespace or commas from a file or stdin.
+
+    Args:
+        path: Path to the file, or '-' for standard input
+
+    Returns:
+        List of PMIDs in file order
+    """
+    if path == "-":
+        text = sys.stdin.read()
+    else:
+        with open(path, "r", encoding="utf-8") as handle:
+            text = handle.read()
+    return [pmid for pmid in text.replace(",", " ").split() if pmid.isdigit()]
 
 
 if __name__ == "__main__":
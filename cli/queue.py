@@ -0,0 +1,97 @@
+"""Command-line interface for sharded fetches coordinated through a work queue."""
+
+import logging
+import sys
+from typing import Optional
+
+import typer
+
+from papers_fetcher.fetch import PubMedFetcher, DEFAULT_BATCH_SIZE
+from papers_fetcher.filter import PaperFilter
+from papers_fetcher.export import PaperExporter
+from papers_fetcher.workqueue import WorkQueue, run_worker, merge_shards, DEFAULT_LEASE_SECONDS
+
+# Create Typer app
+app = typer.Typer(help="Split a PubMed query into work units shared by several workers")
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _set_debug(debug: bool) -> None:
+    """Enable debug logging for the CLI and the package."""
+    if debug:
+        logger.setLevel(logging.DEBUG)
+        logging.getLogger("papers_fetcher").setLevel(logging.DEBUG)
+
+
+@app.command()
+def plan(
+    query: str = typer.Argument(..., help="PubMed search query"),
+    queue_db: str = typer.Option(..., "--queue", help="Path of the shared queue database"),
+    email: str = typer.Option(..., "--email", help="Email for NCBI API (required by PubMed)"),
+    max_results: int = typer.Option(100, "-m", "--max-results", help="Maximum number of results to fetch"),
+    unit_size: int = typer.Option(DEFAULT_BATCH_SIZE, "--unit-size", help="Records per work unit"),
+    debug: bool = typer.Option(False, "-d", "--debug", help="Enable debug logging"),
+) -> None:
+    """Search once and split the result set into work units."""
+    _set_debug(debug)
+    with WorkQueue(queue_db, debug=debug) as queue:
+        job_id = queue.plan(PubMedFetcher(email=email, debug=debug), query,
+                            max_results=max_results, unit_size=unit_size)
+    typer.echo(job_id)
+
+
+@app.command()
+def work(
+    queue_db: str = typer.Option(..., "--queue", help="Path of the shared queue database"),
+    shard_dir: str = typer.Option(..., "--shard-dir", help="Directory for shard CSV outputs"),
+    email: str = typer.Option(..., "--email", help="Email for NCBI API (required by PubMed)"),
+    api_key: Optional[str] = typer.Option(None, "--api-key", help="NCBI API key for this worker"),
+    job_id: Optional[int] = typer.Option(None, "--job", help="Only work on this job"),
+    lease_seconds: float = typer.Option(DEFAULT_LEASE_SECONDS, "--lease", help="Lease duration per unit"),
+    debug: bool = typer.Option(False, "-d", "--debug", help="Enable debug logging"),
+) -> None:
+    """Claim and process work units until the queue is drained."""
+    _set_debug(debug)
+    fetcher = PubMedFetcher(email=email, debug=debug, api_key=api_key)
+    try:
+        with WorkQueue(queue_db, debug=debug) as queue:
+            run_worker(queue, fetcher, PaperFilter(debug=debug), PaperExporter(debug=debug), shard_dir,
+                       job_id=job_id, lease_seconds=lease_seconds)
+    finally:
+        fetcher.close()
+
+
+@app.command()
+def merge(
+    job_id: int = typer.Argument(..., help="Job to merge"),
+    queue_db: str = typer.Option(..., "--queue", help="Path of the shared queue database"),
+    file: str = typer.Option(..., "-f", "--file", help="Output file path for the merged CSV"),
+    debug: bool = typer.Option(False, "-d", "--debug", help="Enable debug logging"),
+) -> None:
+    """Merge a finished job's shards into one CSV file."""
+    _set_debug(debug)
+    try:
+        with WorkQueue(queue_db, debug=debug) as queue:
+            merge_shards(queue, job_id, file)
+    except RuntimeError as e:
+        logger.error(f"Error: {e}")
+        sys.exit(1)
+
+
+@app.command()
+def status(
+    job_id: int = typer.Argument(..., help="Job to inspect"),
+    queue_db: str = typer.Option(..., "--queue", help="Path of the shared queue database"),
+) -> None:
+    """Show how many units of a job are pending, leased, done or failed."""
+    with WorkQueue(queue_db) as queue:
+        progress = queue.progress(job_id)
+    for unit_status, count in sorted(progress.items()):
+        typer.echo(f"{unit_status}\t{count}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,56 @@
+"""Command-line interface for running the papers-fetcher HTTP/JSON API."""
+
+import logging
+
+import typer
+
+from papers_fetcher.server import serve
+
+# Create Typer app
+app = typer.Typer(help="Serve PubMed company-affiliation queries over a local HTTP/JSON API")
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+@app.command()
+def main(
+    email: str = typer.Option(
+        ..., "--email", help="Email for NCBI API (required by PubMed)"
+    ),
+    host: str = typer.Option(
+        "127.0.0.1", "--host", help="Interface to bind the server to"
+    ),
+    port: int = typer.Option(
+        8765, "-p", "--port", help="Port to listen on"
+    ),
+    cache_ttl: float = typer.Option(
+        300.0, "--cache-ttl", help="Seconds to reuse a completed query result"
+    ),
+    cache_size: int = typer.Option(
+        128, "--cache-size", help="Maximum number of completed query results to keep"
+    ),
+    debug: bool = typer.Option(
+        False, "-d", "--debug", help="Enable debug logging"
+    ),
+) -> None:
+    """Keep a warm fetch/filter/export stack running and answer queries over HTTP.
+
+    Args:
+        email: Email for NCBI API (required by PubMed)
+        host: Interface to bind the server to
+        port: Port to listen on
+        cache_ttl: Seconds to reuse a completed query result
+        cache_size: Maximum number of completed query results to keep
+        debug: Enable debug logging
+    """
+    if debug:
+        logger.setLevel(logging.DEBUG)
+        logging.getLogger("papers_fetcher").setLevel(logging.DEBUG)
+
+    serve(email=email, host=host, port=port, debug=debug, cache_ttl=cache_ttl, cache_size=cache_size)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,76 @@
+"""Command-line interface for summarizing JSONL trace logs."""
+
+import json
+import logging
+import time
+from typing import Optional
+
+import typer
+
+from papers_fetcher.trace import LATENCY_BUCKETS_MS, summarize_trace
+
+# Create Typer app
+app = typer.Typer(help="Summarize request latencies and throughput from a papers-fetcher trace log")
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+@app.command()
+def main(
+    trace_file: str = typer.Argument(..., help="JSONL trace written with --trace"),
+    interval: float = typer.Option(
+        60.0, "--interval", help="Width in seconds of the throughput buckets"
+    ),
+    run: Optional[str] = typer.Option(
+        None, "--run", help="Only summarize events of this run ID"
+    ),
+    as_json: bool = typer.Option(
+        False, "--json", help="Print the summary as JSON"
+    ),
+) -> None:
+    """Print p50/p95/p99 latencies, latency histograms and throughput over time.
+
+    Args:
+        trace_file: JSONL trace written with --trace
+        interval: Width in seconds of the throughput buckets
+        run: Only summarize events of this run ID
+        as_json: Print the summary as JSON
+    """
+    summary = summarize_trace(trace_file, interval=interval, run=run)
+    if as_json:
+        typer.echo(json.dumps(summary, indent=2))
+        return
+
+    bounds = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+    typer.echo("Requests")
+    typer.echo("endpoint\tcount\terrors\tretries\trecords\tbytes\tp50_ms\tp95_ms\tp99_ms\tmax_ms")
+    for endpoint, stats in summary["requests"].items():
+        typer.echo("\t".join(str(value) for value in (
+            endpoint, stats["count"], stats["errors"], stats["retries"], stats["records"], stats["bytes"],
+            stats["p50_ms"], stats["p95_ms"], stats["p99_ms"], stats["max_ms"],
+        )))
+
+    typer.echo("\nLatency histograms (ms)")
+    typer.echo("endpoint\t" + "\t".join(bounds))
+    for endpoint, stats in summary["requests"].items():
+        typer.echo(endpoint + "\t" + "\t".join(str(count) for count in stats["histogram"]))
+
+    typer.echo("\nStages")
+    typer.echo("stage\tcount\ttotal_ms\tp50_ms\tp95_ms\tp99_ms")
+    for stage, stats in summary["spans"].items():
+        typer.echo("\t".join(str(value) for value in (
+            stage, stats["count"], stats["total_ms"], stats["p50_ms"], stats["p95_ms"], stats["p99_ms"],
+        )))
+
+    typer.echo("\nThroughput")
+    typer.echo("interval_start\trequests\trecords_per_s\tbytes_per_s")
+    for bucket in summary["throughput"]:
+        start = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(bucket["start"]))
+        typer.echo(f"{start}\t{bucket['requests']}\t{bucket['records_per_second']:.1f}\t"
+                   f"{bucket['bytes_per_second']:.0f}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,219 @@
+"""Module for minimal non-blocking HTTP requests to the NCBI E-utilities."""
+
+import asyncio
+import logging
+import ssl
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit, urlencode
+
+from Bio import Entrez
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Requests with longer query strings are sent as POST bodies (NCBI recommendation)
+MAX_GET_QUERY_LENGTH = 1000
+
+# Seconds between requests, as enforced by Bio.Entrez: NCBI allows 3 requests
+# per second, or 10 with an API key
+REQUEST_INTERVAL = 0.37
+API_KEY_REQUEST_INTERVAL = 0.1
+
+# First retry delay in seconds; it doubles with every attempt up to Entrez.sleep_between_tries
+RETRY_BASE_DELAY = 1.0
+
+
+class HTTPStatusError(IOError):
+    """Non-200 answer from the E-utilities."""
+
+    def __init__(self, url: str, status: int, retry_after: Optional[float] = None) -> None:
+        super().__init__(f"HTTP {status} from {url}")
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        """Whether the request may succeed when repeated (429 or a server error)."""
+        return self.status == 429 or self.status >= 500
+
+
+class RateLimiter:
+    """Token bucket shared by concurrent requests, so in-flight limits don't exceed NCBI's rate."""
+
+    def __init__(self, rate: Optional[float] = None, burst: int = 1) -> None:
+        """Initialize the limiter.
+
+        Args:
+            rate: Requests per second (None follows Bio.Entrez: 3/s, or 10/s with an API key)
+            burst: Number of requests that may start back to back after an idle period
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until the next request may be sent."""
+        rate = self.rate or 1.0 / (API_KEY_REQUEST_INTERVAL if Entrez.api_key else REQUEST_INTERVAL)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            # Reserve a token even if it is not there yet; later callers queue behind it
+            self._tokens -= 1
+            wait = -self._tokens / rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# Limiter used by http_request() unless another one is given
+DEFAULT_RATE_LIMITER = RateLimiter()
+
+
+async def http_request(
+    url: str,
+    params: Dict[str, Any],
+    timeout: float = 60.0,
+    limiter: Optional[RateLimiter] = None,
+    event: Optional[Dict[str, Any]] = None,
+) -> bytes:
+    """Send an E-utilities request without blocking the event loop.
+
+    Requests are rate limited, and 429s, server errors, timeouts and
+    connection failures are retried up to Entrez.max_tries times with
+    exponential backoff (or the server's Retry-After).
+
+    Args:
+        url: Endpoint URL
+        params: Query parameters; list values are joined with commas
+        timeout: Seconds allowed for each attempt
+        limiter: Rate limiter to wait on (defaults to DEFAULT_RATE_LIMITER)
+        event: Trace request event to record the retries, HTTP status and bytes in
+
+    Returns:
+        Raw response body
+
+    Raises:
+        HTTPStatusError: If the server answers with a non-200 status
+        asyncio.TimeoutError: If the last attempt exceeds the timeout
+    """
+    limiter = limiter or DEFAULT_RATE_LIMITER
+    tries = max(1, Entrez.max_tries)
+    attempt = 0
+    while True:
+        await limiter.acquire()
+        try:
+            payload = await asyncio.wait_for(_request(url, params), timeout=timeout)
+        except HTTPStatusError as e:
+            if not e.retryable or attempt + 1 >= tries:
+                raise
+            delay = e.retry_after if e.retry_after is not None else _backoff(attempt)
+            error: Exception = e
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            if attempt + 1 >= tries:
+                raise
+            delay = _backoff(attempt)
+            error = e
+        else:
+            if event is not None:
+                event.update(status=200, bytes=len(payload))
+            return payload
+        logger.warning("Retrying %s in %.1f s after %s", url, delay, error)
+        await asyncio.sleep(delay)
+        attempt += 1
+        if event is not None:
+            event["retries"] = attempt
+
+
+def _backoff(attempt: int) -> float:
+    """Delay before retry number attempt + 1."""
+    return min(RETRY_BASE_DELAY * 2 ** attempt, float(Entrez.sleep_between_tries))
+
+
+async def _request(url: str, params: Dict[str, Any]) -> bytes:
+    """Perform a single HTTP/1.0 request and return the body."""
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    port = parts.port or (443 if secure else 80)
+    query = urlencode({
+        key: ",".join(str(v) for v in value) if isinstance(value, (list, tuple)) else value
+        for key, value in params.items()
+        if value is not None
+    })
+
+    if len(query) > MAX_GET_QUERY_LENGTH:
+        body = query.encode("ascii")
+        head = (
+            f"POST {parts.path} HTTP/1.0\r\n"
+            "Content-Type: application/x-www-form-urlencoded\r\n"
+            f"Content-Length: {len(body)}\r\n"
+        )
+    else:
+        body = b""
+        head = f"GET {parts.path}?{query} HTTP/1.0\r\n"
+    head += f"Host: {parts.hostname}\r\nConnection: close\r\n\r\n"
+
+    reader, writer = await asyncio.open_connection(
+        parts.hostname, port, ssl=ssl.create_default_context() if secure else None
+    )
+    try:
+        writer.write(head.encode("ascii") + body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            # The server may drop the connection first; the response is already read
+            pass
+
+    status, headers, payload = _parse_response(response)
+    if status != 200:
+        raise HTTPStatusError(url, status, retry_after=_retry_after(headers))
+    logger.debug("Received %d bytes from %s", len(payload), url)
+    return payload
+
+
+def _parse_response(response: bytes) -> Tuple[int, Dict[str, str], bytes]:
+    """Split a raw HTTP/1.0 response into status code, lowercased headers and body."""
+    header_blob, _, payload = response.partition(b"\r\n\r\n")
+    status_line, *header_lines = header_blob.decode("latin-1").split("\r\n")
+    try:
+        status = int(status_line.split()[1])
+    except (IndexError, ValueError):
+        raise IOError(f"Malformed HTTP response: {status_line!r}")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers, payload
+
+
+def _retry_after(headers: Dict[str, str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header given in seconds, if any."""
+    try:
+        return max(0.0, float(headers["retry-after"]))
+    except (KeyError, ValueError):
+        return None
+
+
+def entrez_params(**params: Any) -> Dict[str, Any]:
+    """Add the Entrez identification parameters to a request.
+
+    Args:
+        params: Endpoint-specific parameters
+
+    Returns:
+        Parameters including tool, email and api_key when configured
+    """
+    identification: Dict[str, Optional[str]] = {
+        "tool": Entrez.tool,
+        "email": Entrez.email,
+        "api_key": Entrez.api_key,
+    }
+    identification.update(params)
+    return identification
@@ -0,0 +1,506 @@
+"""Module for a local columnar corpus of fetched papers with an affiliation index."""
+
+import json
+import logging
+import mmap
+import os
+import re
+from array import array
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Pattern, Sequence, Set, Tuple, Union
+
+from papers_fetcher import trace
+from papers_fetcher.dedup import SeenPmids
+from papers_fetcher.filter import PaperFilter
+from papers_fetcher.rules import WORD_ALTERNATION
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Paper fields stored as columns; list/dict values are stored as JSON
+COLUMNS = (
+    "pmid",
+    "title",
+    "publication_date",
+    "publication_date_iso",
+    "date_precision",
+    "corresponding_email",
+    "authors",
+)
+JSON_COLUMNS = {"authors"}
+
+# Tokens of a lowercased affiliation; a trailing dot is kept so "co." stays distinct from "co"
+TOKEN_PATTERN = re.compile(r"\w+\.?")
+
+# A pattern word that is answered by a single token lookup
+INDEX_WORD = re.compile(r"^\w+$")
+
+# Index segments in merge order, and the next segment number
+MANIFEST_FILENAME = "segments.json"
+
+# Bitmap of the stored PMIDs
+PMIDS_FILENAME = "pmids.seen"
+
+# Index files of stores written before the index was split into segments
+LEGACY_INDEX_FILES = ("tokens.json", "postings.idx")
+
+
+class _Column:
+    """Memory-mapped variable-width column: a data file plus an end-offset array."""
+
+    def __init__(self, directory: str, name: str) -> None:
+        self.data_path = os.path.join(directory, f"{name}.dat")
+        self.index_path = os.path.join(directory, f"{name}.idx")
+        for path in (self.data_path, self.index_path):
+            if not os.path.exists(path):
+                open(path, "wb").close()
+        self._maps: List[mmap.mmap] = []
+        self.data: Any = b""
+        self.ends: Any = array("q")
+        self.reload()
+
+    def reload(self) -> None:
+        """Re-map the column files after they were appended to."""
+        self.close()
+        data = _map_file(self.data_path)
+        index = _map_file(self.index_path)
+        self._maps = [mapped for mapped in (data, index) if mapped is not None]
+        self.data = data if data is not None else b""
+        self.ends = memoryview(index).cast("q") if index is not None else array("q")
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    def get(self, row: int) -> str:
+        start = self.ends[row - 1] if row else 0
+        return bytes(self.data[start:self.ends[row]]).decode("utf-8")
+
+    def append(self, values: List[str]) -> None:
+        offset = self.ends[-1] if len(self.ends) else 0
+        ends = array("q")
+        with open(self.data_path, "ab") as handle:
+            for value in values:
+                encoded = value.encode("utf-8")
+                handle.write(encoded)
+                offset += len(encoded)
+                ends.append(offset)
+        with open(self.index_path, "ab") as handle:
+            ends.tofile(handle)
+
+    def close(self) -> None:
+        if isinstance(self.ends, memoryview):
+            self.ends.release()
+        self.ends = array("q")
+        self.data = b""
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+
+class _Segment:
+    """Immutable part of the affiliation index, memory-mapped: sorted tokens and their rows.
+
+    Files: <name>.tok holds the sorted UTF-8 tokens back to back, <name>.tix
+    an int64 (token end, rows end) pair per token and <name>.rows the row
+    offsets of every token in ascending order.
+    """
+
+    def __init__(self, directory: str, name: str) -> None:
+        self.name = name
+        self.paths = [os.path.join(directory, name + suffix) for suffix in (".tok", ".tix", ".rows")]
+        tokens, index, rows = (_map_file(path) for path in self.paths)
+        self._maps = [mapped for mapped in (tokens, index, rows) if mapped is not None]
+        self.tokens: Any = tokens if tokens is not None else b""
+        self.index: Any = memoryview(index).cast("q") if index is not None else array("q")
+        self.rows: Any = memoryview(rows).cast("q") if rows is not None else array("q")
+
+    def __len__(self) -> int:
+        return len(self.index) // 2
+
+    @property
+    def size(self) -> int:
+        """Number of postings (token, row pairs) in the segment."""
+        return len(self.rows)
+
+    def lookup(self, token: str) -> List[int]:
+        """Return the ascending rows containing a token (binary search over the mapped tokens)."""
+        key = token.encode("utf-8")
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._token(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and self._token(low) == key:
+            return self._rows(low)
+        return []
+
+    def items(self) -> Iterator[Tuple[str, List[int]]]:
+        """Yield every (token, rows) pair in token order."""
+        for position in range(len(self)):
+            yield self._token(position).decode("utf-8"), self._rows(position)
+
+    def close(self) -> None:
+        for view in (self.index, self.rows):
+            if isinstance(view, memoryview):
+                view.release()
+        self.index = self.rows = array("q")
+        self.tokens = b""
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+    def remove(self) -> None:
+        """Close the segment and delete its files."""
+        self.close()
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    @classmethod
+    def write(cls, directory: str, name: str, postings: Dict[str, Sequence[int]]) -> "_Segment":
+        """Write a segment from token -> ascending rows and open it."""
+        tokens = bytearray()
+        index = array("q")
+        rows = array("q")
+        for token in sorted(postings, key=lambda token: token.encode("utf-8")):
+            tokens += token.encode("utf-8")
+            rows.extend(postings[token])
+            index.extend((len(tokens), len(rows)))
+        segment_paths = [os.path.join(directory, name + suffix) for suffix in (".tok", ".tix", ".rows")]
+        for path, payload in zip(segment_paths, (bytes(tokens), index.tobytes(), rows.tobytes())):
+            with open(path, "wb") as handle:
+                handle.write(payload)
+        return cls(directory, name)
+
+    def _token(self, position: int) -> bytes:
+        start = self.index[2 * position - 2] if position else 0
+        return bytes(self.tokens[start:self.index[2 * position]])
+
+    def _rows(self, position: int) -> List[int]:
+        start = self.index[2 * position - 1] if position else 0
+        # Copied out, so no view into the map outlives the segment
+        return self.rows[start:self.index[2 * position + 1]].tolist()
+
+
+class CorpusStore:
+    """Class to persist fetched papers and re-filter them without going back to PubMed.
+
+    Adding papers only appends: column values go to the end of the column
+    files, and the affiliation tokens of each added batch are written as a
+    new index segment. Segments are merged log-structured style (two
+    neighbours of similar size at a time), so each posting is rewritten
+    O(log n) times and a store stays at O(log n) memory-mapped segments.
+    """
+
+    def __init__(self, directory: str, debug: bool = False) -> None:
+        """Open (or create) a corpus store.
+
+        Args:
+            directory: Directory holding the column and index files
+            debug: Whether to enable debug logging
+        """
+        if debug:
+            logger.setLevel(logging.DEBUG)
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.columns = {name: _Column(directory, name) for name in COLUMNS}
+        self._manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+        pmids_path = os.path.join(directory, PMIDS_FILENAME)
+        rebuild = not os.path.exists(self._manifest_path) or not os.path.exists(pmids_path)
+        self._pmids = SeenPmids(pmids_path, debug=debug)
+        # PMIDs that don't fit the bitmap are only deduplicated within this session
+        self._other_pmids: Set[str] = set()
+        self._segments: List[_Segment] = []
+        self._next_segment = 0
+
+        if rebuild:
+            self._rebuild_indexes()
+        else:
+            with open(self._manifest_path, "r", encoding="utf-8") as handle:
+                manifest = json.load(handle)
+            self._next_segment = manifest["next_segment"]
+            self._segments = [_Segment(directory, name) for name in manifest["segments"]]
+
+        logger.debug("CorpusStore opened at %s with %d papers", directory, len(self))
+
+    def __len__(self) -> int:
+        return len(self.columns["pmid"])
+
+    def __contains__(self, pmid: object) -> bool:
+        return pmid in self._pmids or pmid in self._other_pmids
+
+    def __enter__(self) -> "CorpusStore":
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, traceback: object) -> None:
+        self.close()
+
+    def add_papers(self, papers: Iterable[Dict[str, Any]]) -> int:
+        """Append papers that are not stored yet and index their affiliations.
+
+        The cost depends on the number of papers added, not on the corpus size
+        (apart from the amortized segment merges).
+
+        Args:
+            papers: Paper dictionaries from PubMedFetcher
+
+        Returns:
+            Number of papers added
+        """
+        new_papers = []
+        batch_pmids: Set[str] = set()
+        for paper in papers:
+            pmid = str(paper.get("pmid", ""))
+            if pmid and pmid not in self and pmid not in batch_pmids:
+                batch_pmids.add(pmid)
+                new_papers.append(paper)
+        if not new_papers:
+            return 0
+
+        first_row = len(self)
+        postings: Dict[str, List[int]] = {}
+        for offset, paper in enumerate(new_papers):
+            for token in _affiliation_tokens(paper):
+                postings.setdefault(token, []).append(first_row + offset)
+
+        for name, column in self.columns.items():
+            column.append([_encode(paper.get(name, ""), name in JSON_COLUMNS) for paper in new_papers])
+            column.reload()
+        if postings:
+            self._segments.append(_Segment.write(self.directory, self._segment_name(), postings))
+            self._merge_segments()
+        self._save_manifest()
+        self._remember_pmids(batch_pmids)
+
+        logger.debug("Added %d papers to corpus (%d total, %d index segments)",
+                     len(new_papers), len(self), len(self._segments))
+        return len(new_papers)
+
+    def get_paper(self, row: int) -> Dict[str, Any]:
+        """Load the paper stored at a row.
+
+        Args:
+            row: Row offset of the paper
+
+        Returns:
+            Paper dictionary in the shape PubMedFetcher produces
+        """
+        paper: Dict[str, Any] = {}
+        for name, column in self.columns.items():
+            value = column.get(row)
+            paper[name] = json.loads(value) if name in JSON_COLUMNS else value
+        return paper
+
+    def iter_papers(self, rows: Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over stored papers.
+
+        Args:
+            rows: Row offsets to load, or None for the whole corpus
+
+        Yields:
+            Paper dictionaries
+        """
+        for row in range(len(self)) if rows is None else rows:
+            yield self.get_paper(row)
+
+    def candidate_rows(self, patterns: Union[Pattern[str], str, Sequence[str]]) -> List[int]:
+        """Find rows whose affiliations may match any of the patterns.
+
+        Patterns made of whole words, e.g. r"\\b(?:inc|co\\.|ltd)\\b" or a
+        phrase of words, are answered by looking their tokens up in the
+        index; any other pattern can match text the tokens don't capture, so
+        it falls back to every row.
+
+        Args:
+            patterns: Compiled pattern (its top-level alternatives are used) or pattern strings,
+                e.g. PaperFilter.rules.company_patterns
+
+        Returns:
+            Sorted row offsets of candidate papers
+        """
+        if isinstance(patterns, (str, re.Pattern)):
+            source = patterns if isinstance(patterns, str) else patterns.pattern
+            patterns = _split_alternatives(source)
+
+        phrases: List[List[List[str]]] = []
+        for pattern in patterns:
+            for alternative in _split_alternatives(pattern):
+                alternative_phrases = _index_phrases(alternative)
+                if alternative_phrases is None:
+                    logger.debug("Pattern %r can't be answered from the index; scanning every row", alternative)
+                    return list(range(len(self)))
+                phrases.extend(alternative_phrases)
+
+        rows: Set[int] = set()
+        for words in phrases:
+            # A phrase can only match rows containing every one of its words
+            phrase_rows: Optional[Set[int]] = None
+            for variants in words:
+                word_rows = {row for token in variants for segment in self._segments
+                             for row in segment.lookup(token)}
+                phrase_rows = word_rows if phrase_rows is None else phrase_rows & word_rows
+            rows.update(phrase_rows or ())
+        return sorted(rows)
+
+    def filter_papers(self, paper_filter: PaperFilter) -> List[Dict[str, Any]]:
+        """Re-filter the stored papers with a PaperFilter's rules.
+
+        Only papers that the affiliation index can't rule out are loaded; the
+        filter then performs its usual exact check on them.
+
+        Args:
+            paper_filter: Filter whose company/academic rules should be applied
+
+        Returns:
+            List of filtered paper dictionaries, ready for PaperExporter
+        """
+        with trace.span("corpus_load", papers=len(self)) as load_span:
+            rows = self.candidate_rows(paper_filter.rules.company_patterns)
+            logger.debug("Affiliation index selected %d of %d papers", len(rows), len(self))
+            candidates = list(self.iter_papers(rows))
+            load_span["candidates"] = len(candidates)
+        return paper_filter.filter_papers(candidates)
+
+    def close(self) -> None:
+        """Release the memory maps."""
+        for column in self.columns.values():
+            column.close()
+        for segment in self._segments:
+            segment.close()
+        self._pmids.close()
+
+    def _segment_name(self) -> str:
+        name = f"segment-{self._next_segment:06d}"
+        self._next_segment += 1
+        return name
+
+    def _merge_segments(self) -> None:
+        """Merge the newest segments while the older neighbour is no larger than the newer one."""
+        while len(self._segments) >= 2 and self._segments[-2].size <= self._segments[-1].size:
+            older, newer = self._segments[-2], self._segments[-1]
+            postings: Dict[str, array] = {}
+            # Older segments hold lower rows, so appending keeps every row list ascending
+            for segment in (older, newer):
+                for token, rows in segment.items():
+                    postings.setdefault(token, array("q")).extend(rows)
+            merged = _Segment.write(self.directory, self._segment_name(), postings)
+            self._segments[-2:] = [merged]
+            self._save_manifest()
+            older.remove()
+            newer.remove()
+
+    def _save_manifest(self) -> None:
+        manifest = {"next_segment": self._next_segment, "segments": [segment.name for segment in self._segments]}
+        temp_path = self._manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle)
+        os.replace(temp_path, self._manifest_path)
+
+    def _remember_pmids(self, pmids: Iterable[str]) -> None:
+        for pmid in pmids:
+            if not self._pmids.add(pmid):
+                self._other_pmids.add(pmid)
+        self._pmids.flush()
+
+    def _rebuild_indexes(self) -> None:
+        """Rebuild the PMID set and the affiliation index from the stored rows (one full scan)."""
+        if len(self):
+            logger.info("Rebuilding the indexes of corpus %s", self.directory)
+        for path in (os.path.join(self.directory, name) for name in LEGACY_INDEX_FILES):
+            if os.path.exists(path):
+                os.remove(path)
+        postings: Dict[str, List[int]] = {}
+        pmids = []
+        for row, paper in enumerate(self.iter_papers()):
+            pmids.append(paper["pmid"])
+            for token in _affiliation_tokens(paper):
+                postings.setdefault(token, []).append(row)
+        if postings:
+            self._segments = [_Segment.write(self.directory, self._segment_name(), postings)]
+        self._save_manifest()
+        self._remember_pmids(pmids)
+
+
+def _map_file(path: str) -> Optional[mmap.mmap]:
+    """Memory-map a file read-only, or return None if it is empty."""
+    if os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as handle:
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _split_alternatives(pattern: str) -> List[str]:
+    """Split a regex at its top-level "|" (outside groups and character classes)."""
+    parts: List[str] = []
+    depth = 0
+    in_class = False
+    start = 0
+    position = 0
+    while position < len(pattern):
+        char = pattern[position]
+        if char == "\\":
+            position += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            parts.append(pattern[start:position])
+            start = position + 1
+        position += 1
+    parts.append(pattern[start:])
+    return parts
+
+
+def _index_phrases(pattern: str) -> Optional[List[List[List[str]]]]:
+    """Reduce a whole-word pattern to the index tokens that can satisfy it.
+
+    Args:
+        pattern: Regex such as r"\\b(?:inc|co\\.)\\b" or r"\\bmedical center\\b"
+
+    Returns:
+        One entry per alternative phrase, holding for each of its words the tokens
+        the word may be stored as; None if the pattern is anything but whole words
+        (e.g. r"\\bbristol-myers\\b"), in which case the caller scans every row
+    """
+    match = WORD_ALTERNATION.match(pattern)
+    if not match:
+        return None
+    phrases = []
+    for alternative in (match.group("group") or match.group("single") or "").split("|"):
+        words = alternative.split(" ")
+        phrase = []
+        for position, word in enumerate(words):
+            if word.endswith("\\.") and position == len(words) - 1 and INDEX_WORD.match(word[:-2]):
+                # r"co\." only matches where the stored token is "co."
+                phrase.append([word[:-2].lower() + "."])
+            elif INDEX_WORD.match(word):
+                # A word directly followed by a period is stored with the period
+                phrase.append([word.lower(), word.lower() + "."])
+            else:
+                return None
+        phrases.append(phrase)
+    return phrases
+
+
+def _affiliation_tokens(paper: Dict[str, Any]) -> Set[str]:
+    """Collect the normalized affiliation tokens of a paper."""
+    tokens: Set[str] = set()
+    for author in paper.get("authors", []):
+        for affiliation in author.get("affiliations", []):
+            tokens.update(TOKEN_PATTERN.findall(affiliation.lower()))
+    return tokens
+
+
+def _encode(value: Any, as_json: bool) -> str:
+    """Serialize a field value for storage in a column."""
+    if as_json:
+        return json.dumps(value)
+    return "" if value is None else str(value)
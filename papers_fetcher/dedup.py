@@ -0,0 +1,150 @@
+"""Module for remembering which PMIDs were already written to an output across runs."""
+
+import logging
+import mmap
+import os
+from typing import Any, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# The bitmap file grows in steps of this many bytes (8M PMIDs per step)
+GROWTH_BYTES = 1 << 20
+
+# Suffix of the seen-set file kept next to an output file
+SEEN_SUFFIX = ".seen"
+
+
+class SeenPmids:
+    """Memory-mapped bitmap with one bit per PMID.
+
+    Membership tests and inserts are O(1) and only touch the page holding
+    the bit, so opening a set with years of history costs the same as
+    opening an empty one. Non-numeric PMIDs are never considered seen.
+    """
+
+    def __init__(self, path: str, debug: bool = False) -> None:
+        """Open (or create) the seen-set file.
+
+        Args:
+            path: Path of the bitmap file
+            debug: Whether to enable debug logging
+        """
+        if debug:
+            logger.setLevel(logging.DEBUG)
+
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._map: Optional[mmap.mmap] = None
+        self._remap()
+
+    @classmethod
+    def for_output(cls, output_file: str, debug: bool = False) -> "SeenPmids":
+        """Open the seen-set that belongs to an output file.
+
+        Args:
+            output_file: Path of the output the PMIDs are written to
+            debug: Whether to enable debug logging
+
+        Returns:
+            Seen-set stored next to the output file
+        """
+        return cls(output_file + SEEN_SUFFIX, debug=debug)
+
+    def __contains__(self, pmid: object) -> bool:
+        number = _pmid_number(pmid)
+        if number is None:
+            return False
+        byte = number >> 3
+        if self._map is None or byte >= len(self._map):
+            # Another process may have grown the file since it was mapped
+            self._remap()
+            if self._map is None or byte >= len(self._map):
+                return False
+        return bool(self._map[byte] & (1 << (number & 7)))
+
+    def add(self, pmid: Any) -> bool:
+        """Mark a PMID as written.
+
+        Args:
+            pmid: PMID as string or integer
+
+        Returns:
+            False if the PMID is not numeric and cannot be stored
+        """
+        number = _pmid_number(pmid)
+        if number is None:
+            return False
+        byte = number >> 3
+        if self._map is None or byte >= len(self._map):
+            self._remap(min_size=byte + 1)
+        assert self._map is not None
+        self._map[byte] |= 1 << (number & 7)
+        return True
+
+    def update(self, pmids: Iterable[Any]) -> None:
+        """Mark several PMIDs as written."""
+        for pmid in pmids:
+            self.add(pmid)
+
+    def lock(self) -> "_FileLock":
+        """Exclusive lock for a check-write-mark cycle shared with other processes."""
+        return _FileLock(self._fd)
+
+    def flush(self) -> None:
+        """Write dirty pages back to the file."""
+        if self._map is not None:
+            self._map.flush()
+
+    def close(self) -> None:
+        """Flush and release the memory map and the file."""
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _remap(self, min_size: int = 0) -> None:
+        """Map the whole file, first growing it to hold min_size bytes."""
+        size = os.fstat(self._fd).st_size
+        if size < min_size:
+            size = -(-min_size // GROWTH_BYTES) * GROWTH_BYTES
+            os.ftruncate(self._fd, size)
+            logger.debug("Grew %s to %d bytes", self.path, size)
+        if self._map is not None:
+            if len(self._map) == size:
+                return
+            self._map.close()
+            self._map = None
+        if size:
+            self._map = mmap.mmap(self._fd, size)
+
+
+class _FileLock:
+    """flock() held for the duration of a with block (no-op where unavailable)."""
+
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+
+    def __enter__(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def __exit__(self, exc_type: object, exc: object, traceback: object) -> None:
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+def _pmid_number(pmid: object) -> Optional[int]:
+    """Return a PMID as a non-negative integer, or None if it is not numeric."""
+    if isinstance(pmid, int):
+        return pmid if pmid >= 0 else None
+    text = str(pmid).strip()
+    return int(text) if text.isascii() and text.isdigit() else None
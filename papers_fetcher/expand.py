@@ -0,0 +1,180 @@
+"""Module for growing a paper set through batched elink citation/similarity links."""
+
+import hashlib
+import itertools
+import logging
+import math
+from typing import Callable, Dict, Iterable, List, Any, Optional, Sequence, Set, Union
+
+from Bio import Entrez
+
+from papers_fetcher import trace
+from papers_fetcher.fetch import PubMedFetcher
+from papers_fetcher.filter import PaperFilter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Short names for the PubMed link types that can be followed
+LINKNAMES = {
+    "citedin": "pubmed_pubmed_citedin",
+    "refs": "pubmed_pubmed_refs",
+    "similar": "pubmed_pubmed",
+}
+
+# Number of source PMIDs sent per elink request
+ELINK_BATCH_SIZE = 200
+
+# Expected frontier size above which the seen-set switches to a Bloom filter
+BLOOM_THRESHOLD = 1_000_000
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set of strings with no false negatives."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        """Initialize the Bloom filter.
+
+        Args:
+            capacity: Expected number of items
+            error_rate: Acceptable false-positive rate at that capacity
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: object) -> bool:
+        return isinstance(item, str) and all(
+            self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item)
+        )
+
+
+class CitationExpander:
+    """Class to expand seed papers by following elink links hop by hop."""
+
+    def __init__(
+        self,
+        fetcher: PubMedFetcher,
+        paper_filter: PaperFilter,
+        links: Sequence[str] = ("citedin",),
+        expected_size: int = 10000,
+        on_fetch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        debug: bool = False,
+    ) -> None:
+        """Initialize the citation expander.
+
+        Args:
+            fetcher: PubMed fetcher used to fetch newly discovered PMIDs
+            paper_filter: Filter applied to newly fetched papers
+            links: Link types to follow (keys of LINKNAMES)
+            expected_size: Expected number of PMIDs seen; large graphs use a Bloom filter
+            on_fetch: Called with every fetched batch before it is filtered
+            debug: Whether to enable debug logging
+
+        Raises:
+            ValueError: If an unknown link type is given
+        """
+        if debug:
+            logger.setLevel(logging.DEBUG)
+
+        unknown = [link for link in links if link not in LINKNAMES]
+        if unknown:
+            raise ValueError(f"Unknown link type(s): {', '.join(unknown)}")
+
+        self.fetcher = fetcher
+        self.filter = paper_filter
+        self.linknames = [LINKNAMES[link] for link in links]
+        self.on_fetch = on_fetch
+        self.seen: Union[Set[str], BloomFilter] = (
+            BloomFilter(expected_size) if expected_size > BLOOM_THRESHOLD else set()
+        )
+
+    def expand(
+        self,
+        seed_pmids: Iterable[str],
+        depth: int = 1,
+        budget: int = 1000,
+        fetched_pmids: Iterable[str] = (),
+    ) -> List[Dict[str, Any]]:
+        """Follow links from the seeds and return the new company-affiliated papers.
+
+        Each hop starts from the papers that passed the filter in the previous
+        hop, and only PMIDs never fetched before are fetched.
+
+        Args:
+            seed_pmids: PMIDs of the papers to expand from
+            depth: Number of hops to follow
+            budget: Maximum number of new PMIDs to fetch in total
+            fetched_pmids: PMIDs already fetched, including those the filter rejected
+
+        Returns:
+            List of filtered paper dictionaries found by the expansion
+        """
+        frontier = [str(pmid) for pmid in seed_pmids]
+        for pmid in itertools.chain(frontier, fetched_pmids):
+            self.seen.add(str(pmid))
+
+        with trace.span("expand", seeds=len(frontier), depth=depth) as expand_span:
+            found: List[Dict[str, Any]] = []
+            for hop in range(1, depth + 1):
+                if not frontier or budget <= 0:
+                    break
+
+                new_ids = []
+                for linked_id in self.linked_ids(frontier):
+                    if len(new_ids) >= budget:
+                        # PMIDs past the budget stay unseen, so a later expansion can still fetch them
+                        break
+                    if linked_id not in self.seen:
+                        self.seen.add(linked_id)
+                        new_ids.append(linked_id)
+                budget -= len(new_ids)
+                logger.debug("Hop %d: %d new PMIDs from a frontier of %d", hop, len(new_ids), len(frontier))
+
+                frontier = []
+                for batch in self.fetcher.iter_pmid_batches(new_ids):
+                    if self.on_fetch is not None:
+                        self.on_fetch(batch)
+                    filtered_papers = self.filter.filter_papers(batch)
+                    found.extend(filtered_papers)
+                    frontier.extend(str(paper["pmid"]) for paper in filtered_papers)
+
+            expand_span["found"] = len(found)
+
+        logger.info("Expansion found %d additional company papers", len(found))
+        return found
+
+    def linked_ids(self, pmids: Sequence[str]) -> List[str]:
+        """Collect the PMIDs linked from a set of PMIDs with batched elink calls.
+
+        Args:
+            pmids: Source PMIDs
+
+        Returns:
+            Linked PMIDs in first-seen order, without duplicates
+        """
+        linked: Dict[str, None] = {}
+        for start in range(0, len(pmids), ELINK_BATCH_SIZE):
+            batch = pmids[start:start + ELINK_BATCH_SIZE]
+            for linkname in self.linknames:
+                with trace.entrez_request("elink", batch_size=len(batch), linkname=linkname) as event:
+                    handle = trace.CountingHandle(
+                        Entrez.elink(dbfrom="pubmed", db="pubmed", id=",".join(batch), linkname=linkname), event
+                    )
+                    linksets = Entrez.read(handle)
+                    handle.close()
+                for linkset in linksets:
+                    for linkset_db in linkset.get("LinkSetDb", []):
+                        for link in linkset_db.get("Link", []):
+                            linked[str(link["Id"])] = None
+        return list(linked)
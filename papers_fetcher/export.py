@@ -3,25 +3,64 @@
 import csv
 import io
 import logging
+import os
 import sys
-from typing import Dict, List, Any, Optional, TextIO
+import time
+from typing import Callable, Collection, Dict, Iterable, List, Any, Optional, Sequence, Set, TextIO, Tuple
 
 import pandas as pd
 
+from papers_fetcher import trace
+from papers_fetcher.dedup import SeenPmids
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Export columns in output order: column name -> (paper fields read, value builder)
+EXPORT_COLUMNS: Dict[str, Tuple[Tuple[str, ...], Callable[[Dict[str, Any]], Any]]] = {
+    "PubmedID": (("pmid",), lambda paper: paper.get("pmid", "")),
+    "Title": (("title",), lambda paper: paper.get("title", "")),
+    "Publication Date": (
+        ("publication_date_iso", "publication_date"),
+        lambda paper: paper.get("publication_date_iso") or paper.get("publication_date", ""),
+    ),
+    # Join multiple authors and company affiliations with semicolons
+    "Non-academic Author(s)": (
+        ("non_academic_authors",), lambda paper: "; ".join(paper.get("non_academic_authors", []))
+    ),
+    "Company Affiliation(s)": (
+        ("company_affiliations",), lambda paper: "; ".join(paper.get("company_affiliations", []))
+    ),
+    "Corresponding Author Email": (
+        ("corresponding_email",), lambda paper: paper.get("corresponding_email", "") or "Not Available"
+    ),
+}
+
+# Device page prompts are answered on, independent of stdin
+CONTROLLING_TERMINAL = "/dev/tty"
+
 
 class PaperExporter:
     """Class to export papers to CSV format."""
 
-    def __init__(self, debug: bool = False) -> None:
+    def __init__(self, debug: bool = False, columns: Optional[Sequence[str]] = None, dedup: bool = False) -> None:
         """Initialize the paper exporter.
 
         Args:
             debug: Whether to print debug information.
+            columns: Export columns to write, in order (defaults to all of EXPORT_COLUMNS).
+            dedup: Append to output files, skipping PMIDs written to them by earlier exports.
+
+        Raises:
+            ValueError: If an unknown column is requested.
         """
+        unknown = [column for column in columns or [] if column not in EXPORT_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown export column(s): {', '.join(unknown)}")
+
         self.debug = debug
+        self.columns = list(columns) if columns else list(EXPORT_COLUMNS)
+        self.dedup = dedup
         if debug:
             logging.basicConfig(level=logging.DEBUG)
         else:
@@ -36,26 +75,18 @@ class PaperExporter:
         Returns:
             List of dictionaries with flattened structure for CSV export.
         """
-        export_data = []
-
-        for paper in papers:
-            # Join multiple authors and company affiliations with semicolons
-            non_academic_authors = "; ".join(paper.get("non_academic_authors", []))
-            company_affiliations = "; ".join(paper.get("company_affiliations", []))
+        builders = [(column, EXPORT_COLUMNS[column][1]) for column in self.columns]
 
-            # Create a flattened dictionary for CSV export
-            export_row = {
-                "PubmedID": paper.get("pmid", ""),
-                "Title": paper.get("title", ""),
-                "Publication Date": paper.get("publication_date", ""),
-                "Non-academic Author(s)": non_academic_authors,
-                "Company Affiliation(s)": company_affiliations,
-                "Corresponding Author Email": paper.get("corresponding_email", "") or "Not Available"
-            }
+        # Create a flattened dictionary per paper, reading only the exported fields
+        return [{column: build(paper) for column, build in builders} for paper in papers]
 
-            export_data.append(export_row)
+    def required_fields(self) -> Set[str]:
+        """Return the paper fields read by the selected export columns.
 
-        return export_data
+        Returns:
+            Set of paper dictionary keys, usable as PubMedFetcher(fields=...)
+        """
+        return {field for column in self.columns for field in EXPORT_COLUMNS[column][0]}
 
     def export_to_csv(self, papers: List[Dict[str, Any]], output_file: Optional[str] = None) -> Optional[str]:
         """Export papers to CSV format.
@@ -74,32 +105,111 @@ class PaperExporter:
             logger.warning("No papers to export")
             return "" if output_file is None else None
 
-        # Prepare data for export
-        export_data = self._prepare_data_for_export(papers)
-        logger.debug(f"Prepared {len(export_data)} papers for export")
+        if output_file and self.dedup:
+            self.append_new_papers(papers, output_file)
+            return None
+
+        with trace.span("export", papers=len(papers), output=output_file or ""):
+            # Prepare data for export
+            export_data = self._prepare_data_for_export(papers)
+            logger.debug(f"Prepared {len(export_data)} papers for export")
+
+            try:
+                # Create a DataFrame for easier CSV handling
+                df = pd.DataFrame(export_data)
+
+                if output_file:
+                    # Write to file
+                    df.to_csv(output_file, index=False, quoting=csv.QUOTE_NONNUMERIC)
+                    logger.info(f"Exported {len(export_data)} papers to {output_file}")
+                    return None
+                else:
+                    # Return as string
+                    csv_buffer = io.StringIO()
+                    df.to_csv(csv_buffer, index=False, quoting=csv.QUOTE_NONNUMERIC)
+                    csv_string = csv_buffer.getvalue()
+                    logger.debug(f"Generated CSV string with {len(export_data)} papers")
+                    return csv_string
+
+            except Exception as e:
+                logger.error(f"Error exporting papers to CSV: {e}")
+                raise
 
-        try:
-            # Create a DataFrame for easier CSV handling
-            df = pd.DataFrame(export_data)
+    def export_batches(self, batches: Iterable[List[Dict[str, Any]]], output_file: str) -> int:
+        """Export papers to a CSV file one batch at a time.
 
-            if output_file:
-                # Write to file
-                df.to_csv(output_file, index=False, quoting=csv.QUOTE_NONNUMERIC)
-                logger.info(f"Exported {len(export_data)} papers to {output_file}")
-                return None
+        Only one batch is held in memory, e.g. when reading back a
+        papers_fetcher.spill.SpillBuffer. The file has the same content as
+        export_to_csv() of all papers; in dedup mode each batch is appended
+        with append_new_papers().
+
+        Args:
+            batches: Lists of papers to export, in output order.
+            output_file: Path to the output file.
+
+        Returns:
+            Number of rows written.
+        """
+        written = 0
+        with trace.span("export", output=output_file, batched=True) as export_span:
+            if self.dedup:
+                for batch in batches:
+                    written += self.append_new_papers(batch, output_file)
             else:
-                # Return as string
-                csv_buffer = io.StringIO()
-                df.to_csv(csv_buffer, index=False, quoting=csv.QUOTE_NONNUMERIC)
-                csv_string = csv_buffer.getvalue()
-                logger.debug(f"Generated CSV string with {len(export_data)} papers")
-                return csv_string
-
-        except Exception as e:
-            logger.error(f"Error exporting papers to CSV: {e}")
-            raise
-
-    def print_to_console(self, papers: List[Dict[str, Any]]) -> None:
+                with open(output_file, "w", newline="", encoding="utf-8") as handle:
+                    for batch in batches:
+                        df = pd.DataFrame(self._prepare_data_for_export(batch), columns=self.columns)
+                        df.to_csv(handle, header=written == 0, index=False, quoting=csv.QUOTE_NONNUMERIC)
+                        written += len(batch)
+            export_span["papers"] = written
+
+        logger.info(f"Exported {written} papers to {output_file}")
+        return written
+
+    def append_new_papers(self, papers: List[Dict[str, Any]], output_file: str) -> int:
+        """Append the papers whose PMIDs were never written to an output file.
+
+        The PMIDs already written are kept in a memory-mapped bitmap next to
+        the output (see papers_fetcher.dedup), locked while rows are appended,
+        so concurrent jobs sharing an output never write a PMID twice.
+
+        Args:
+            papers: List of papers to export.
+            output_file: Path of the append-only CSV file.
+
+        Returns:
+            Number of rows appended.
+        """
+        with trace.span("export", papers=len(papers), output=output_file, dedup=True) as export_span:
+            seen = SeenPmids.for_output(output_file, debug=self.debug)
+            try:
+                with seen.lock():
+                    new_papers = []
+                    new_pmids = set()
+                    for paper in papers:
+                        pmid = str(paper.get("pmid", ""))
+                        if pmid in seen or pmid in new_pmids:
+                            continue
+                        new_pmids.add(pmid)
+                        new_papers.append(paper)
+
+                    if new_papers:
+                        write_header = not os.path.exists(output_file) or os.path.getsize(output_file) == 0
+                        df = pd.DataFrame(self._prepare_data_for_export(new_papers), columns=self.columns)
+                        df.to_csv(output_file, mode="a", header=write_header, index=False,
+                                  quoting=csv.QUOTE_NONNUMERIC)
+                        # Mark only after the rows are written: a crash repeats rows, never drops them
+                        seen.update(new_pmids)
+                        seen.flush()
+            finally:
+                seen.close()
+            export_span["appended"] = len(new_papers)
+
+        logger.info(f"Appended {len(new_papers)} new papers to {output_file} "
+                    f"({len(papers) - len(new_papers)} already written)")
+        return len(new_papers)
+
+    def print_to_console(self, papers: Collection[Dict[str, Any]]) -> None:
         """Print papers to console in a readable format.
 
         Args:
@@ -111,12 +221,174 @@ class PaperExporter:
 
         print(f"\nFound {len(papers)} papers with pharmaceutical/biotech company affiliations:\n")
 
-        for i, paper in enumerate(papers, 1):
-            print(f"Paper {i}:")
-            print(f"  PubMed ID: {paper.get('pmid', 'N/A')}")
-            print(f"  Title: {paper.get('title', 'N/A')}")
-            print(f"  Publication Date: {paper.get('publication_date', 'N/A')}")
-            print(f"  Non-academic Authors: {', '.join(paper.get('non_academic_authors', ['N/A']))}")
-            print(f"  Company Affiliations: {', '.join(paper.get('company_affiliations', ['N/A']))}")
-            print(f"  Corresponding Email: {paper.get('corresponding_email', 'N/A')}")
-            print()
\ No newline at end of file
+        renderer = self.console_renderer()
+        renderer.render(papers)
+        renderer.close()
+
+    def console_renderer(
+        self,
+        stream: Optional[TextIO] = None,
+        compact: bool = False,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        start_time: Optional[float] = None,
+    ) -> "ConsoleRenderer":
+        """Create a renderer that prints papers incrementally as they arrive.
+
+        Args:
+            stream: Output stream (defaults to sys.stdout)
+            compact: Write tab-separated rows of this exporter's columns instead of text blocks
+            limit: Stop after this many papers
+            page_size: Pause for confirmation after this many papers on a terminal
+            start_time: time.perf_counter() value time-to-first-result is measured from
+
+        Returns:
+            Console renderer
+        """
+        return ConsoleRenderer(
+            stream=stream, columns=self.columns if compact else None,
+            limit=limit, page_size=page_size, start_time=start_time,
+        )
+
+
+class ConsoleRenderer:
+    """Streaming console output written through one buffered stream."""
+
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        columns: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        start_time: Optional[float] = None,
+        prompt: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        """Initialize the console renderer.
+
+        Args:
+            stream: Output stream (defaults to sys.stdout)
+            columns: Export columns for compact tab-separated output (None for text blocks)
+            limit: Stop after this many papers
+            page_size: Pause after this many papers; only applies when the stream is a terminal
+                or a prompt is given
+            start_time: time.perf_counter() value time-to-first-result is measured from
+            prompt: Called at each page break; returns False to stop
+        """
+        self.stream = stream or sys.stdout
+        self.columns = list(columns) if columns else None
+        self.limit = limit
+        self.page_size = page_size if prompt or _is_terminal(self.stream) else None
+        self.prompt = prompt or _prompt_more
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.count = 0
+        self.first_result_ms: Optional[float] = None
+        self.stopped = False
+
+        if self.columns:
+            self.stream.write("\t".join(self.columns) + "\n")
+
+    def render(self, papers: Sequence[Dict[str, Any]]) -> bool:
+        """Write a batch of papers and flush it.
+
+        Args:
+            papers: Filtered papers to print
+
+        Returns:
+            False once the limit is reached or the user quit paging, True otherwise
+        """
+        for paper in papers:
+            if self.stopped:
+                break
+            if self.first_result_ms is None:
+                self.first_result_ms = (time.perf_counter() - self.start_time) * 1000
+            self.count += 1
+            self.stream.write(self._format_row(paper) if self.columns else self._format_block(paper))
+
+            if self.limit is not None and self.count >= self.limit:
+                self.stopped = True
+            elif self.page_size and self.count % self.page_size == 0:
+                self.stream.flush()
+                self.stopped = not self.prompt()
+        self.stream.flush()
+        return not self.stopped
+
+    def close(self) -> None:
+        """Flush the output and record the render span with time-to-first-result."""
+        self.stream.flush()
+        elapsed_ms = (time.perf_counter() - self.start_time) * 1000
+        if self.first_result_ms is not None:
+            logger.debug("First result after %.1f ms, %d papers in %.1f ms",
+                         self.first_result_ms, self.count, elapsed_ms)
+        trace.emit({
+            "type": "span", "stage": "render", "status": "ok", "papers": self.count,
+            "first_result_ms": None if self.first_result_ms is None else round(self.first_result_ms, 3),
+            "duration_ms": round(elapsed_ms, 3),
+        })
+
+    def _format_block(self, paper: Dict[str, Any]) -> str:
+        """Format a paper as a numbered, indented text block followed by a blank line.
+
+        Args:
+            paper: Filtered paper
+
+        Returns:
+            Text block
+        """
+        return (
+            f"Paper {self.count}:\n"
+            f"  PubMed ID: {paper.get('pmid', 'N/A')}\n"
+            f"  Title: {paper.get('title', 'N/A')}\n"
+            f"  Publication Date: {paper.get('publication_date', 'N/A')}\n"
+            f"  Non-academic Authors: {', '.join(paper.get('non_academic_authors', ['N/A']))}\n"
+            f"  Company Affiliations: {', '.join(paper.get('company_affiliations', ['N/A']))}\n"
+            f"  Corresponding Email: {paper.get('corresponding_email', 'N/A')}\n"
+            "\n"
+        )
+
+    def _format_row(self, paper: Dict[str, Any]) -> str:
+        """Format a paper as one tab-separated line of the selected columns.
+
+        Args:
+            paper: Filtered paper
+
+        Returns:
+            Row ending in a newline
+        """
+        # Tabs and line breaks inside values would break the row structure
+        return "\t".join(
+            " ".join(str(EXPORT_COLUMNS[column][1](paper)).split()) for column in self.columns or []
+        ) + "\n"
+
+
+def _is_terminal(stream: TextIO) -> bool:
+    """Return True if the stream is attached to a terminal."""
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _prompt_more() -> bool:
+    """Ask on stderr whether to show the next page; returns False to quit.
+
+    The answer is read from the controlling terminal rather than stdin, which
+    may be carrying input such as --pmids-file -. Without a terminal to ask,
+    paging is skipped and output continues.
+    """
+    try:
+        terminal = open(CONTROLLING_TERMINAL, encoding="utf-8")
+    except OSError:
+        if not _is_terminal(sys.stdin):
+            return True
+        terminal = None
+
+    sys.stderr.write("-- more (Enter to continue, q to quit) --")
+    sys.stderr.flush()
+    try:
+        answer = (terminal or sys.stdin).readline()
+    except (OSError, ValueError):
+        return False
+    finally:
+        if terminal is not None:
+            terminal.close()
+    return bool(answer) and not answer.strip().lower().startswith("q")
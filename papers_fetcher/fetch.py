@@ -1,28 +1,240 @@
 """Module for fetching papers from PubMed API."""
 
+import asyncio
+import bisect
+import datetime
+import functools
+import io
+from concurrent.futures import ProcessPoolExecutor
+import json
 import logging
-from typing import Dict, List, Any, Optional
+import re
+import threading
+from typing import AsyncIterator, Callable, Collection, Dict, Iterator, List, Any, Optional, Sequence, Set, Tuple
 import time
 
 from Bio import Entrez
 from Bio import Medline
 
+from papers_fetcher import trace
+from papers_fetcher.async_http import entrez_params, http_request
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Base URL of the NCBI E-utilities
+EUTILS_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+
+# Number of records requested per efetch call
+DEFAULT_BATCH_SIZE = 500
+
+# Number of PMIDs uploaded per epost request
+EPOST_CHUNK_SIZE = 10000
+
+# Minimum number of records in a payload before parsing is spread over processes
+PARALLEL_PARSE_MIN_RECORDS = 200
+
+# Blank lines separate MEDLINE records
+RECORD_BOUNDARY = re.compile(r"\n[ \t]*\n")
+
+# Month names and seasons used in MEDLINE publication dates
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+SEASONS = {"spring": 3, "summer": 6, "fall": 9, "autumn": 9, "winter": 12}
+
+# Leading "YYYY[ Mon|Season[ DD]]" or "YYYYMMDD"/"YYYY/MM/DD" part of a date string
+DATE_PATTERN = re.compile(
+    r"^\s*(?P<year>\d{4})(?:[\s/-]*(?P<month>[A-Za-z]+|\d{1,2})(?:[\s/-]*(?P<day>\d{1,2})(?!\d))?)?"
+)
+
+# PubMed date fields an esearch date window can apply to
+DATE_TYPES = ("pdat", "edat", "mdat")
+
+# esearch date bound: YYYY, YYYY/MM or YYYY/MM/DD ("-" is accepted as separator)
+DATE_BOUND_PATTERN = re.compile(r"^(\d{4})(?:[/-](\d{1,2})(?:[/-](\d{1,2}))?)?$")
+
+# Paper fields computed from a record, grouped by the extractor that produces them
+DATE_FIELDS = ("publication_date", "publication_date_iso", "date_precision")
+LAZY_FIELDS = DATE_FIELDS + ("authors", "corresponding_email", "emails")
+
+# E-mail address inside affiliation text; the domain must end in a label, so a
+# sentence-final period is not included
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+# Word of an affiliation line or a one-word surname
+WORD_PATTERN = re.compile(r"\w+")
+
+# Characters ignored when comparing surnames with an email's local part ("b.park", "O'Brien")
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+# Records with fewer affiliations are matched to authors without building an index
+INDEX_MIN_AFFILIATIONS = 8
+
+# Values used when a lazy field can't be extracted from a record
+FIELD_DEFAULTS: Dict[str, Any] = {"authors": [], "emails": []}
+
+
+class AffiliationIndex:
+    """Character-trigram index over the lowercased affiliations of one record.
+
+    Any substring of three or more characters contains all of its trigrams,
+    so the shortest posting list of a needle's trigrams holds every
+    affiliation that can contain it; only those are checked with "in".
+    """
+
+    def __init__(self, affiliations: List[str]) -> None:
+        """Build the index.
+
+        Args:
+            affiliations: Affiliation strings of one record
+        """
+        self.lowered = [affiliation.lower() for affiliation in affiliations]
+        self.postings: Optional[Dict[str, List[int]]] = None
+        if len(self.lowered) >= INDEX_MIN_AFFILIATIONS:
+            postings: Dict[str, List[int]] = {}
+            for position, text in enumerate(self.lowered):
+                for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                    postings.setdefault(gram, []).append(position)
+            self.postings = postings
+
+    def find(self, needle: str) -> List[int]:
+        """Return the positions, in order, of the affiliations containing a lowercase needle.
+
+        Args:
+            needle: Lowercased text to look for
+
+        Returns:
+            Ascending affiliation positions
+        """
+        candidates: Sequence[int] = range(len(self.lowered))
+        if self.postings is not None and len(needle) >= 3:
+            for i in range(len(needle) - 2):
+                posting = self.postings.get(needle[i:i + 3])
+                if posting is None:
+                    return []
+                if len(posting) < len(candidates):
+                    candidates = posting
+        return [position for position in candidates if needle in self.lowered[position]]
+
+
+class LazyPaper(dict):
+    """Paper dictionary whose record-derived fields are computed on first access.
+
+    Reading a single key (paper["authors"], paper.get(...)) only runs the
+    extractor for that key; iterating, comparing, copying, pickling or
+    JSON-encoding the paper computes all remaining fields first. Fields are
+    computed under a lock, so threads may share a paper.
+    """
+
+    def __init__(self, fields: Dict[str, Any], loaders: Dict[str, Callable[[], Dict[str, Any]]]) -> None:
+        super().__init__(fields)
+        self._loaders = loaders
+        self._lock = threading.RLock()
+
+    def __missing__(self, key: str) -> Any:
+        with self._lock:
+            # Another thread may have computed the field while this one waited
+            if dict.__contains__(self, key):
+                return dict.__getitem__(self, key)
+            loader = self._loaders.get(key)
+            if loader is None:
+                raise KeyError(key)
+            try:
+                values = loader()
+            except Exception as e:
+                logger.warning("Error processing field %s of record %s: %s", key, dict.get(self, "pmid"), e)
+                values = {key: FIELD_DEFAULTS.get(key, "")}
+            # Store before dropping the loader, so "in" never misses a field that is being computed
+            for name, value in values.items():
+                if not dict.__contains__(self, name):
+                    dict.__setitem__(self, name, value)
+                self._loaders.pop(name, None)
+            return dict.__getitem__(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or key in self._loaders
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._lock:
+            dict.__setitem__(self, key, value)
+            self._loaders.pop(key, None)
+
+    def materialize(self) -> "LazyPaper":
+        """Compute every pending field and return the paper."""
+        for key in list(self._loaders):
+            if key in self._loaders:
+                self[key]
+        return self
+
+    def __iter__(self) -> Iterator[str]:
+        return dict.__iter__(self.materialize())
+
+    def __len__(self) -> int:
+        return dict.__len__(self.materialize())
+
+    def keys(self) -> Any:
+        return dict.keys(self.materialize())
+
+    def values(self) -> Any:
+        return dict.values(self.materialize())
+
+    def items(self) -> Any:
+        return dict.items(self.materialize())
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazyPaper):
+            other.materialize()
+        return dict.__eq__(self.materialize(), other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return dict.__repr__(self.materialize())
+
+    def __reduce__(self) -> Any:
+        # Pickle (e.g. to and from parser processes) as a plain dictionary
+        return (dict, (self.copy(),))
+
 
 class PubMedFetcher:
     """Class to fetch papers from PubMed API."""
 
-    def __init__(self, email: str, debug: bool = False) -> None:
+    def __init__(
+        self,
+        email: str,
+        debug: bool = False,
+        parse_workers: int = 1,
+        fields: Optional[Collection[str]] = None,
+        api_key: Optional[str] = None,
+    ) -> None:
         """Initialize the PubMed fetcher.
 
         Args:
             email: Email address to use for NCBI API (required by PubMed)
             debug: Whether to enable debug logging
+            parse_workers: Number of processes used to parse large efetch payloads
+            fields: Paper fields to extract (None extracts all); pmid and title are always kept
+            api_key: NCBI API key, raising the request rate limit
         """
         # Set email for NCBI API
         Entrez.email = email
+        if api_key:
+            Entrez.api_key = api_key
+        self.email = email
+        self.parse_workers = parse_workers
+        self.fields = set(LAZY_FIELDS) if fields is None else set(fields) & set(LAZY_FIELDS)
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
         
         # Set logging level based on debug flag
         if debug:
@@ -30,12 +242,22 @@ class PubMedFetcher:
         
         logger.debug(f"PubMedFetcher initialized with email: {email}")
 
-    def fetch_papers(self, query: str, max_results: int = 100) -> List[Dict[str, Any]]:
+    def fetch_papers(
+        self,
+        query: str,
+        max_results: int = 100,
+        mindate: Optional[str] = None,
+        maxdate: Optional[str] = None,
+        datetype: str = "pdat",
+    ) -> List[Dict[str, Any]]:
         """Fetch papers from PubMed based on the query.
 
         Args:
             query: PubMed search query
             max_results: Maximum number of results to fetch
+            mindate: Earliest date to include (YYYY, YYYY/MM or YYYY/MM/DD)
+            maxdate: Latest date to include (YYYY, YYYY/MM or YYYY/MM/DD)
+            datetype: PubMed date field the range applies to (pdat, edat or mdat)
 
         Returns:
             List of paper dictionaries with metadata
@@ -47,75 +269,465 @@ class PubMedFetcher:
         papers = []
 
         try:
-            # Search PubMed
-            logger.debug("Searching PubMed")
-            search_handle = Entrez.esearch(
+            with trace.span("fetch", max_results=max_results) as fetch_span:
+                id_list = self.search_ids(
+                    query, max_results=max_results, mindate=mindate, maxdate=maxdate, datetype=datetype
+                )
+
+                if not id_list:
+                    logger.info("No papers found matching the query")
+                    return []
+
+                # Fetch details in batches
+                for start in range(0, len(id_list), DEFAULT_BATCH_SIZE):
+                    papers.extend(self.fetch_details(id_list[start:start + DEFAULT_BATCH_SIZE]))
+                fetch_span["papers"] = len(papers)
+
+        except Exception as e:
+            logger.error("Error fetching papers from PubMed: %s", str(e))
+            raise
+
+        logger.info("Fetched %d papers from PubMed", len(papers))
+        return papers
+
+    def search_history(
+        self,
+        query: str,
+        max_results: int = 100,
+        mindate: Optional[str] = None,
+        maxdate: Optional[str] = None,
+        datetype: str = "pdat",
+    ) -> Tuple[str, str, int]:
+        """Search PubMed and keep the result set on the NCBI history server.
+
+        Args:
+            query: PubMed search query
+            max_results: Maximum number of results to keep
+            mindate: Earliest date to include (YYYY, YYYY/MM or YYYY/MM/DD)
+            maxdate: Latest date to include (YYYY, YYYY/MM or YYYY/MM/DD)
+            datetype: PubMed date field the range applies to (pdat, edat or mdat)
+
+        Returns:
+            Tuple of (WebEnv, query_key, number of results to fetch)
+        """
+        logger.debug("Searching PubMed with history")
+        with trace.entrez_request("esearch") as event:
+            search_handle = trace.CountingHandle(Entrez.esearch(
+                db="pubmed",
+                term=query,
+                retmax=0,
+                sort="relevance",
+                usehistory="y",
+                **self._date_range_params(mindate, maxdate, datetype)
+            ), event)
+            search_results = Entrez.read(search_handle)
+            search_handle.close()
+
+        count = min(int(search_results["Count"]), max_results)
+        logger.debug("Found %s papers matching the query, keeping %d", search_results["Count"], count)
+        return search_results["WebEnv"], search_results["QueryKey"], count
+
+    def search_ids(
+        self,
+        query: str,
+        max_results: int = 100,
+        mindate: Optional[str] = None,
+        maxdate: Optional[str] = None,
+        datetype: str = "pdat",
+    ) -> List[str]:
+        """Search PubMed and return matching PMIDs in relevance order.
+
+        Args:
+            query: PubMed search query
+            max_results: Maximum number of PMIDs to return
+            mindate: Earliest date to include (YYYY, YYYY/MM or YYYY/MM/DD)
+            maxdate: Latest date to include (YYYY, YYYY/MM or YYYY/MM/DD)
+            datetype: PubMed date field the range applies to (pdat, edat or mdat)
+
+        Returns:
+            List of PMIDs
+        """
+        logger.debug("Searching PubMed")
+        with trace.entrez_request("esearch", batch_size=max_results) as event:
+            search_handle = trace.CountingHandle(Entrez.esearch(
                 db="pubmed",
                 term=query,
                 retmax=max_results,
-                sort="relevance"
-            )
+                sort="relevance",
+                **self._date_range_params(mindate, maxdate, datetype)
+            ), event)
             search_results = Entrez.read(search_handle)
             search_handle.close()
 
-            # Get the list of IDs
-            id_list = search_results["IdList"]
-            logger.debug("Found %d papers matching the query", len(id_list))
+        id_list = list(search_results["IdList"])
+        logger.debug("Found %d papers matching the query", len(id_list))
+        return id_list
+
+    def fetch_details(self, id_list: List[str]) -> List[Dict[str, Any]]:
+        """Fetch and process the MEDLINE records for a batch of PMIDs.
+
+        Args:
+            id_list: PMIDs to fetch in a single efetch request
+
+        Returns:
+            List of paper dictionaries with metadata
+        """
+        logger.debug("Fetching details for %d papers", len(id_list))
+        return self._efetch_papers(id=id_list)
+
+    def fetch_pmids(self, id_list: List[str]) -> List[Dict[str, Any]]:
+        """Fetch papers for a known list of PMIDs without running esearch.
+
+        The PMIDs are uploaded to the NCBI history server with epost, so even
+        very long lists never end up in a request URL.
 
-            if not id_list:
-                logger.info("No papers found matching the query")
-                return []
+        Args:
+            id_list: PMIDs to fetch
+
+        Returns:
+            List of paper dictionaries with metadata
+        """
+        papers: List[Dict[str, Any]] = []
+        with trace.span("fetch", pmids=len(id_list)) as fetch_span:
+            for batch in self.iter_pmid_batches(id_list):
+                papers.extend(batch)
+            fetch_span["papers"] = len(papers)
+        logger.info("Fetched %d papers from PubMed", len(papers))
+        return papers
 
-            # Fetch details for each paper
-            logger.debug("Fetching details for %d papers", len(id_list))
-            fetch_handle = Entrez.efetch(
+    def iter_pmid_batches(
+        self, id_list: List[str], batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Upload PMIDs with epost and yield the fetched papers batch by batch.
+
+        Args:
+            id_list: PMIDs to fetch
+            batch_size: Number of records per efetch request
+
+        Yields:
+            Lists of paper dictionaries with metadata
+        """
+        # Drop duplicates but keep the caller's order
+        id_list = list(dict.fromkeys(str(pmid).strip() for pmid in id_list if str(pmid).strip()))
+        if not id_list:
+            logger.info("No PMIDs to fetch")
+            return
+
+        webenv = None
+        for start in range(0, len(id_list), EPOST_CHUNK_SIZE):
+            chunk = id_list[start:start + EPOST_CHUNK_SIZE]
+            webenv, query_key = self.post_ids(chunk, webenv=webenv)
+            for offset in range(0, len(chunk), batch_size):
+                yield self.fetch_history(webenv, query_key, retstart=offset, retmax=batch_size)
+
+    def post_ids(self, id_list: List[str], webenv: Optional[str] = None) -> Tuple[str, str]:
+        """Upload PMIDs to the NCBI history server.
+
+        Args:
+            id_list: PMIDs to upload
+            webenv: Existing history session to add the PMIDs to
+
+        Returns:
+            Tuple of (WebEnv, query_key) identifying the uploaded set
+        """
+        logger.debug("Posting %d PMIDs to the history server", len(id_list))
+        post_options = {"webenv": webenv} if webenv else {}
+        with trace.entrez_request("epost", batch_size=len(id_list)) as event:
+            post_handle = trace.CountingHandle(Entrez.epost(db="pubmed", id=",".join(id_list), **post_options), event)
+            post_results = Entrez.read(post_handle)
+            post_handle.close()
+        return post_results["WebEnv"], post_results["QueryKey"]
+
+    def fetch_history(self, webenv: str, query_key: str, retstart: int = 0,
+                      retmax: int = DEFAULT_BATCH_SIZE) -> List[Dict[str, Any]]:
+        """Fetch and process a slice of a result set stored on the history server.
+
+        Args:
+            webenv: History session returned by epost or esearch
+            query_key: Result set within the session
+            retstart: Offset of the first record to fetch
+            retmax: Number of records to fetch
+
+        Returns:
+            List of paper dictionaries with metadata
+        """
+        logger.debug("Fetching records %d-%d of query_key %s", retstart, retstart + retmax, query_key)
+        return self._efetch_papers(webenv=webenv, query_key=query_key, retstart=retstart, retmax=retmax)
+
+    def _efetch_papers(self, **efetch_params: Any) -> List[Dict[str, Any]]:
+        """Run one efetch request and process the returned MEDLINE records.
+
+        Args:
+            efetch_params: Either id=... or webenv/query_key/retstart/retmax
+
+        Returns:
+            List of paper dictionaries with metadata
+        """
+        batch_size = len(efetch_params["id"]) if "id" in efetch_params else efetch_params.get("retmax", 0)
+        with trace.entrez_request("efetch", batch_size=batch_size) as event:
+            fetch_handle = trace.CountingHandle(Entrez.efetch(
                 db="pubmed",
-                id=id_list,
                 rettype="medline",
-                retmode="text"
+                retmode="text",
+                **efetch_params
+            ), event)
+            try:
+                # The request ends once the payload is fully read; parsing is not timed
+                text = fetch_handle.read()
+            finally:
+                fetch_handle.close()
+
+        if self.parse_workers > 1:
+            return self._parse_medline_parallel(text)
+        return self._parse_medline(text)
+
+    def close(self) -> None:
+        """Shut down the parser process pool, if one was started."""
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+            self._parse_pool = None
+
+    async def aiter_papers(
+        self,
+        query: str,
+        max_results: int = 100,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = 3,
+        mindate: Optional[str] = None,
+        maxdate: Optional[str] = None,
+        datetype: str = "pdat",
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Asynchronously yield papers from PubMed as their batches complete.
+
+        Batches are downloaded concurrently but yielded in relevance order.
+
+        Args:
+            query: PubMed search query
+            max_results: Maximum number of results to fetch
+            batch_size: Number of records per efetch request
+            concurrency: Maximum number of efetch requests in flight
+            mindate: Earliest date to include (YYYY, YYYY/MM or YYYY/MM/DD)
+            maxdate: Latest date to include (YYYY, YYYY/MM or YYYY/MM/DD)
+            datetype: PubMed date field the range applies to (pdat, edat or mdat)
+
+        Yields:
+            Paper dictionaries with metadata
+        """
+        logger.debug(f"Async fetching papers with query: {query} (max: {max_results})")
+        with trace.request("esearch", batch_size=max_results) as event:
+            payload = await http_request(
+                EUTILS_BASE_URL + "esearch.fcgi",
+                entrez_params(db="pubmed", term=query, retmax=max_results,
+                              sort="relevance", retmode="json",
+                              **self._date_range_params(mindate, maxdate, datetype)),
+                event=event,
             )
-            records = Medline.parse(fetch_handle)
-            
-            # Process each record
-            for record in records:
-                paper = self._process_record(record)
-                if paper:
-                    papers.append(paper)
-                    
-            fetch_handle.close()
+        search_results = json.loads(payload)
+        id_list = search_results["esearchresult"]["idlist"]
+        logger.debug("Found %d papers matching the query", len(id_list))
 
-        except Exception as e:
-            logger.error("Error fetching papers from PubMed: %s", str(e))
-            raise
+        if not id_list:
+            logger.info("No papers found matching the query")
+            return
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_batch(batch_ids: List[str]) -> List[Dict[str, Any]]:
+            async with semaphore:
+                with trace.request("efetch", batch_size=len(batch_ids)) as event:
+                    payload = await http_request(
+                        EUTILS_BASE_URL + "efetch.fcgi",
+                        entrez_params(db="pubmed", id=batch_ids, rettype="medline", retmode="text"),
+                        event=event,
+                    )
+            # Parsing is CPU-bound; keep the event loop free for the other requests
+            text = payload.decode("utf-8", errors="replace")
+            return await asyncio.get_running_loop().run_in_executor(None, self._parse_medline, text)
 
+        tasks = [
+            asyncio.ensure_future(fetch_batch(id_list[start:start + batch_size]))
+            for start in range(0, len(id_list), batch_size)
+        ]
+        try:
+            for task in tasks:
+                for paper in await task:
+                    yield paper
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def afetch_papers(
+        self,
+        query: str,
+        max_results: int = 100,
+        mindate: Optional[str] = None,
+        maxdate: Optional[str] = None,
+        datetype: str = "pdat",
+    ) -> List[Dict[str, Any]]:
+        """Asynchronously fetch papers from PubMed based on the query.
+
+        Args:
+            query: PubMed search query
+            max_results: Maximum number of results to fetch
+            mindate: Earliest date to include (YYYY, YYYY/MM or YYYY/MM/DD)
+            maxdate: Latest date to include (YYYY, YYYY/MM or YYYY/MM/DD)
+            datetype: PubMed date field the range applies to (pdat, edat or mdat)
+
+        Returns:
+            List of paper dictionaries with metadata
+        """
+        papers = [
+            paper async for paper in self.aiter_papers(
+                query, max_results=max_results, mindate=mindate, maxdate=maxdate, datetype=datetype
+            )
+        ]
         logger.info("Fetched %d papers from PubMed", len(papers))
         return papers
 
-    def _process_record(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _parse_medline_parallel(self, text: str) -> List[Dict[str, Any]]:
+        """Parse MEDLINE text across processes, split at record boundaries.
+
+        Args:
+            text: Raw MEDLINE text returned by efetch
+
+        Returns:
+            List of processed paper dictionaries in the original record order
+        """
+        records = [record for record in RECORD_BOUNDARY.split(text) if record.strip()]
+        if len(records) < PARALLEL_PARSE_MIN_RECORDS:
+            return self._parse_medline(text)
+
+        chunk_size = -(-len(records) // self.parse_workers)
+        chunks = [
+            "\n\n".join(records[start:start + chunk_size]) + "\n"
+            for start in range(0, len(records), chunk_size)
+        ]
+
+        if self._parse_pool is None:
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_workers, initializer=_init_parse_worker, initargs=(self.email, self.fields)
+            )
+        logger.debug("Parsing %d records in %d chunks", len(records), len(chunks))
+
+        # Workers parse, scan emails and extract the requested fields; only plain dicts come back
+        papers: List[Dict[str, Any]] = []
+        for chunk_papers in self._parse_pool.map(_parse_medline_chunk, chunks):
+            papers.extend(chunk_papers)
+        return papers
+
+    def _date_range_params(
+        self, mindate: Optional[str], maxdate: Optional[str], datetype: str
+    ) -> Dict[str, str]:
+        """Build esearch parameters restricting results to a date window.
+
+        Args:
+            mindate: Earliest date to include, or None for no lower bound
+            maxdate: Latest date to include, or None for no upper bound
+            datetype: PubMed date field the range applies to
+
+        Returns:
+            Dictionary of esearch parameters (empty if no bound is given)
+
+        Raises:
+            ValueError: If a bound or the date type is invalid
+        """
+        if not mindate and not maxdate:
+            return {}
+        if datetype not in DATE_TYPES:
+            raise ValueError(f"Invalid date type {datetype!r}: expected one of {', '.join(DATE_TYPES)}")
+
+        # esearch only honours the window when both bounds are present
+        return {
+            "mindate": normalize_date_bound(mindate or "1800"),
+            "maxdate": normalize_date_bound(maxdate or "3000"),
+            "datetype": datetype,
+        }
+
+    def _parse_medline(self, text: str) -> List[Dict[str, Any]]:
+        """Parse MEDLINE text into processed paper dictionaries.
+
+        Args:
+            text: Raw MEDLINE text returned by efetch
+
+        Returns:
+            List of processed paper dictionaries
+        """
+        return self._process_records(list(Medline.parse(io.StringIO(text))))
+
+    def _process_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Process a batch of PubMed records, scanning their affiliations for emails at once.
+
+        Args:
+            records: PubMed records from Medline parser
+
+        Returns:
+            List of processed paper dictionaries
+        """
+        if self.fields & {"corresponding_email", "emails"}:
+            batch_emails: List[Optional[List[Tuple[int, str]]]] = list(self._extract_emails(records))
+        else:
+            batch_emails = [None] * len(records)
+
+        papers = []
+        for record, emails in zip(records, batch_emails):
+            paper = self._process_record(record, emails)
+            # Not a truthiness test: len() would compute every lazy field
+            if paper is not None:
+                papers.append(paper)
+        return papers
+
+    def _process_record(
+        self, record: Dict[str, Any], emails: Optional[List[Tuple[int, str]]] = None
+    ) -> Optional[Dict[str, Any]]:
         """Process a PubMed record into a standardized paper dictionary.
 
         Args:
             record: PubMed record from Medline parser
+            emails: (affiliation index, email) pairs from _extract_emails, if the
+                record was scanned as part of a batch
 
         Returns:
             Processed paper dictionary or None if processing fails
         """
         try:
-            # Extract basic information
-            paper = {
-                "pmid": record.get("PMID", ""),
-                "title": record.get("TI", ""),
-                "publication_date": self._format_date(record),
-                "authors": self._extract_authors(record),
-                "corresponding_email": self._extract_email(record)
-            }
-            
-            return paper
-            
+            # Extract basic information; everything else is computed when first read
+            loaders: Dict[str, Callable[[], Dict[str, Any]]] = {}
+            date_loader = functools.partial(self._date_fields, record)
+            loaders.update({field: date_loader for field in DATE_FIELDS if field in self.fields})
+            if "authors" in self.fields:
+                loaders["authors"] = lambda: {"authors": self._extract_authors(record)}
+            if "corresponding_email" in self.fields:
+                if emails is None:
+                    loaders["corresponding_email"] = lambda: {"corresponding_email": self._extract_email(record)}
+                else:
+                    first_email = emails[0][1] if emails else ""
+                    loaders["corresponding_email"] = lambda: {"corresponding_email": first_email}
+            if "emails" in self.fields:
+                loaders["emails"] = lambda: {"emails": self._attribute_emails(record, emails)}
+
+            return LazyPaper({"pmid": record.get("PMID", ""), "title": record.get("TI", "")}, loaders)
+
         except Exception as e:
             logger.warning("Error processing record: %s", str(e))
             return None
 
+    def _date_fields(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the raw and normalized publication date of a record.
+
+        Args:
+            record: PubMed record from Medline parser
+
+        Returns:
+            Dictionary with publication_date, publication_date_iso and date_precision
+        """
+        publication_date = self._format_date(record)
+        publication_date_iso, date_precision = self._parse_date(publication_date)
+        return {
+            "publication_date": publication_date,
+            "publication_date_iso": publication_date_iso,
+            "date_precision": date_precision,
+        }
+
     def _extract_authors(self, record: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Extract author information from a PubMed record.
 
@@ -131,29 +743,23 @@ class PubMedFetcher:
         author_list = record.get("AU", [])
         
         # Get affiliations
-        affiliations = record.get("AD", "")
-        
-        # Handle both string and list types for affiliations
-        if isinstance(affiliations, list):
-            # If it's already a list, use it directly
-            affiliation_list = [aff.strip() for aff in affiliations if aff.strip()]
-        else:
-            # If it's a string, split by semicolon
-            affiliation_list = [aff.strip() for aff in affiliations.split(";") if aff.strip()]
+        affiliation_list = self._affiliation_list(record)
         
+        # Lowercase every affiliation once and index it, instead of comparing
+        # every author with every affiliation
+        index = AffiliationIndex(affiliation_list)
+        matches: Dict[str, List[int]] = {}
+
         # Process each author
-        for i, author_name in enumerate(author_list):
-            # Try to match author with affiliation
+        for author_name in author_list:
+            # Match authors to affiliations that mention their last name
             # This is a simplistic approach - in reality, PubMed data structure is more complex
             # and would require more sophisticated parsing
-            author_affiliations = []
-            
-            # Look for affiliations that mention this author
-            for affiliation in affiliation_list:
-                # Check if author's last name is mentioned in the affiliation
-                last_name = author_name.split(",")[0] if "," in author_name else author_name
-                if last_name.lower() in affiliation.lower():
-                    author_affiliations.append(affiliation)
+            last_name = author_name.split(",")[0] if "," in author_name else author_name
+            needle = last_name.lower()
+            if needle not in matches:
+                matches[needle] = index.find(needle)
+            author_affiliations = [affiliation_list[i] for i in matches[needle]]
             
             # If no specific affiliations found, use all affiliations
             # This is a fallback and not ideal
@@ -167,39 +773,141 @@ class PubMedFetcher:
         
         return authors
 
-    def _extract_email(self, record: Dict[str, Any]) -> str:
-        """Extract corresponding author email from a PubMed record.
+    def _affiliation_list(self, record: Dict[str, Any]) -> List[str]:
+        """Return the non-empty affiliation lines of a PubMed record.
 
         Args:
             record: PubMed record from Medline parser
 
         Returns:
-            Corresponding author email or empty string if not found
+            List of stripped affiliation strings
         """
-        # Try to find email in the affiliations field
         affiliations = record.get("AD", "")
-        
-        # Simple regex-free approach to find email
-        email = ""
-        
+
         # Handle both string and list types for affiliations
         if isinstance(affiliations, list):
-            # If it's a list, join all elements with spaces
-            affiliations_text = " ".join(affiliations)
-        else:
-            # If it's a string, use it directly
-            affiliations_text = affiliations
-            
-        if "@" in affiliations_text:
-            # Split by spaces and find part containing @
-            parts = affiliations_text.split()
-            for part in parts:
-                if "@" in part:
-                    # Clean up the email (remove punctuation at the end)
-                    email = part.strip(".,;()[]{}\"'")
-                    break
-        
-        return email
+            # If it's already a list, use it directly
+            return [aff.strip() for aff in affiliations if aff.strip()]
+        # If it's a string, split by semicolon
+        return [aff.strip() for aff in affiliations.split(";") if aff.strip()]
+
+    def _extract_email(self, record: Dict[str, Any]) -> str:
+        """Extract corresponding author email from a PubMed record.
+
+        Args:
+            record: PubMed record from Medline parser
+
+        Returns:
+            Corresponding author email or empty string if not found
+        """
+        emails = self._extract_emails([record])[0]
+        return emails[0][1] if emails else ""
+
+    def _extract_emails(self, records: List[Dict[str, Any]]) -> List[List[Tuple[int, str]]]:
+        """Find the emails in the affiliations of a batch of records with one regex pass.
+
+        All affiliation lines of the batch are joined into one buffer, and each
+        match is mapped back to its record and line through the line offsets.
+
+        Args:
+            records: PubMed records from Medline parser
+
+        Returns:
+            For each record, (affiliation index, email) pairs in affiliation order
+        """
+        lines: List[str] = []
+        owners: List[Tuple[int, int]] = []
+        for record_index, record in enumerate(records):
+            for line_index, line in enumerate(self._affiliation_list(record)):
+                lines.append(line)
+                owners.append((record_index, line_index))
+
+        offsets: List[int] = []
+        position = 0
+        for line in lines:
+            offsets.append(position)
+            position += len(line) + 1
+
+        emails: List[List[Tuple[int, str]]] = [[] for _ in records]
+        # Lines are joined with newlines, which the pattern never crosses
+        for match in EMAIL_PATTERN.finditer("\n".join(lines)):
+            record_index, line_index = owners[bisect.bisect_right(offsets, match.start()) - 1]
+            emails[record_index].append((line_index, match.group().lstrip(".")))
+        return emails
+
+    def _attribute_emails(
+        self, record: Dict[str, Any], emails: Optional[List[Tuple[int, str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Map each email of a record to the authors it most likely belongs to.
+
+        An email is attributed to the authors whose surname appears as a whole
+        word in its affiliation line. Authors whose surname appears in the
+        email's local part take precedence, whether or not their surname is in
+        the line.
+
+        Args:
+            record: PubMed record from Medline parser
+            emails: (affiliation index, email) pairs, scanned here if not given
+
+        Returns:
+            List of {"email": ..., "authors": [...]} dictionaries in affiliation order
+        """
+        if emails is None:
+            emails = self._extract_emails([record])[0]
+        if not emails:
+            return []
+
+        affiliation_list = self._affiliation_list(record)
+        names = record.get("AU", [])
+
+        # Author positions by lowercased surname: one-word surnames are looked up in the
+        # words of a line, longer ones get one whole-word pattern each; by_letters holds
+        # the surnames without punctuation, as they appear in an email's local part
+        by_word: Dict[str, List[int]] = {}
+        by_phrase: Dict[str, List[int]] = {}
+        by_letters: Dict[str, List[int]] = {}
+        for position, name in enumerate(names):
+            surname = _surname(name).lower()
+            if not surname:
+                continue
+            (by_word if WORD_PATTERN.fullmatch(surname) else by_phrase).setdefault(surname, []).append(position)
+            letters = NON_WORD_PATTERN.sub("", surname)
+            if letters:
+                by_letters.setdefault(letters, []).append(position)
+        phrase_patterns = [
+            (re.compile(rf"\b{re.escape(phrase)}\b"), positions) for phrase, positions in by_phrase.items()
+        ]
+        longest_letters = max(map(len, by_letters), default=0)
+
+        candidates_by_line: Dict[int, Set[int]] = {}
+        attributed = []
+        for line_index, email in emails:
+            candidates = candidates_by_line.get(line_index)
+            if candidates is None:
+                # Addresses are left out, or every surname inside one would match its own line
+                affiliation = EMAIL_PATTERN.sub("", affiliation_list[line_index]).lower()
+                # Whole words only, so "li" is not found in "clinical"
+                candidates = {
+                    position for word in set(WORD_PATTERN.findall(affiliation))
+                    for position in by_word.get(word, ())
+                }
+                for pattern, positions in phrase_patterns:
+                    if pattern.search(affiliation):
+                        candidates.update(positions)
+                candidates_by_line[line_index] = candidates
+
+            local_part = NON_WORD_PATTERN.sub("", email.split("@", 1)[0].lower())
+            pieces = {
+                local_part[start:end]
+                for start in range(len(local_part))
+                for end in range(start + 1, min(len(local_part), start + longest_letters) + 1)
+            }
+            by_local_part = {position for piece in pieces for position in by_letters.get(piece, ())}
+
+            # Authors matching both come first, then either match alone
+            positions = by_local_part & candidates or by_local_part or candidates
+            attributed.append({"email": email, "authors": [names[position] for position in sorted(positions)]})
+        return attributed
 
     def _format_date(self, record: Dict[str, Any]) -> str:
         """Format the publication date from a PubMed record.
@@ -224,4 +932,97 @@ class PubMedFetcher:
                 return date_str
         
         # If no date found
-        return ""
\ No newline at end of file
+        return ""
+
+    def _parse_date(self, date_str: Any) -> Tuple[str, str]:
+        """Normalize a MEDLINE date string to an ISO 8601 date.
+
+        Args:
+            date_str: Raw date such as "2021 Apr", "2022 Aug 4", "2020 Winter" or "20230115"
+
+        Returns:
+            Tuple of (ISO date truncated to its precision, precision) where precision is
+            one of "day", "month", "season", "year", or ("", "") if the date can't be parsed
+        """
+        if isinstance(date_str, list):
+            date_str = date_str[0] if date_str else ""
+        if not isinstance(date_str, str):
+            return "", ""
+
+        match = DATE_PATTERN.match(date_str)
+        if not match:
+            return "", ""
+
+        year, month, day = match.group("year"), match.group("month"), match.group("day")
+        if not month:
+            return year, "year"
+
+        if month.isdigit():
+            month_num = int(month)
+        elif month[:3].lower() in MONTHS:
+            month_num = MONTHS[month[:3].lower()]
+        elif month.lower() in SEASONS:
+            return f"{year}-{SEASONS[month.lower()]:02d}", "season"
+        else:
+            return year, "year"
+
+        if not 1 <= month_num <= 12:
+            return year, "year"
+        if day:
+            try:
+                return datetime.date(int(year), month_num, int(day)).isoformat(), "day"
+            except ValueError:
+                # Impossible days (e.g. Feb 30) keep only the month
+                pass
+        return f"{year}-{month_num:02d}", "month"
+
+
+def normalize_date_bound(value: str) -> str:
+    """Validate an esearch date bound and return it as YYYY, YYYY/MM or YYYY/MM/DD.
+
+    Args:
+        value: Date such as "2020", "2020/03", "2020-03-15"
+
+    Returns:
+        Date with "/" separators and zero-padded month and day
+
+    Raises:
+        ValueError: If the value is not in one of the accepted formats or is not a real date
+    """
+    match = DATE_BOUND_PATTERN.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid date {value!r}: expected YYYY, YYYY/MM or YYYY/MM/DD")
+    year, month, day = match.groups()
+    try:
+        datetime.date(int(year), int(month or 1), int(day or 1))
+    except ValueError as e:
+        raise ValueError(f"Invalid date {value!r}: {e}") from None
+    return "/".join([year] + [f"{int(part):02d}" for part in (month, day) if part])
+
+
+def _surname(author_name: str) -> str:
+    """Return the surname of a MEDLINE author name ("Smith J" or "Smith, John")."""
+    if "," in author_name:
+        return author_name.split(",")[0].strip()
+    parts = author_name.rsplit(" ", 1)
+    return parts[0] if len(parts) > 1 else author_name
+
+
+# Fetcher used by parser worker processes
+_worker_fetcher: Optional[PubMedFetcher] = None
+
+
+def _init_parse_worker(email: str, fields: Collection[str]) -> None:
+    """Create the fetcher used to parse records in a parser worker process."""
+    global _worker_fetcher
+    _worker_fetcher = PubMedFetcher(email=email, fields=fields)
+
+
+def _parse_medline_chunk(text: str) -> List[Dict[str, Any]]:
+    """Parse and process one chunk of MEDLINE records in a worker process.
+
+    Only the fetcher's requested fields are extracted, eagerly, so the whole
+    per-record cost is spread over the workers.
+    """
+    assert _worker_fetcher is not None
+    return [paper.copy() for paper in _worker_fetcher._parse_medline(text)]
@@ -2,11 +2,156 @@
 
 import os
 import re
-from typing import Optional
+import sqlite3
+import time
+from typing import List, NamedTuple, Optional
+
+# Catalog of generated outputs kept in each output directory
+CATALOG_FILENAME = ".papers_fetcher_catalog.db"
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    filename TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    base_name TEXT NOT NULL,
+    rows INTEGER,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outputs_query ON outputs(query);
+CREATE TABLE IF NOT EXISTS suffixes (
+    base_name TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    next_suffix INTEGER NOT NULL,
+    PRIMARY KEY (base_name, extension)
+);
+"""
+
+
+class OutputRecord(NamedTuple):
+    """An output file created through the catalog."""
+
+    filename: str
+    query: str
+    rows: Optional[int]
+    created: float
+
+
+class OutputCatalog:
+    """SQLite index of the outputs generated in one directory.
+
+    The next free "_N" suffix of every base name is stored in the catalog,
+    so allocating a filename never lists the directory, and each name is
+    claimed with an exclusive create so concurrent writers never share one.
+    """
+
+    def __init__(self, base_dir: str) -> None:
+        """Open (or create) the catalog of a directory.
+
+        Args:
+            base_dir: Directory the outputs are written to
+        """
+        self.base_dir = base_dir
+        self.connection = sqlite3.connect(
+            os.path.join(base_dir, CATALOG_FILENAME), timeout=30.0, isolation_level=None
+        )
+        self.connection.executescript(CATALOG_SCHEMA)
+
+    def allocate(self, search_query: str, extension: str = 'csv') -> str:
+        """Reserve a new output filename for a query by creating it empty.
+
+        Args:
+            search_query: Search query used to generate the base filename
+            extension: File extension (default: 'csv')
+
+        Returns:
+            Filename (relative to base_dir) that now exists and belongs to the caller
+        """
+        base_name = clean_search_query(search_query) or 'search_results'
+
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.connection.execute(
+                "SELECT next_suffix FROM suffixes WHERE base_name = ? AND extension = ?",
+                (base_name, extension),
+            ).fetchone()
+            suffix = row[0] if row else 0
+
+            # Names created outside the catalog (or before it existed) are skipped
+            # one probe at a time; afterwards the stored suffix makes this O(1)
+            while True:
+                filename = f"{base_name}_{suffix}.{extension}" if suffix else f"{base_name}.{extension}"
+                try:
+                    os.close(os.open(os.path.join(self.base_dir, filename), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                    break
+                except FileExistsError:
+                    suffix += 1
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO suffixes(base_name, extension, next_suffix) VALUES(?, ?, ?)",
+                (base_name, extension, suffix + 1),
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO outputs(filename, query, base_name, rows, created) VALUES(?, ?, ?, NULL, ?)",
+                (filename, search_query, base_name, time.time()),
+            )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return filename
+
+    def record_rows(self, filename: str, rows: int) -> None:
+        """Store the number of rows written to an allocated output.
+
+        Args:
+            filename: Filename returned by allocate()
+            rows: Number of data rows written
+        """
+        self.connection.execute("UPDATE outputs SET rows = ? WHERE filename = ?", (rows, filename))
+
+    def release(self, filename: str) -> None:
+        """Give back an allocated output whose export failed.
+
+        The reserved (empty or partly written) file and its catalog entry are
+        removed. The suffix is not handed out again, so concurrent writers
+        never see a name twice.
+
+        Args:
+            filename: Filename returned by allocate()
+        """
+        self.connection.execute("DELETE FROM outputs WHERE filename = ?", (filename,))
+        try:
+            os.remove(os.path.join(self.base_dir, filename))
+        except FileNotFoundError:
+            pass
+
+    def outputs_for(self, search_query: str) -> List[OutputRecord]:
+        """Look up the earlier outputs of a query, oldest first.
+
+        Args:
+            search_query: Search query exactly as given to allocate()
+
+        Returns:
+            List of output records
+        """
+        rows = self.connection.execute(
+            "SELECT filename, query, rows, created FROM outputs WHERE query = ? ORDER BY created",
+            (search_query,),
+        )
+        return [OutputRecord(*row) for row in rows]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
 
 def generate_filename(base_dir: str, search_query: str, extension: str = 'csv') -> str:
     """Generate a unique filename based on search query and existing files.
 
+    The file is created empty in base_dir to reserve the name, and recorded
+    in the directory's OutputCatalog. If writing the output fails, give the
+    name back with release_filename().
+
     Args:
         base_dir: Directory where the file will be created
         search_query: Search query used to generate the base filename
@@ -15,34 +160,26 @@ def generate_filename(base_dir: str, search_query: str, extension: str = 'csv')
     Returns:
         A unique filename based on the search query
     """
-    # Clean the search query to create a valid filename
-    base_name = clean_search_query(search_query)
-    
-    # If base_name is empty after cleaning, use 'search_results' as default
-    if not base_name:
-        base_name = 'search_results'
-    
-    # Get existing files with similar names
-    pattern = rf'^{re.escape(base_name)}(?:_\d+)?\.{extension}$'
-    existing_files = [f for f in os.listdir(base_dir) 
-                     if os.path.isfile(os.path.join(base_dir, f)) and 
-                     re.match(pattern, f, re.IGNORECASE)]
-    
-    if not existing_files:
-        return f"{base_name}.{extension}"
-    
-    # Find the highest number suffix
-    max_num = 0
-    for file in existing_files:
-        match = re.search(rf'_(\d+)\.{extension}$', file)
-        if match:
-            num = int(match.group(1))
-            max_num = max(max_num, num)
-        elif file == f"{base_name}.{extension}":
-            max_num = max(max_num, 0)
-    
-    # Generate new filename with incremented number
-    return f"{base_name}_{max_num + 1}.{extension}"
+    catalog = OutputCatalog(base_dir)
+    try:
+        return catalog.allocate(search_query, extension)
+    finally:
+        catalog.close()
+
+
+def release_filename(base_dir: str, filename: str) -> None:
+    """Remove a filename reserved by generate_filename() whose output could not be written.
+
+    Args:
+        base_dir: Directory passed to generate_filename()
+        filename: Filename returned by generate_filename()
+    """
+    catalog = OutputCatalog(base_dir)
+    try:
+        catalog.release(filename)
+    finally:
+        catalog.close()
+
 
 def clean_search_query(query: str) -> str:
     """Clean search query to create a valid filename.
@@ -56,8 +193,8 @@ def clean_search_query(query: str) -> str:
     # Remove special characters and replace spaces with underscores
     cleaned = re.sub(r'[^\w\s-]', '', query)
     cleaned = re.sub(r'[-\s]+', '_', cleaned)
-    
+
     # Limit length and remove trailing underscores
     cleaned = cleaned[:50].strip('_').lower()
-    
-    return cleaned
\ No newline at end of file
+
+    return cleaned
@@ -1,9 +1,13 @@
 """Module for filtering papers based on author affiliations."""
 
-from typing import Dict, List, Any, Set, Tuple
+from typing import AsyncIterable, AsyncIterator, Dict, List, Any, Optional, Pattern, Set, Tuple
+from functools import lru_cache
 import re
 import logging
 
+from papers_fetcher import trace
+from papers_fetcher.rules import RuleSet, RuleFile
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -24,25 +28,102 @@ ACADEMIC_KEYWORDS = [
 ]
 
 
+def company_affiliation_clause(
+    keywords: List[str] = COMPANY_KEYWORDS, rules: Optional[RuleSet] = None
+) -> Optional[str]:
+    """Turn company rules into a PubMed affiliation ([ad]) clause.
+
+    Only the alternated words of each rule are used, so the clause is a
+    superset pre-filter; PaperFilter still performs the exact check.
+
+    Args:
+        keywords: Regex patterns of the form r"\\b(?:term|term|...)\\b"
+        rules: Rule set whose company rules are used instead of keywords
+
+    Returns:
+        Clause such as '("inc"[ad] OR "ltd"[ad] OR ...)', or None if some company
+        rule can't be expressed as [ad] terms
+    """
+    if rules is None:
+        rules = RuleSet.from_keywords(keywords, [])
+    terms = rules.company_search_terms()
+    if not terms:
+        return None
+    return "(" + " OR ".join(f'"{term}"[ad]' for term in terms) + ")"
+
+
+def push_down_affiliation_filter(
+    query: str, keywords: List[str] = COMPANY_KEYWORDS, rules: Optional[RuleSet] = None
+) -> str:
+    """AND a company affiliation clause onto a PubMed query.
+
+    Args:
+        query: PubMed search query
+        keywords: Company keyword patterns to push down
+        rules: Rule set whose company rules are pushed down instead of keywords
+
+    Returns:
+        Query restricted server-side to papers with company-like affiliations, or the
+        unchanged query if the rules can't be pushed down without losing papers
+    """
+    clause = company_affiliation_clause(keywords, rules)
+    if clause is None:
+        logger.warning("Company rules contain patterns PubMed can't search; not pushing them down")
+        return query
+    return f"({query}) AND {clause}"
+
+
+@lru_cache(maxsize=16)
+def _keyword_rules(company_keywords: Tuple[str, ...], academic_keywords: Tuple[str, ...]) -> RuleSet:
+    """Compile keyword lists once per process instead of once per PaperFilter."""
+    return RuleSet.from_keywords(company_keywords, academic_keywords)
+
+
 class PaperFilter:
     """Class to filter papers based on author affiliations."""
 
-    def __init__(self, debug: bool = False):
+    def __init__(
+        self,
+        debug: bool = False,
+        company_keywords: Optional[List[str]] = None,
+        academic_keywords: Optional[List[str]] = None,
+        rules_file: Optional[str] = None,
+    ):
         """Initialize the paper filter.
 
         Args:
             debug: Whether to enable debug logging
+            company_keywords: Regex patterns indicating a company (defaults to COMPANY_KEYWORDS)
+            academic_keywords: Regex patterns indicating academia (defaults to ACADEMIC_KEYWORDS)
+            rules_file: JSON file of weighted rules; replaces the keyword lists and is
+                reloaded when it changes
         """
         # Set logging level based on debug flag
         if debug:
             logger.setLevel(logging.DEBUG)
         
-        # Compile regex patterns for better performance
-        self.company_pattern = re.compile('|'.join(COMPANY_KEYWORDS), re.IGNORECASE)
-        self.academic_pattern = re.compile('|'.join(ACADEMIC_KEYWORDS), re.IGNORECASE)
+        self.rule_file = RuleFile(rules_file) if rules_file else None
+        self._keyword_rules = _keyword_rules(
+            tuple(company_keywords or COMPANY_KEYWORDS), tuple(academic_keywords or ACADEMIC_KEYWORDS)
+        )
         
         logger.debug("PaperFilter initialized")
 
+    @property
+    def rules(self) -> RuleSet:
+        """Rule set currently used to classify affiliations."""
+        return self.rule_file.rules if self.rule_file else self._keyword_rules
+
+    @property
+    def company_pattern(self) -> Pattern[str]:
+        """Single regex matching any company rule."""
+        return self.rules.company_pattern
+
+    @property
+    def academic_pattern(self) -> Pattern[str]:
+        """Single regex matching any academic rule."""
+        return self.rules.academic_pattern
+
     def filter_papers(self, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter papers to include only those with company affiliations.
 
@@ -53,24 +134,51 @@ class PaperFilter:
             List of filtered paper dictionaries with additional fields for non-academic authors,
             company affiliations, and corresponding author email
         """
-        filtered_papers = []
-        
-        for paper in papers:
-            # Process affiliations and authors
-            non_academic_authors, company_affiliations = self._process_affiliations(paper)
-            
-            # Only include papers with at least one company affiliation
-            if company_affiliations:
-                # Add the filtered information to the paper
-                paper["non_academic_authors"] = non_academic_authors
-                paper["company_affiliations"] = company_affiliations
-                
-                # Add to filtered papers
-                filtered_papers.append(paper)
-        
+        if self.rule_file:
+            self.rule_file.reload_if_changed()
+        with trace.span("filter", papers=len(papers)) as filter_span:
+            filtered_papers = [paper for paper in papers if self._annotate_paper(paper)]
+            filter_span["matched"] = len(filtered_papers)
+
         logger.debug("Filtered %d papers with company affiliations", len(filtered_papers))
         return filtered_papers
 
+    async def afilter_papers(self, papers: AsyncIterable[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Asynchronously filter a stream of papers to those with company affiliations.
+
+        Args:
+            papers: Async iterable of paper dictionaries, e.g. PubMedFetcher.aiter_papers()
+
+        Yields:
+            Paper dictionaries annotated with non-academic authors and company affiliations
+        """
+        if self.rule_file:
+            self.rule_file.reload_if_changed()
+        async for paper in papers:
+            if self._annotate_paper(paper):
+                yield paper
+
+    def _annotate_paper(self, paper: Dict[str, Any]) -> bool:
+        """Add company affiliation fields to a paper if it has any.
+
+        Args:
+            paper: Paper dictionary from PubMedFetcher
+
+        Returns:
+            True if the paper has at least one company affiliation, False otherwise
+        """
+        # Process affiliations and authors
+        non_academic_authors, company_affiliations = self._process_affiliations(paper)
+
+        # Only include papers with at least one company affiliation
+        if not company_affiliations:
+            return False
+
+        # Add the filtered information to the paper
+        paper["non_academic_authors"] = non_academic_authors
+        paper["company_affiliations"] = company_affiliations
+        return True
+
     def _process_affiliations(self, paper: Dict[str, Any]) -> Tuple[List[str], List[str]]:
         """Process author affiliations to identify non-academic authors and company affiliations.
 
@@ -112,17 +220,10 @@ class PaperFilter:
         Returns:
             True if the affiliation is from a company, False otherwise
         """
-        # Check for company keywords
-        if self.company_pattern.search(affiliation):
-            # If it has company keywords but also academic keywords, need to determine which is stronger
-            if self.academic_pattern.search(affiliation):
-                # This is a heuristic - if there are more company matches than academic matches,
-                # consider it a company
-                company_matches = len(self.company_pattern.findall(affiliation))
-                academic_matches = len(self.academic_pattern.findall(affiliation))
-                return company_matches > academic_matches
-            return True
-        return False
+        # Score company and academic rules in one pass; when both match, the
+        # stronger side wins
+        company_score, academic_score = self.rules.scores(affiliation)
+        return company_score > 0 and company_score > academic_score
 
     def _extract_company_name(self, affiliation: str) -> str:
         """Extract company name from affiliation string.
@@ -136,11 +237,11 @@ class PaperFilter:
         try:
             # This is a simple heuristic - in practice, a more sophisticated NLP approach would be better
             # Look for company patterns and extract the surrounding text
-            match = self.company_pattern.search(affiliation)
-            if match:
+            span = self.rules.first_company_match(affiliation)
+            if span:
                 # Get the start position of the match
-                start_pos = max(0, match.start() - 30)  # Look up to 30 chars before the match
-                end_pos = min(len(affiliation), match.end() + 30)  # Look up to 30 chars after the match
+                start_pos = max(0, span[0] - 30)  # Look up to 30 chars before the match
+                end_pos = min(len(affiliation), span[1] + 30)  # Look up to 30 chars after the match
                 
                 # Extract the substring
                 company_text = affiliation[start_pos:end_pos].strip()
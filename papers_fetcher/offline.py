@@ -0,0 +1,132 @@
+"""Module for offline full-text search over locally cached papers."""
+
+import json
+import logging
+import sqlite3
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+from papers_fetcher import trace
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    pmid TEXT NOT NULL UNIQUE,
+    data TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, authors, affiliations, content='', tokenize='unicode61'
+);
+"""
+
+
+class OfflineIndex:
+    """Class to cache papers in SQLite and search them with FTS5."""
+
+    def __init__(self, db_path: str, debug: bool = False) -> None:
+        """Open (or create) the offline index.
+
+        Args:
+            db_path: Path to the SQLite database file
+            debug: Whether to enable debug logging
+        """
+        if debug:
+            logger.setLevel(logging.DEBUG)
+
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+        logger.debug("OfflineIndex opened at %s", db_path)
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def add_papers(self, papers: Iterable[Dict[str, Any]]) -> int:
+        """Insert or refresh papers in the cache and the full-text index.
+
+        Args:
+            papers: Paper dictionaries from PubMedFetcher
+
+        Returns:
+            Number of papers written
+        """
+        count = 0
+        with self.connection:
+            for paper in papers:
+                pmid = str(paper.get("pmid", ""))
+                if not pmid:
+                    continue
+                title, authors, affiliations = _index_columns(paper)
+
+                existing = self.connection.execute(
+                    "SELECT id, data FROM papers WHERE pmid = ?", (pmid,)
+                ).fetchone()
+                if existing:
+                    # Contentless FTS tables need the old values to delete a row
+                    old_title, old_authors, old_affiliations = _index_columns(json.loads(existing[1]))
+                    self.connection.execute(
+                        "INSERT INTO papers_fts(papers_fts, rowid, title, authors, affiliations) "
+                        "VALUES('delete', ?, ?, ?, ?)",
+                        (existing[0], old_title, old_authors, old_affiliations),
+                    )
+                    self.connection.execute(
+                        "UPDATE papers SET data = ? WHERE id = ?", (json.dumps(paper), existing[0])
+                    )
+                    row_id = existing[0]
+                else:
+                    row_id = self.connection.execute(
+                        "INSERT INTO papers(pmid, data) VALUES(?, ?)", (pmid, json.dumps(paper))
+                    ).lastrowid
+
+                self.connection.execute(
+                    "INSERT INTO papers_fts(rowid, title, authors, affiliations) VALUES(?, ?, ?, ?)",
+                    (row_id, title, authors, affiliations),
+                )
+                count += 1
+
+        logger.debug("Indexed %d papers in %s", count, self.db_path)
+        return count
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Search cached papers with an FTS5 query.
+
+        Args:
+            query: FTS5 match expression, e.g. 'title:crispr AND affiliations:pharma'
+            limit: Maximum number of papers to return (None for all)
+
+        Returns:
+            List of paper dictionaries ordered by relevance
+
+        Raises:
+            sqlite3.OperationalError: If the query is not valid FTS5 syntax
+        """
+        with trace.span("offline_search") as search_span:
+            rows = self.connection.execute(
+                "SELECT papers.data FROM papers_fts JOIN papers ON papers.id = papers_fts.rowid "
+                "WHERE papers_fts MATCH ? ORDER BY papers_fts.rank LIMIT ?",
+                (query, -1 if limit is None else limit),
+            )
+            papers = [json.loads(data) for (data,) in rows]
+            search_span["papers"] = len(papers)
+        logger.debug("Offline search for %r matched %d papers", query, len(papers))
+        return papers
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+
+def _index_columns(paper: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Build the title, author and affiliation text indexed for a paper."""
+    authors = paper.get("authors", [])
+    affiliations = {aff for author in authors for aff in author.get("affiliations", [])}
+    return (
+        paper.get("title", ""),
+        "\n".join(author.get("name", "") for author in authors),
+        "\n".join(sorted(affiliations)),
+    )
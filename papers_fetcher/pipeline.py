@@ -0,0 +1,159 @@
+"""Module for running the fetch and filter stages batch by batch."""
+
+import logging
+import math
+from typing import Callable, Dict, Iterator, List, Any, Optional
+
+from papers_fetcher import trace
+from papers_fetcher.fetch import PubMedFetcher, DEFAULT_BATCH_SIZE
+from papers_fetcher.filter import PaperFilter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bounds for adaptive batch sizing in early-termination mode
+MIN_BATCH_SIZE = 20
+MAX_BATCH_SIZE = DEFAULT_BATCH_SIZE
+
+# Extra headroom applied to the estimated batch size so the last batch rarely falls short
+BATCH_HEADROOM = 1.2
+
+
+def iter_company_papers(
+    fetcher: PubMedFetcher,
+    paper_filter: PaperFilter,
+    query: str,
+    max_results: int = 100,
+    want: Optional[int] = None,
+    batch_size: int = 50,
+    on_fetch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    **search_options: Any,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Fetch relevance-ordered batches and yield the filtered papers of each batch.
+
+    When want is given, no further efetch requests are issued once that many
+    company-affiliated papers have been found, and the size of each batch is
+    estimated from the hit rate observed so far.
+
+    Args:
+        fetcher: PubMed fetcher used for esearch and efetch
+        paper_filter: Filter applied to each batch as it arrives
+        query: PubMed search query
+        max_results: Maximum number of PMIDs to consider
+        want: Stop once this many filtered papers were found (None fetches everything)
+        batch_size: Size of the first batch
+        on_fetch: Called with every fetched batch before it is filtered
+        search_options: Extra esearch options such as mindate/maxdate/datetype
+
+    Yields:
+        Lists of filtered paper dictionaries, one per fetched batch
+    """
+    id_list = fetcher.search_ids(query, max_results=max_results, **search_options)
+    if not id_list:
+        logger.info("No papers found matching the query")
+        return
+
+    yield from iter_filtered_batches(fetcher, paper_filter, id_list, want=want, batch_size=batch_size,
+                                     on_fetch=on_fetch)
+
+
+def iter_filtered_batches(
+    fetcher: PubMedFetcher,
+    paper_filter: PaperFilter,
+    id_list: List[str],
+    want: Optional[int] = None,
+    batch_size: int = 50,
+    on_fetch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Fetch known PMIDs in order and yield the filtered papers of each batch.
+
+    Args:
+        fetcher: PubMed fetcher used for efetch
+        paper_filter: Filter applied to each batch as it arrives
+        id_list: PMIDs to fetch, e.g. from esearch or --pmids-file
+        want: Stop once this many filtered papers were found (None fetches everything)
+        batch_size: Size of the first batch
+        on_fetch: Called with every fetched batch before it is filtered
+
+    Yields:
+        Lists of filtered paper dictionaries, one per fetched batch
+    """
+    if want is None:
+        batch_size = DEFAULT_BATCH_SIZE
+
+    fetched = 0
+    found = 0
+    position = 0
+    while position < len(id_list):
+        batch_ids = id_list[position:position + batch_size]
+        position += len(batch_ids)
+
+        papers = fetcher.fetch_details(batch_ids)
+        if on_fetch is not None:
+            on_fetch(papers)
+        filtered_papers = paper_filter.filter_papers(papers)
+        fetched += len(batch_ids)
+        found += len(filtered_papers)
+        logger.debug("Batch of %d PMIDs gave %d company papers (%d/%d so far)",
+                     len(batch_ids), len(filtered_papers), found, fetched)
+
+        if want is not None and found >= want:
+            yield filtered_papers[:len(filtered_papers) - (found - want)]
+            logger.info("Found %d company papers after fetching %d of %d PMIDs", want, fetched, len(id_list))
+            return
+
+        yield filtered_papers
+
+        if want is not None:
+            batch_size = _next_batch_size(want - found, found / fetched, batch_size)
+
+
+def fetch_company_papers(
+    fetcher: PubMedFetcher,
+    paper_filter: PaperFilter,
+    query: str,
+    max_results: int = 100,
+    want: Optional[int] = None,
+    on_fetch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    **search_options: Any,
+) -> List[Dict[str, Any]]:
+    """Fetch and filter papers, stopping early once want matches were found.
+
+    Args:
+        fetcher: PubMed fetcher used for esearch and efetch
+        paper_filter: Filter applied to each batch as it arrives
+        query: PubMed search query
+        max_results: Maximum number of PMIDs to consider
+        want: Stop once this many filtered papers were found (None fetches everything)
+        on_fetch: Called with every fetched batch before it is filtered
+        search_options: Extra esearch options such as mindate/maxdate/datetype
+
+    Returns:
+        List of filtered paper dictionaries in relevance order
+    """
+    filtered_papers: List[Dict[str, Any]] = []
+    with trace.span("fetch_filter", max_results=max_results, want=want) as fetch_span:
+        for batch in iter_company_papers(fetcher, paper_filter, query, max_results=max_results,
+                                         want=want, on_fetch=on_fetch, **search_options):
+            filtered_papers.extend(batch)
+        fetch_span["matched"] = len(filtered_papers)
+    return filtered_papers
+
+
+def _next_batch_size(remaining: int, hit_rate: float, previous: int) -> int:
+    """Estimate how many PMIDs to fetch next to find the remaining matches.
+
+    Args:
+        remaining: Number of matches still wanted
+        hit_rate: Fraction of fetched PMIDs that passed the filter so far
+        previous: Size of the previous batch
+
+    Returns:
+        Next batch size within [MIN_BATCH_SIZE, MAX_BATCH_SIZE]
+    """
+    if hit_rate <= 0:
+        # Nothing found yet, so there is no rate to extrapolate from
+        estimate = previous * 2
+    else:
+        estimate = math.ceil(remaining / hit_rate * BATCH_HEADROOM)
+    return max(MIN_BATCH_SIZE, min(MAX_BATCH_SIZE, estimate))
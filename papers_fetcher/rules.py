@@ -0,0 +1,344 @@
+"""Module for weighted affiliation rule sets compiled into a single-pass matcher."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Dict, List, Any, Optional, Pattern, Sequence, Tuple, Union
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Directory where compiled rule sets are cached, keyed by the rule file's content hash
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "papers_fetcher", "rules")
+
+# Bump when the compiled format changes so stale cache entries are ignored
+COMPILED_FORMAT_VERSION = 2
+
+COMPANY = "company"
+ACADEMIC = "academic"
+
+# Word tokens looked up in the literal-term table
+WORD_PATTERN = re.compile(r"\w+")
+
+# Single alternative that is a plain word, e.g. "pharma" in r"\b(?:inc|pharma)\b"
+LITERAL_ALTERNATIVE = re.compile(r"^\w+$")
+
+# Alternative PubMed can search as an affiliation word or phrase, e.g. "pharma",
+# r"co\." or "medical center" (punctuation is not indexed by PubMed)
+SEARCHABLE_ALTERNATIVE = re.compile(r"^\w+(?: \w+)*(?:\\\.)?$")
+
+# Whole pattern of the form \b(?:a|b|c)\b or \bword\b
+WORD_ALTERNATION = re.compile(r"^\\b(?:\(\?:(?P<group>[^()]*)\)|(?P<single>[^()|]*))\\b$")
+
+Rule = Tuple[str, float]
+
+
+class RuleSet:
+    """Compiled company/academic rules evaluated with one token pass and one regex pass per category.
+
+    Word rules such as r"\\b(?:inc|ltd)\\b" become entries of a hash table
+    looked up once per word of the affiliation; any other pattern goes into
+    its category's combined regex, with one named group per rule.
+    """
+
+    def __init__(self, compiled: Dict[str, Any]) -> None:
+        """Initialize the rule set from its compiled (JSON-serializable) form.
+
+        Args:
+            compiled: Output of compile_rules()
+        """
+        self.compiled = compiled
+        self.terms: Dict[str, Tuple[str, float]] = {
+            term: (category, weight) for term, (category, weight) in compiled["terms"].items()
+        }
+        self.group_weights: Dict[str, float] = compiled["group_weights"]
+        self.company_patterns: List[str] = compiled["company_patterns"]
+        self.academic_patterns: List[str] = compiled["academic_patterns"]
+        # Regex objects can't be cached across processes; each category's residual
+        # regex is compiled on first use
+        self._residuals: Dict[str, Optional[Pattern[str]]] = {}
+        self._company_pattern: Optional[Pattern[str]] = None
+        self._academic_pattern: Optional[Pattern[str]] = None
+
+    @classmethod
+    def from_keywords(cls, company_keywords: Sequence[str], academic_keywords: Sequence[str]) -> "RuleSet":
+        """Build a rule set from unweighted keyword patterns.
+
+        Args:
+            company_keywords: Regex patterns indicating a company
+            academic_keywords: Regex patterns indicating academia
+
+        Returns:
+            Rule set giving every pattern weight 1
+        """
+        return cls(compile_rules([(p, 1.0) for p in company_keywords], [(p, 1.0) for p in academic_keywords]))
+
+    @classmethod
+    def load(cls, path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> "RuleSet":
+        """Load a JSON rule file, reusing its cached compiled form when available.
+
+        The file looks like {"company": [...], "academic": [...]} where each
+        entry is a pattern string or {"pattern": ..., "weight": ...}.
+
+        Args:
+            path: Path to the rule file
+            cache_dir: Directory for compiled rule sets (None disables caching)
+
+        Returns:
+            Compiled rule set
+
+        Raises:
+            ValueError: If the rule file is malformed or a pattern is invalid
+        """
+        with open(path, "rb") as handle:
+            content = handle.read()
+        digest = hashlib.sha256(content).hexdigest()
+
+        cache_path = os.path.join(cache_dir, f"{digest}.json") if cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as handle:
+                    compiled = json.load(handle)
+                if isinstance(compiled, dict) and compiled.get("version") == COMPILED_FORMAT_VERSION:
+                    logger.debug("Loaded compiled rules for %s from cache", path)
+                    return cls(compiled)
+            except Exception as e:
+                logger.warning("Ignoring unreadable rule cache %s: %s", cache_path, e)
+
+        try:
+            data = json.loads(content)
+        except ValueError as e:
+            raise ValueError(f"Invalid rule file {path}: {e}")
+        compiled = compile_rules(_parse_rules(data, COMPANY), _parse_rules(data, ACADEMIC))
+
+        if cache_path:
+            _write_atomic(cache_path, json.dumps(compiled).encode("utf-8"))
+        logger.debug("Compiled %d rules from %s", len(compiled["company_patterns"]) +
+                     len(compiled["academic_patterns"]), path)
+        return cls(compiled)
+
+    def scores(self, text: str) -> Tuple[float, float]:
+        """Score an affiliation against all rules in one pass.
+
+        Args:
+            text: Affiliation string
+
+        Returns:
+            Tuple of (company score, academic score)
+        """
+        totals = {COMPANY: 0.0, ACADEMIC: 0.0}
+        for word in WORD_PATTERN.findall(text.lower()):
+            hit = self.terms.get(word)
+            if hit:
+                totals[hit[0]] += hit[1]
+        for category in (COMPANY, ACADEMIC):
+            # Separate passes, so a company and an academic rule matching the same text both count
+            residual = self.residual(category)
+            if residual is not None:
+                for match in residual.finditer(text):
+                    totals[category] += self.group_weights[match.lastgroup or ""]
+        return totals[COMPANY], totals[ACADEMIC]
+
+    def first_company_match(self, text: str) -> Optional[Tuple[int, int]]:
+        """Find the span of the leftmost company rule match.
+
+        Args:
+            text: Affiliation string
+
+        Returns:
+            (start, end) of the match, or None if no company rule matches
+        """
+        best: Optional[Tuple[int, int]] = None
+        for match in WORD_PATTERN.finditer(text):
+            hit = self.terms.get(match.group().lower())
+            if hit and hit[0] == COMPANY:
+                best = match.span()
+                break
+        residual = self.residual(COMPANY)
+        if residual is not None:
+            match = residual.search(text)
+            if match is not None and (best is None or match.start() < best[0]):
+                best = match.span()
+        return best
+
+    def residual(self, category: str) -> Optional[Pattern[str]]:
+        """Combined regex of a category's non-word rules (compiled on first use).
+
+        Args:
+            category: COMPANY or ACADEMIC
+
+        Returns:
+            Compiled regex, or None if every rule of the category is a word rule
+        """
+        if category not in self._residuals:
+            pattern = self.compiled["residual"][category]
+            self._residuals[category] = re.compile(pattern, re.IGNORECASE) if pattern else None
+        return self._residuals[category]
+
+    def company_search_terms(self) -> Optional[List[str]]:
+        """Words and phrases whose PubMed [ad] search covers every company rule match.
+
+        Returns:
+            Lowercased terms in rule order, or None if a company rule is not a
+            plain word/phrase alternation and so can't be searched server-side
+        """
+        terms: List[str] = []
+        for pattern in self.company_patterns:
+            match = WORD_ALTERNATION.match(pattern)
+            if not match:
+                return None
+            for alternative in (match.group("group") or match.group("single") or "").split("|"):
+                if not SEARCHABLE_ALTERNATIVE.match(alternative):
+                    return None
+                term = alternative.replace("\\.", "").lower()
+                if term not in terms:
+                    terms.append(term)
+        return terms
+
+    @property
+    def company_pattern(self) -> Pattern[str]:
+        """Single regex equivalent to all company rules (compiled on first use)."""
+        if self._company_pattern is None:
+            self._company_pattern = re.compile("|".join(self.company_patterns), re.IGNORECASE)
+        return self._company_pattern
+
+    @property
+    def academic_pattern(self) -> Pattern[str]:
+        """Single regex equivalent to all academic rules (compiled on first use)."""
+        if self._academic_pattern is None:
+            self._academic_pattern = re.compile("|".join(self.academic_patterns), re.IGNORECASE)
+        return self._academic_pattern
+
+
+class RuleFile:
+    """Rule file that is reloaded when its contents change."""
+
+    def __init__(self, path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> None:
+        """Load the rule file.
+
+        Args:
+            path: Path to the rule file
+            cache_dir: Directory for compiled rule sets (None disables caching)
+        """
+        self.path = path
+        self.cache_dir = cache_dir
+        self._signature = self._stat()
+        self.rules = RuleSet.load(path, cache_dir=cache_dir)
+
+    def _stat(self) -> Tuple[float, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime, stat.st_size
+
+    def reload_if_changed(self) -> bool:
+        """Reload the rules if the file was modified since the last load.
+
+        A file that fails to load keeps the previous rules in place.
+
+        Returns:
+            True if new rules were loaded
+        """
+        try:
+            signature = self._stat()
+            if signature == self._signature:
+                return False
+            rules = RuleSet.load(self.path, cache_dir=self.cache_dir)
+        except (OSError, ValueError) as e:
+            logger.error("Keeping previous rules; failed to reload %s: %s", self.path, e)
+            return False
+
+        self._signature = signature
+        self.rules = rules
+        logger.info("Reloaded rules from %s", self.path)
+        return True
+
+
+def compile_rules(company: Sequence[Rule], academic: Sequence[Rule]) -> Dict[str, Any]:
+    """Compile weighted rules into the JSON-serializable form used by RuleSet.
+
+    Args:
+        company: (pattern, weight) pairs indicating a company
+        academic: (pattern, weight) pairs indicating academia
+
+    Returns:
+        Dictionary with the literal-term table and the residual regex of each category
+
+    Raises:
+        ValueError: If a pattern is not a valid regex or uses named groups
+    """
+    terms: Dict[str, Tuple[str, float]] = {}
+    residuals: Dict[str, List[str]] = {COMPANY: [], ACADEMIC: []}
+    group_weights: Dict[str, float] = {}
+
+    for category, rules in ((COMPANY, company), (ACADEMIC, academic)):
+        residual = residuals[category]
+        for pattern, weight in rules:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid {category} pattern {pattern!r}: {e}")
+            if "(?P<" in pattern:
+                raise ValueError(f"Named groups are not allowed in rules: {pattern!r}")
+
+            match = WORD_ALTERNATION.match(pattern)
+            alternatives = (match.group("group") or match.group("single") or "").split("|") if match else []
+            if not match:
+                # Arbitrary regex: evaluated by the combined residual pattern
+                alternatives = []
+                _add_residual(residual, group_weights, pattern, category, weight)
+
+            for alternative in alternatives:
+                if LITERAL_ALTERNATIVE.match(alternative):
+                    term = alternative.lower()
+                    # A word counts once, like one regex match; keep the strongest rule
+                    if term not in terms or terms[term][1] < weight:
+                        terms[term] = (category, weight)
+                else:
+                    _add_residual(residual, group_weights, rf"\b(?:{alternative})\b", category, weight)
+
+    return {
+        "version": COMPILED_FORMAT_VERSION,
+        "terms": {term: list(hit) for term, hit in terms.items()},
+        "residual": {category: "|".join(patterns) for category, patterns in residuals.items()},
+        "group_weights": group_weights,
+        "company_patterns": [pattern for pattern, _ in company],
+        "academic_patterns": [pattern for pattern, _ in academic],
+    }
+
+
+def _add_residual(residual: List[str], group_weights: Dict[str, float],
+                  pattern: str, category: str, weight: float) -> None:
+    """Append a pattern to its category's combined regex under its own named group."""
+    name = f"{category[0]}{len(residual)}"
+    residual.append(f"(?P<{name}>{pattern})")
+    group_weights[name] = weight
+
+
+def _parse_rules(data: Any, category: str) -> List[Rule]:
+    """Read the (pattern, weight) pairs of one category from a rule file."""
+    if not isinstance(data, dict):
+        raise ValueError("Rule file must contain a JSON object")
+    rules: List[Rule] = []
+    entry: Union[str, Dict[str, Any]]
+    for entry in data.get(category, []):
+        if isinstance(entry, str):
+            rules.append((entry, 1.0))
+        elif isinstance(entry, dict) and isinstance(entry.get("pattern"), str):
+            rules.append((entry["pattern"], float(entry.get("weight", 1.0))))
+        else:
+            raise ValueError(f"Invalid {category} rule: {entry!r}")
+    return rules
+
+
+def _write_atomic(path: str, payload: bytes) -> None:
+    """Write a file via rename so concurrent readers never see a partial file."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(payload)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning("Could not cache compiled rules at %s: %s", path, e)
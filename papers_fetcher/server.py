@@ -0,0 +1,302 @@
+"""Module for serving paper queries over a local HTTP/JSON API."""
+
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+
+from papers_fetcher.fetch import PubMedFetcher
+from papers_fetcher.filter import PaperFilter
+from papers_fetcher.export import PaperExporter
+from papers_fetcher.pipeline import iter_company_papers
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class _SharedResult:
+    """Filtered batches of one query, readable by every client while they arrive."""
+
+    def __init__(self) -> None:
+        self.batches: List[List[Dict[str, Any]]] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._condition = threading.Condition()
+
+    def append(self, batch: List[Dict[str, Any]]) -> None:
+        """Publish one filtered batch to the readers."""
+        with self._condition:
+            self.batches.append(batch)
+            self._condition.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Mark the result complete, or failed with error."""
+        with self._condition:
+            self.done = True
+            self.error = error
+            self._condition.notify_all()
+
+    def __iter__(self) -> Iterator[List[Dict[str, Any]]]:
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(self.batches) and not self.done:
+                    self._condition.wait()
+                if index < len(self.batches):
+                    batch = self.batches[index]
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            index += 1
+            yield batch
+
+
+class PapersService:
+    """Class holding a warm fetch/filter/export stack shared by all clients."""
+
+    def __init__(self, email: str, debug: bool = False, cache_ttl: float = 300.0, cache_size: int = 128) -> None:
+        """Initialize the papers service.
+
+        Args:
+            email: Email address to use for NCBI API (required by PubMed)
+            debug: Whether to enable debug logging
+            cache_ttl: Number of seconds a completed query result is reused
+            cache_size: Maximum number of completed query results kept
+        """
+        if debug:
+            logger.setLevel(logging.DEBUG)
+
+        self.fetcher = PubMedFetcher(email=email, debug=debug)
+        self.filter = PaperFilter(debug=debug)
+        self.exporter = PaperExporter(debug=debug)
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, int], _SharedResult] = {}
+        self._cache: "OrderedDict[Tuple[str, int], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+
+        logger.debug("PapersService initialized")
+
+    def query(self, query: str, max_results: int = 100) -> List[Dict[str, Any]]:
+        """Fetch and filter papers, sharing work between identical concurrent queries.
+
+        Args:
+            query: PubMed search query
+            max_results: Maximum number of results to fetch
+
+        Returns:
+            List of filtered paper dictionaries
+        """
+        return [paper for batch in self.iter_query(query, max_results=max_results) for paper in batch]
+
+    def iter_query(self, query: str, max_results: int = 100) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the filtered papers of a query batch by batch as they are fetched.
+
+        The fetch runs in a background thread shared by every client asking
+        the same query, so a client that disconnects early does not cancel it
+        for the others.
+
+        Args:
+            query: PubMed search query
+            max_results: Maximum number of results to fetch
+
+        Yields:
+            Lists of filtered paper dictionaries
+        """
+        key = (query, max_results)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and time.monotonic() - cached[0] >= self.cache_ttl:
+                del self._cache[key]
+                cached = None
+            if cached:
+                self._cache.move_to_end(key)
+            else:
+                shared = self._inflight.get(key)
+                owner = shared is None
+                if shared is None:
+                    shared = _SharedResult()
+                    self._inflight[key] = shared
+
+        if cached:
+            logger.debug("Serving cached result for query: %s", query)
+            yield cached[1]
+            return
+
+        if owner:
+            threading.Thread(target=self._run_query, args=(key, shared), daemon=True).start()
+        else:
+            logger.debug("Joining in-flight request for query: %s", query)
+        yield from shared
+
+    def _run_query(self, key: Tuple[str, int], shared: _SharedResult) -> None:
+        """Fetch and filter a query, publishing each batch and caching the result.
+
+        Args:
+            key: (query, max_results) of the request
+            shared: Result the batches are published to
+        """
+        query, max_results = key
+        papers: List[Dict[str, Any]] = []
+        error: Optional[BaseException] = None
+        try:
+            for batch in iter_company_papers(self.fetcher, self.filter, query, max_results=max_results):
+                # Readers share these papers across handler threads; publish plain, fully computed dicts
+                batch = [dict(paper.items()) for paper in batch]
+                papers.extend(batch)
+                shared.append(batch)
+            with self._lock:
+                self._store(key, papers)
+        except BaseException as e:
+            logger.debug("Query %r failed: %s", query, e)
+            error = e
+        finally:
+            # Readers never wait on a result that will not complete
+            with self._lock:
+                self._inflight.pop(key, None)
+            shared.finish(error)
+
+    def _store(self, key: Tuple[str, int], papers: List[Dict[str, Any]]) -> None:
+        """Cache a completed result, dropping expired and least recently used entries.
+
+        Args:
+            key: (query, max_results) of the request
+            papers: Filtered papers of the query
+        """
+        if self.cache_ttl <= 0 or self.cache_size <= 0:
+            return
+        now = time.monotonic()
+        for stale in [cached_key for cached_key, (created, _) in self._cache.items()
+                      if now - created >= self.cache_ttl]:
+            del self._cache[stale]
+        self._cache[key] = (now, papers)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Request handler answering queries against the shared service."""
+
+    service: PapersService
+
+    def do_GET(self) -> None:
+        """Handle health checks."""
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self) -> None:
+        """Handle query requests, streaming one JSON paper per line."""
+        if self.path != "/query":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("body must be a JSON object")
+            query = payload["query"]
+            if not isinstance(query, str):
+                raise ValueError("query must be a string")
+            max_results = int(payload.get("max_results", 100))
+            output_format = payload.get("format", "ndjson")
+        except (KeyError, TypeError, ValueError) as e:
+            self._send_json(400, {"error": f"Invalid request: {e}"})
+            return
+
+        batches = self.service.iter_query(query, max_results=max_results)
+        try:
+            if output_format == "csv":
+                papers = [paper for batch in batches for paper in batch]
+            else:
+                # Wait for the first batch, so upstream errors still get an error status
+                first_batch = next(batches, [])
+        except Exception as e:
+            logger.error("Error serving query %r: %s", query, e)
+            self._send_json(502, {"error": str(e)})
+            return
+
+        if output_format == "csv":
+            body = (self.service.exporter.export_to_csv(papers) or "").encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        # Stream each batch as soon as it is filtered; HTTP/1.0 closes the connection at the end
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            for batch in itertools.chain([first_batch], batches):
+                for paper in batch:
+                    self.wfile.write(json.dumps(paper).encode("utf-8") + b"\n")
+                self.wfile.flush()
+        except Exception as e:
+            # The status line is already sent; the client sees a truncated stream
+            logger.error("Error streaming query %r: %s", query, e)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        """Send a small JSON response."""
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Route access logs through the module logger."""
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_server(service: PapersService, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """Create a threaded HTTP server bound to the given service.
+
+    Args:
+        service: Warm service instance shared by all requests
+        host: Interface to bind to
+        port: Port to listen on (0 picks a free port)
+
+    Returns:
+        HTTP server ready for serve_forever()
+    """
+    handler = type("RequestHandler", (_RequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(email: str, host: str = "127.0.0.1", port: int = 8765, debug: bool = False,
+          cache_ttl: Optional[float] = 300.0, cache_size: int = 128) -> None:
+    """Run the HTTP/JSON API until interrupted.
+
+    Args:
+        email: Email address to use for NCBI API (required by PubMed)
+        host: Interface to bind to
+        port: Port to listen on
+        debug: Whether to enable debug logging
+        cache_ttl: Number of seconds a completed query result is reused
+        cache_size: Maximum number of completed query results kept
+    """
+    service = PapersService(email=email, debug=debug, cache_ttl=cache_ttl or 0.0, cache_size=cache_size)
+    server = create_server(service, host=host, port=port)
+    logger.info("Serving papers API on http://%s:%d", *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down papers API")
+    finally:
+        server.server_close()
@@ -0,0 +1,161 @@
+"""Module for buffering filtered papers within a memory budget, spilling to disk past it."""
+
+import json
+import logging
+import re
+import sys
+import tempfile
+from typing import IO, Any, Collection, Dict, Iterable, Iterator, List, Optional
+
+from papers_fetcher import trace
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Multipliers of the size suffixes accepted by parse_size()
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+# Number of papers per list yielded by SpillBuffer.batches()
+READ_BATCH_SIZE = 500
+
+
+class SpillBuffer:
+    """Ordered buffer of papers whose in-memory part never exceeds a byte budget.
+
+    Papers are kept in memory until their estimated size passes the budget;
+    the buffered papers are then appended to a temporary JSON-lines file and
+    dropped. Reading replays the file and then the in-memory tail, so papers
+    come back in the order they were added.
+    """
+
+    def __init__(self, budget: int, fields: Optional[Collection[str]] = None, debug: bool = False) -> None:
+        """Initialize the buffer.
+
+        Args:
+            budget: Maximum estimated size in bytes of the papers held in memory
+            fields: Paper fields to keep (None keeps every field); projecting drops
+                the parsed record behind lazily computed papers
+            debug: Whether to enable debug logging
+        """
+        if debug:
+            logger.setLevel(logging.DEBUG)
+
+        self.budget = budget
+        self.fields = list(fields) if fields is not None else None
+        self.memory: List[Dict[str, Any]] = []
+        self.memory_bytes = 0
+        self.peak_bytes = 0
+        self.spilled = 0
+        self.spill_count = 0
+        self._spill_file: Optional[IO[str]] = None
+
+    def __len__(self) -> int:
+        return self.spilled + len(self.memory)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for batch in self.batches():
+            yield from batch
+
+    def extend(self, papers: Iterable[Dict[str, Any]]) -> None:
+        """Add papers, spilling the buffered ones to disk whenever the budget is exceeded.
+
+        Args:
+            papers: Filtered paper dictionaries
+        """
+        for paper in papers:
+            if self.fields is not None:
+                paper = {field: paper.get(field) for field in self.fields if field in paper}
+            size = estimate_size(paper)
+            if self.memory and self.memory_bytes + size > self.budget:
+                self._spill()
+            self.memory.append(paper)
+            self.memory_bytes += size
+            self.peak_bytes = max(self.peak_bytes, self.memory_bytes)
+
+    def batches(self, batch_size: int = READ_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Read the papers back in insertion order.
+
+        Args:
+            batch_size: Number of papers per yielded list read from disk
+
+        Yields:
+            Lists of paper dictionaries
+        """
+        if self._spill_file is not None:
+            self._spill_file.flush()
+            self._spill_file.seek(0)
+            batch: List[Dict[str, Any]] = []
+            for line in self._spill_file:
+                batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+            self._spill_file.seek(0, 2)
+        if self.memory:
+            yield self.memory
+
+    def close(self) -> None:
+        """Drop the buffered papers and delete the spill file."""
+        self.memory = []
+        self.memory_bytes = 0
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def __enter__(self) -> "SpillBuffer":
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, traceback: object) -> None:
+        self.close()
+
+    def _spill(self) -> None:
+        """Append the in-memory papers to the spill file and release them."""
+        with trace.span("spill", papers=len(self.memory), bytes=self.memory_bytes):
+            if self._spill_file is None:
+                self._spill_file = tempfile.TemporaryFile("w+", encoding="utf-8", prefix="papers_fetcher_spill_")
+            self._spill_file.writelines(json.dumps(paper, default=str) + "\n" for paper in self.memory)
+        logger.debug("Spilled %d papers (%d bytes) to disk", len(self.memory), self.memory_bytes)
+        self.spilled += len(self.memory)
+        self.spill_count += 1
+        self.memory = []
+        self.memory_bytes = 0
+
+
+def estimate_size(value: Any) -> int:
+    """Estimate the memory held by a paper value, including nested containers.
+
+    Args:
+        value: Paper dictionary or one of its values
+
+    Returns:
+        Approximate size in bytes
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte size such as "512M", "2G" or "65536".
+
+    Args:
+        text: Number of bytes, optionally followed by K, M or G (binary units)
+
+    Returns:
+        Size in bytes
+
+    Raises:
+        ValueError: If the size is malformed or not positive
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)i?B?\s*", text, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size: {text!r} (expected e.g. 512M or 2G)")
+    size = int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+    if size <= 0:
+        raise ValueError(f"Size must be positive: {text!r}")
+    return size
@@ -0,0 +1,356 @@
+"""Module for structured JSONL tracing of E-utilities requests and pipeline stages."""
+
+import contextlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterator, List, Any, Optional, Sequence
+
+from Bio import Entrez
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Endpoint whose batch sizes count as records fetched; esearch, epost and elink only
+# handle IDs of the same records
+RECORDS_ENDPOINT = "efetch"
+
+# Trace log that request() and span() write to, if any
+_active_log: Optional["TraceLog"] = None
+
+# Bio.Entrez's own urlopen while the attempt-counting wrapper replaces it
+_entrez_urlopen: Optional[Callable[..., Any]] = None
+
+# urlopen calls made by Bio.Entrez in the current thread; Entrez retries 429s,
+# server errors and connection failures internally, so this is how retries are seen
+_entrez_attempts = threading.local()
+
+
+class TraceLog:
+    """Append-only JSONL file of request and span events."""
+
+    def __init__(self, path: str) -> None:
+        """Open the trace log for appending.
+
+        Args:
+            path: Path of the JSONL file; events of several runs can share it
+        """
+        self.path = path
+        self.run_id = uuid.uuid4().hex[:12]
+        self._handle = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        """Write one event as a JSON line.
+
+        Args:
+            event: Event fields; the run ID, process ID and timestamp are added
+        """
+        event = {"ts": round(time.time(), 6), "run": self.run_id, "pid": os.getpid(), **event}
+        line = json.dumps(event, default=str) + "\n"
+        with self._lock:
+            self._handle.write(line)
+            self._handle.flush()
+
+    def close(self) -> None:
+        """Close the trace file."""
+        with self._lock:
+            self._handle.close()
+
+
+def set_trace_log(trace_log: Optional[TraceLog]) -> Optional[TraceLog]:
+    """Route request and span events to a trace log (None disables tracing).
+
+    While a trace log is active, Bio.Entrez's urlopen is wrapped to count the
+    attempts of each request; disabling tracing puts the original back.
+
+    Args:
+        trace_log: Trace log to write to
+
+    Returns:
+        The previously active trace log
+    """
+    global _active_log
+    previous, _active_log = _active_log, trace_log
+    _count_entrez_attempts(trace_log is not None)
+    return previous
+
+
+def _count_entrez_attempts(enabled: bool) -> None:
+    """Install or remove the wrapper that counts Bio.Entrez's urlopen attempts."""
+    global _entrez_urlopen
+    if enabled and _entrez_urlopen is None:
+        _entrez_urlopen = Entrez.urlopen
+        Entrez.urlopen = _counting_urlopen
+    elif not enabled and Entrez.urlopen is _counting_urlopen:
+        Entrez.urlopen = _entrez_urlopen
+        _entrez_urlopen = None
+
+
+def _counting_urlopen(*args: Any, **kwargs: Any) -> Any:
+    """Bio.Entrez's urlopen, counting each attempt made by the current thread."""
+    _entrez_attempts.count = getattr(_entrez_attempts, "count", 0) + 1
+    assert _entrez_urlopen is not None
+    return _entrez_urlopen(*args, **kwargs)
+
+
+def emit(event: Dict[str, Any]) -> None:
+    """Write an already measured event to the active trace log, if any.
+
+    Args:
+        event: Event fields, e.g. {"type": "span", "stage": ..., "duration_ms": ...}
+    """
+    if _active_log is not None:
+        _active_log.emit(event)
+
+
+@contextlib.contextmanager
+def request(endpoint: str, batch_size: int = 0, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """Time one E-utilities request and record it when tracing is enabled.
+
+    The yielded event can be updated inside the block, e.g. with the number
+    of bytes received, the number of retries or the HTTP status code.
+    Exceptions are recorded and re-raised; their status is the HTTP status
+    code if the exception carries one (HTTPError.code, HTTPStatusError.status),
+    "error" otherwise.
+
+    Args:
+        endpoint: E-utility name, e.g. "efetch"
+        batch_size: Number of IDs or records requested
+        fields: Extra event fields
+
+    Yields:
+        Mutable event dictionary
+    """
+    event: Dict[str, Any] = {
+        "type": "request", "endpoint": endpoint, "batch_size": batch_size,
+        "bytes": 0, "retries": 0, "status": "ok", **fields,
+    }
+    start = time.perf_counter()
+    try:
+        yield event
+    except BaseException as e:
+        status = getattr(e, "code", None) or getattr(e, "status", None)
+        event["status"] = status if isinstance(status, int) else "error"
+        event["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        event["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        if _active_log is not None:
+            _active_log.emit(event)
+
+
+@contextlib.contextmanager
+def entrez_request(endpoint: str, batch_size: int = 0, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """Time one Bio.Entrez request like request(), also recording the retries Entrez made.
+
+    Args:
+        endpoint: E-utility name, e.g. "efetch"
+        batch_size: Number of IDs or records requested
+        fields: Extra event fields
+
+    Yields:
+        Mutable event dictionary
+    """
+    _entrez_attempts.count = 0
+    with request(endpoint, batch_size, **fields) as event:
+        try:
+            yield event
+        finally:
+            event["retries"] = max(0, _entrez_attempts.count - 1)
+
+
+@contextlib.contextmanager
+def span(stage: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """Time one pipeline stage and record it when tracing is enabled.
+
+    Args:
+        stage: Stage name, e.g. "filter"
+        fields: Extra event fields such as input counts
+
+    Yields:
+        Mutable event dictionary for output counts
+    """
+    event: Dict[str, Any] = {"type": "span", "stage": stage, "status": "ok", **fields}
+    start = time.perf_counter()
+    try:
+        yield event
+    except BaseException as e:
+        event["status"] = "error"
+        event["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        event["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        if _active_log is not None:
+            _active_log.emit(event)
+
+
+class CountingHandle:
+    """File-like wrapper that counts the bytes read through it.
+
+    Text handles (Bio.Entrez decodes plain-text responses) are counted by
+    their UTF-8 size. Given a request event, the wrapper keeps its "bytes"
+    up to date and sets "status" to the HTTP status code of the response.
+    """
+
+    def __init__(self, handle: Any, event: Optional[Dict[str, Any]] = None) -> None:
+        self.handle = handle
+        self.count = 0
+        self.event = event
+        if event is not None:
+            status = http_status(handle)
+            if status is not None:
+                event["status"] = status
+
+    def _add(self, data: Any) -> Any:
+        self.count += len(data.encode("utf-8")) if isinstance(data, str) else len(data)
+        if self.event is not None:
+            self.event["bytes"] = self.count
+        return data
+
+    def read(self, *args: Any) -> Any:
+        return self._add(self.handle.read(*args))
+
+    def readline(self, *args: Any) -> Any:
+        return self._add(self.handle.readline(*args))
+
+    def __iter__(self) -> Iterator[Any]:
+        for line in self.handle:
+            yield self._add(line)
+
+    def close(self) -> None:
+        self.handle.close()
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything else (url, headers, ...) comes from the wrapped handle
+        if name == "handle":
+            raise AttributeError(name)
+        return getattr(self.handle, name)
+
+
+def http_status(handle: Any) -> Optional[int]:
+    """Return the HTTP status code of a response handle, or of the response a text wrapper reads from.
+
+    Args:
+        handle: http.client.HTTPResponse, a TextIOWrapper around one, or any other file-like object
+
+    Returns:
+        Status code, or None if the handle is not an HTTP response
+    """
+    for candidate in (handle, getattr(handle, "buffer", None)):
+        status = getattr(candidate, "status", None)
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def read_events(path: str) -> Iterator[Dict[str, Any]]:
+    """Read the events of a trace log, skipping lines that are not valid JSON.
+
+    Args:
+        path: Path of the JSONL file
+
+    Yields:
+        Event dictionaries in file order
+    """
+    with open(path, "r", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning("Skipping malformed trace line %d in %s", line_number, path)
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values (0.0 for no values)."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def summarize_trace(path: str, interval: float = 60.0, run: Optional[str] = None) -> Dict[str, Any]:
+    """Compute latency percentiles, histograms and throughput from a trace log.
+
+    Args:
+        path: Path of the JSONL file
+        interval: Width in seconds of the throughput buckets
+        run: Only include events of this run ID
+
+    Returns:
+        Dictionary with "requests" and "spans" statistics keyed by endpoint and
+        stage, and a "throughput" list of per-interval request totals (records
+        are counted from efetch requests only)
+    """
+    latencies: Dict[str, List[float]] = {}
+    request_totals: Dict[str, Dict[str, int]] = {}
+    durations: Dict[str, List[float]] = {}
+    buckets: Dict[int, Dict[str, float]] = {}
+
+    for event in read_events(path):
+        if run and event.get("run") != run:
+            continue
+        if event.get("type") == "request":
+            endpoint = event.get("endpoint", "unknown")
+            latencies.setdefault(endpoint, []).append(float(event.get("latency_ms", 0.0)))
+            totals = request_totals.setdefault(endpoint, {"errors": 0, "retries": 0, "bytes": 0, "records": 0})
+            totals["errors"] += "error" in event
+            totals["retries"] += int(event.get("retries", 0))
+            totals["bytes"] += int(event.get("bytes", 0))
+            totals["records"] += int(event.get("batch_size", 0))
+
+            bucket = buckets.setdefault(int(float(event.get("ts", 0.0)) // interval),
+                                        {"requests": 0, "records": 0, "bytes": 0})
+            bucket["requests"] += 1
+            if endpoint == RECORDS_ENDPOINT:
+                bucket["records"] += int(event.get("batch_size", 0))
+            bucket["bytes"] += int(event.get("bytes", 0))
+        elif event.get("type") == "span":
+            durations.setdefault(event.get("stage", "unknown"), []).append(float(event.get("duration_ms", 0.0)))
+
+    requests: Dict[str, Any] = {}
+    for endpoint, values in sorted(latencies.items()):
+        values.sort()
+        histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        for value in values:
+            histogram[next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if value <= bound),
+                           len(LATENCY_BUCKETS_MS))] += 1
+        requests[endpoint] = {
+            "count": len(values),
+            **request_totals[endpoint],
+            "p50_ms": percentile(values, 0.50),
+            "p95_ms": percentile(values, 0.95),
+            "p99_ms": percentile(values, 0.99),
+            "max_ms": values[-1],
+            "histogram": histogram,
+        }
+
+    spans: Dict[str, Any] = {}
+    for stage, values in sorted(durations.items()):
+        values.sort()
+        spans[stage] = {
+            "count": len(values),
+            "total_ms": round(sum(values), 3),
+            "p50_ms": percentile(values, 0.50),
+            "p95_ms": percentile(values, 0.95),
+            "p99_ms": percentile(values, 0.99),
+        }
+
+    throughput = [
+        {
+            "start": key * interval,
+            "requests": bucket["requests"],
+            "records_per_second": bucket["records"] / interval,
+            "bytes_per_second": bucket["bytes"] / interval,
+        }
+        for key, bucket in sorted(buckets.items())
+    ]
+    return {"requests": requests, "spans": spans, "throughput": throughput}
@@ -0,0 +1,417 @@
+"""Module for sharding a query's fetch across workers through a durable SQLite queue."""
+
+import csv
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from papers_fetcher.fetch import PubMedFetcher, DEFAULT_BATCH_SIZE
+from papers_fetcher.filter import PaperFilter
+from papers_fetcher.export import PaperExporter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds a claimed unit stays leased before another worker may take it over
+DEFAULT_LEASE_SECONDS = 300
+
+# Leases are renewed this many times per lease period while a unit is processed
+HEARTBEATS_PER_LEASE = 3
+
+# Delay before a failed unit is retried, doubled on every further attempt up to the maximum
+RETRY_BASE_SECONDS = 5.0
+RETRY_MAX_SECONDS = 600.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    query TEXT NOT NULL,
+    webenv TEXT NOT NULL,
+    query_key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    retstart INTEGER NOT NULL,
+    retmax INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    shard_path TEXT,
+    not_before REAL
+);
+CREATE INDEX IF NOT EXISTS units_status ON units(status, lease_expires);
+"""
+
+
+class WorkUnit(NamedTuple):
+    """A slice of a job's history-server result set."""
+
+    id: int
+    job_id: int
+    webenv: str
+    query_key: str
+    retstart: int
+    retmax: int
+    attempts: int
+
+
+class WorkQueue:
+    """Class to plan, lease and track work units in a SQLite database."""
+
+    def __init__(self, db_path: str, debug: bool = False) -> None:
+        """Open (or create) the work queue.
+
+        Args:
+            db_path: Path to the SQLite database shared by coordinator and workers
+            debug: Whether to enable debug logging
+        """
+        if debug:
+            logger.setLevel(logging.DEBUG)
+
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path, timeout=30.0, isolation_level=None)
+        self.connection.executescript(SCHEMA)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(units)")}
+        if "not_before" not in columns:
+            # Queues created before failed units were delayed
+            self.connection.execute("ALTER TABLE units ADD COLUMN not_before REAL")
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, traceback: object) -> None:
+        self.close()
+
+    def plan(self, fetcher: PubMedFetcher, query: str, max_results: int = 100,
+             unit_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """Run esearch once and split the result set into work units.
+
+        Args:
+            fetcher: PubMed fetcher used for the history-server search
+            query: PubMed search query
+            max_results: Maximum number of results to fetch
+            unit_size: Number of records per work unit
+
+        Returns:
+            ID of the new job
+        """
+        webenv, query_key, count = fetcher.search_history(query, max_results=max_results)
+        with self._transaction():
+            job_id = self.connection.execute(
+                "INSERT INTO jobs(query, webenv, query_key, count, created) VALUES(?, ?, ?, ?, ?)",
+                (query, webenv, query_key, count, time.time()),
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO units(job_id, retstart, retmax) VALUES(?, ?, ?)",
+                [(job_id, start, min(unit_size, count - start)) for start in range(0, count, unit_size)],
+            )
+        logger.info("Planned job %d: %d records in units of %d", job_id, count, unit_size)
+        return job_id
+
+    def claim(self, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+              job_id: Optional[int] = None) -> Optional[WorkUnit]:
+        """Lease the next pending unit that is due, reclaiming units whose lease has expired.
+
+        Args:
+            worker: Identifier of the claiming worker
+            lease_seconds: How long the lease lasts without a heartbeat
+            job_id: Only claim units of this job (None for any job)
+
+        Returns:
+            The claimed unit, or None if no unit is due (see next_due for delayed and leased ones)
+        """
+        now = time.time()
+        with self._transaction():
+            expired = self.connection.execute(
+                "UPDATE units SET status = 'pending', worker = NULL "
+                "WHERE status = 'leased' AND lease_expires < ?", (now,)
+            ).rowcount
+            if expired:
+                logger.warning("Reassigning %d unit(s) with expired leases", expired)
+
+            row = self.connection.execute(
+                "SELECT units.id, units.job_id, jobs.webenv, jobs.query_key, units.retstart, "
+                "units.retmax, units.attempts FROM units JOIN jobs ON jobs.id = units.job_id "
+                "WHERE units.status = 'pending' AND (? IS NULL OR units.job_id = ?) "
+                "AND (units.not_before IS NULL OR units.not_before <= ?) "
+                "ORDER BY units.id LIMIT 1",
+                (job_id, job_id, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            self.connection.execute(
+                "UPDATE units SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (worker, now + lease_seconds, row[0]),
+            )
+        unit = WorkUnit(*row[:6], attempts=row[6] + 1)
+        logger.debug("Worker %s claimed unit %d (records %d-%d)", worker, unit.id,
+                     unit.retstart, unit.retstart + unit.retmax)
+        return unit
+
+    def heartbeat(self, unit_id: int, worker: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend a lease that the worker still holds.
+
+        Returns:
+            False if the lease was lost to another worker
+        """
+        with self._transaction():
+            return self.connection.execute(
+                "UPDATE units SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + lease_seconds, unit_id, worker),
+            ).rowcount == 1
+
+    def complete(self, unit_id: int, worker: str, shard_path: str) -> bool:
+        """Mark a unit as done with the path of its shard output.
+
+        Returns:
+            False if the lease was lost to another worker (the result is discarded)
+        """
+        with self._transaction():
+            done = self.connection.execute(
+                "UPDATE units SET status = 'done', shard_path = ?, lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (shard_path, unit_id, worker),
+            ).rowcount == 1
+        if not done:
+            logger.warning("Worker %s lost the lease on unit %d", worker, unit_id)
+        return done
+
+    def release(self, unit_id: int, worker: str, delay: float = 0.0) -> None:
+        """Return a unit to the queue after a failure.
+
+        Args:
+            unit_id: Unit to release
+            worker: Worker holding the lease
+            delay: Seconds before the unit may be claimed again
+        """
+        with self._transaction():
+            self.connection.execute(
+                "UPDATE units SET status = 'pending', worker = NULL, lease_expires = NULL, not_before = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + delay, unit_id, worker),
+            )
+
+    def next_due(self, job_id: Optional[int] = None) -> Optional[float]:
+        """Return when the next unit that is not claimable now may become claimable.
+
+        That is the earliest retry delay of a pending unit or lease expiry of a
+        leased unit; heartbeats keep pushing back the expiry of live workers.
+
+        Args:
+            job_id: Only consider units of this job (None for any job)
+
+        Returns:
+            Epoch time (possibly in the past), or None if no unit is pending or leased
+        """
+        (due,) = self.connection.execute(
+            "SELECT MIN(CASE status WHEN 'leased' THEN lease_expires ELSE COALESCE(not_before, 0) END) "
+            "FROM units WHERE status IN ('pending', 'leased') AND (? IS NULL OR job_id = ?)",
+            (job_id, job_id),
+        ).fetchone()
+        return due
+
+    def fail(self, unit_id: int, worker: str) -> None:
+        """Take a unit out of rotation after too many failed attempts."""
+        with self._transaction():
+            self.connection.execute(
+                "UPDATE units SET status = 'failed', lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (unit_id, worker),
+            )
+
+    def progress(self, job_id: int) -> Dict[str, int]:
+        """Count the units of a job by status."""
+        rows = self.connection.execute(
+            "SELECT status, COUNT(*) FROM units WHERE job_id = ? GROUP BY status", (job_id,)
+        )
+        return {status: count for status, count in rows}
+
+    def shards(self, job_id: int) -> List[str]:
+        """Return the shard paths of a job's finished units in result-set order."""
+        rows = self.connection.execute(
+            "SELECT shard_path FROM units WHERE job_id = ? AND status = 'done' ORDER BY retstart",
+            (job_id,),
+        )
+        return [path for (path,) in rows]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.connection.close()
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self.connection)
+
+
+class _Heartbeat:
+    """Background thread renewing a unit's lease while the unit is processed.
+
+    SQLite connections are bound to their thread, so the thread opens its
+    own connection to the queue database.
+    """
+
+    def __init__(self, db_path: str, unit_id: int, worker: str, lease_seconds: float) -> None:
+        self.db_path = db_path
+        self.unit_id = unit_id
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "_Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, traceback: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        with WorkQueue(self.db_path) as queue:
+            while not self._stop.wait(self.lease_seconds / HEARTBEATS_PER_LEASE):
+                if not queue.heartbeat(self.unit_id, self.worker, lease_seconds=self.lease_seconds):
+                    logger.warning("Worker %s lost the lease on unit %d", self.worker, self.unit_id)
+                    self.lost = True
+                    return
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT block, so concurrent workers serialize their writes."""
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+
+    def __enter__(self) -> None:
+        self.connection.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type: object, exc: object, traceback: object) -> None:
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def run_worker(
+    queue: WorkQueue,
+    fetcher: PubMedFetcher,
+    paper_filter: PaperFilter,
+    exporter: PaperExporter,
+    shard_dir: str,
+    worker: Optional[str] = None,
+    job_id: Optional[int] = None,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    max_attempts: int = 5,
+) -> int:
+    """Claim, fetch, filter and write units until the queue is drained.
+
+    Leases are renewed while a unit is processed, and a failed unit is only
+    retried after a delay that doubles with every attempt. The worker only
+    returns once no unit is pending or leased, so it takes over the units of
+    workers that crash or stall.
+
+    Args:
+        queue: Shared work queue
+        fetcher: PubMed fetcher (possibly with its own API key)
+        paper_filter: Filter applied to each unit
+        exporter: Exporter writing each unit's shard CSV
+        shard_dir: Directory for shard outputs (shared with the merging host)
+        worker: Worker identifier (defaults to host:pid)
+        job_id: Only work on this job (None for any job)
+        lease_seconds: Lease duration per unit, renewed while the unit is processed
+        max_attempts: Give up on a unit after this many failed claims
+
+    Returns:
+        Number of units this worker completed
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    os.makedirs(shard_dir, exist_ok=True)
+    completed = 0
+
+    while True:
+        unit = queue.claim(worker, lease_seconds=lease_seconds, job_id=job_id)
+        if unit is None:
+            # Failed units may still be waiting out their retry delay, and units leased by
+            # other workers are taken over if their lease runs out
+            due = queue.next_due(job_id)
+            if due is None:
+                break
+            time.sleep(max(0.0, due - time.time()))
+            continue
+        if unit.attempts > max_attempts:
+            logger.error("Unit %d failed %d times; marking it as failed", unit.id, max_attempts)
+            queue.fail(unit.id, worker)
+            continue
+
+        shard_path = os.path.join(shard_dir, f"job{unit.job_id}_unit{unit.id:06d}.csv")
+        try:
+            with _Heartbeat(queue.db_path, unit.id, worker, lease_seconds):
+                papers = fetcher.fetch_history(unit.webenv, unit.query_key,
+                                               retstart=unit.retstart, retmax=unit.retmax)
+                filtered_papers = paper_filter.filter_papers(papers)
+
+                # Write under a worker-specific name and rename, so a reassigned unit never
+                # leaves a half-written shard behind
+                temp_path = f"{shard_path}.{worker.replace(os.sep, '_')}.tmp"
+                if filtered_papers:
+                    exporter.export_to_csv(filtered_papers, temp_path)
+                else:
+                    open(temp_path, "w").close()
+                os.replace(temp_path, shard_path)
+        except Exception as e:
+            delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (unit.attempts - 1))
+            logger.error("Worker %s failed on unit %d: %s (retrying in %.0fs)", worker, unit.id, e, delay)
+            queue.release(unit.id, worker, delay=delay)
+            continue
+
+        if queue.complete(unit.id, worker, shard_path):
+            completed += 1
+
+    logger.info("Worker %s completed %d unit(s)", worker, completed)
+    return completed
+
+
+def merge_shards(queue: WorkQueue, job_id: int, output_file: str) -> int:
+    """Concatenate a finished job's shard CSVs into one output file.
+
+    Args:
+        queue: Work queue holding the job
+        job_id: Job to merge
+        output_file: Path of the merged CSV
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        RuntimeError: If some units of the job are not done yet
+    """
+    progress = queue.progress(job_id)
+    unfinished = sum(count for status, count in progress.items() if status != "done")
+    if unfinished:
+        raise RuntimeError(f"Job {job_id} still has {unfinished} unfinished unit(s)")
+
+    rows = 0
+    header_written = False
+    with open(output_file, "w", newline="", encoding="utf-8") as output:
+        writer = csv.writer(output, quoting=csv.QUOTE_NONNUMERIC)
+        for shard_path in queue.shards(job_id):
+            with open(shard_path, "r", newline="", encoding="utf-8") as shard:
+                reader = csv.reader(shard)
+                header = next(reader, None)
+                if header is None:
+                    continue
+                if not header_written:
+                    writer.writerow(header)
+                    header_written = True
+                for row in reader:
+                    writer.writerow(row)
+                    rows += 1
+
+    logger.info("Merged %d rows from job %d into %s", rows, job_id, output_file)
+    return rows
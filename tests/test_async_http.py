@@ -0,0 +1,71 @@
+"""Tests for the async_http module."""
+
+import asyncio
+import time
+import unittest
+
+from papers_fetcher.async_http import HTTPStatusError, RateLimiter, http_request
+
+
+class TestHttpRequest(unittest.TestCase):
+    """Test cases for rate limiting and retries of async E-utilities requests."""
+
+    def _run_with_server(self, responses, coroutine_factory):
+        """Serve the given raw responses in order and run a client coroutine against them."""
+        requests = []
+
+        async def handle(reader, writer):
+            requests.append(await reader.readuntil(b"\r\n\r\n"))
+            writer.write(responses[min(len(requests), len(responses)) - 1])
+            await writer.drain()
+            writer.close()
+
+        async def main():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return await coroutine_factory(f"http://127.0.0.1:{port}/esearch.fcgi")
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        return asyncio.run(main()), requests
+
+    def test_retries_429_after_retry_after(self):
+        """Test that a 429 is retried, the next answer is returned and the retry is recorded."""
+        limiter = RateLimiter(rate=1000.0)
+        event = {}
+        result, requests = self._run_with_server(
+            [b"HTTP/1.0 429 Too Many Requests\r\nRetry-After: 0\r\n\r\n", b"HTTP/1.0 200 OK\r\n\r\npayload"],
+            lambda url: http_request(url, {"term": "q"}, limiter=limiter, event=event),
+        )
+
+        self.assertEqual(result, b"payload")
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(event, {"retries": 1, "status": 200, "bytes": len(b"payload")})
+
+    def test_client_errors_are_not_retried(self):
+        """Test that a 4xx other than 429 fails on the first attempt."""
+        limiter = RateLimiter(rate=1000.0)
+        with self.assertRaises(HTTPStatusError) as context:
+            self._run_with_server(
+                [b"HTTP/1.0 400 Bad Request\r\n\r\n"],
+                lambda url: http_request(url, {"term": "q"}, limiter=limiter),
+            )
+        self.assertEqual(context.exception.status, 400)
+
+    def test_rate_limiter_spaces_concurrent_requests(self):
+        """Test that concurrent callers are spread out to the configured rate."""
+        limiter = RateLimiter(rate=20.0)
+
+        async def main():
+            start = time.monotonic()
+            await asyncio.gather(*(limiter.acquire() for _ in range(5)))
+            return time.monotonic() - start
+
+        # The first request goes out at once, the other four 50 ms apart
+        self.assertGreaterEqual(asyncio.run(main()), 0.19)
+
+
+if __name__ == "__main__":
+    unittest.main()
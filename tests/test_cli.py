@@ -1,10 +1,15 @@
 """Tests for the CLI module."""
 
+import os
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, patch, MagicMock
 from typer.testing import CliRunner
 
 from cli.main import app
+from papers_fetcher.corpus import CorpusStore
+from papers_fetcher.file_naming import CATALOG_FILENAME, OutputCatalog
+from papers_fetcher.offline import OfflineIndex
 
 
 class TestCLI(unittest.TestCase):
@@ -46,10 +51,11 @@ class TestCLI(unittest.TestCase):
         mock_filter_instance.filter_papers.assert_called_once_with(["paper1", "paper2"])
         mock_exporter_instance.export_to_csv.assert_called_once_with(["filtered_paper1"], "output.csv")
 
+    @patch("cli.main.iter_company_papers")
     @patch("cli.main.PubMedFetcher")
     @patch("cli.main.PaperFilter")
     @patch("cli.main.PaperExporter")
-    def test_main_with_console_output(self, mock_exporter, mock_filter, mock_fetcher):
+    def test_main_with_console_output(self, mock_exporter, mock_filter, mock_fetcher, mock_iter):
         """Test the main function with console output."""
         # Mock the fetcher, filter, and exporter
         mock_fetcher_instance = MagicMock()
@@ -60,11 +66,8 @@ class TestCLI(unittest.TestCase):
         mock_filter.return_value = mock_filter_instance
         mock_exporter.return_value = mock_exporter_instance
 
-        # Mock the fetch_papers method
-        mock_fetcher_instance.fetch_papers.return_value = ["paper1", "paper2"]
-
-        # Mock the filter_papers method
-        mock_filter_instance.filter_papers.return_value = ["filtered_paper1"]
+        # Mock the filtered batches streamed to the console
+        mock_iter.return_value = iter([["filtered_paper1"]])
 
         # Run the CLI command
         result = self.runner.invoke(
@@ -74,9 +77,12 @@ class TestCLI(unittest.TestCase):
         # Verify the result
         self.assertEqual(result.exit_code, 0)
         mock_fetcher.assert_called_once_with(email="test@example.com", debug=False)
-        mock_fetcher_instance.fetch_papers.assert_called_once_with("test query", max_results=100)
-        mock_filter_instance.filter_papers.assert_called_once_with(["paper1", "paper2"])
-        mock_exporter_instance.print_to_console.assert_called_once_with(["filtered_paper1"])
+        mock_iter.assert_called_once_with(mock_fetcher_instance, mock_filter_instance, "test query",
+                                          max_results=100, want=None, on_fetch=ANY)
+        mock_fetcher_instance.fetch_papers.assert_not_called()
+        renderer = mock_exporter_instance.console_renderer.return_value
+        renderer.render.assert_called_once_with(["filtered_paper1"])
+        renderer.close.assert_called_once_with()
 
     @patch("cli.main.PubMedFetcher")
     @patch("cli.main.PaperFilter")
@@ -109,6 +115,207 @@ class TestCLI(unittest.TestCase):
         mock_filter.assert_called_once_with(debug=True)
         mock_exporter.assert_called_once_with(debug=True)
 
+    @patch("cli.main.PubMedFetcher")
+    @patch("cli.main.PaperFilter")
+    @patch("cli.main.PaperExporter")
+    def test_main_with_pmids_from_stdin(self, mock_exporter, mock_filter, mock_fetcher):
+        """Test fetching a PMID list from stdin without a query."""
+        mock_fetcher_instance = MagicMock()
+        mock_filter_instance = MagicMock()
+        mock_fetcher.return_value = mock_fetcher_instance
+        mock_filter.return_value = mock_filter_instance
+        mock_fetcher_instance.iter_pmid_batches.return_value = iter([["paper1"]])
+        mock_filter_instance.filter_papers.return_value = ["filtered_paper1"]
+
+        result = self.runner.invoke(
+            app, ["--pmids-file", "-", "--email", "test@example.com"], input="12345\n67890, 11111\n"
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        mock_fetcher_instance.iter_pmid_batches.assert_called_once_with(["12345", "67890", "11111"])
+        mock_fetcher_instance.fetch_papers.assert_not_called()
+        mock_filter_instance.filter_papers.assert_called_once_with(["paper1"])
+        mock_exporter.return_value.console_renderer.return_value.render.assert_called_once_with(["filtered_paper1"])
+
+    @patch("cli.main.iter_company_papers")
+    @patch("cli.main.PubMedFetcher")
+    @patch("cli.main.PaperFilter")
+    def test_main_streams_compact_output_with_limit(self, mock_filter, mock_fetcher, mock_iter):
+        """Test that --limit/--compact print batches as they arrive and stop early."""
+        mock_iter.return_value = iter([
+            [{"pmid": "1", "title": "First"}],
+            [{"pmid": "2", "title": "Second"}, {"pmid": "3", "title": "Third"}],
+            [{"pmid": "4", "title": "Never fetched"}],
+        ])
+
+        result = self.runner.invoke(
+            app, ["test query", "--email", "test@example.com", "--columns", "PubmedID,Title",
+                  "--compact", "--limit", "2"]
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.stdout, "PubmedID\tTitle\n1\tFirst\n2\tSecond\n")
+        self.assertEqual(mock_iter.call_args.kwargs["want"], 2)
+        mock_fetcher.return_value.fetch_papers.assert_not_called()
+
+    @patch("cli.main.iter_company_papers")
+    @patch("cli.main.PubMedFetcher")
+    @patch("cli.main.PaperFilter")
+    def test_main_with_memory_budget_spills_and_exports_in_order(self, mock_filter, mock_fetcher, mock_iter):
+        """Test that --memory-budget buffers batches through disk and exports them in order."""
+        mock_iter.return_value = iter([
+            [{"pmid": str(pmid), "title": f"Paper {pmid}", "authors": []} for pmid in range(start, start + 50)]
+            for start in range(0, 200, 50)
+        ])
+
+        with tempfile.TemporaryDirectory() as directory:
+            output_file = os.path.join(directory, "out.csv")
+            result = self.runner.invoke(
+                app, ["test query", "--email", "test@example.com", "--columns", "PubmedID,Title",
+                      "--memory-budget", "4K", "-f", output_file]
+            )
+
+            self.assertEqual(result.exit_code, 0)
+            with open(output_file) as handle:
+                rows = handle.read().splitlines()
+        self.assertEqual(rows[0], '"PubmedID","Title"')
+        self.assertEqual(rows[1:], [f'"{pmid}","Paper {pmid}"' for pmid in range(200)])
+        mock_fetcher.return_value.fetch_papers.assert_not_called()
+
+    @patch("cli.main.iter_company_papers")
+    @patch("cli.main.PubMedFetcher")
+    def test_main_rejects_memory_budget_for_console_output(self, mock_fetcher, mock_iter):
+        """Test that --memory-budget without --file fails instead of being ignored."""
+        result = self.runner.invoke(app, ["test query", "--email", "test@example.com", "--memory-budget", "4K"])
+
+        self.assertEqual(result.exit_code, 1)
+        mock_iter.assert_not_called()
+
+    @patch("cli.main.PubMedFetcher")
+    @patch("cli.main.PaperFilter")
+    def test_main_columns_keep_every_field_for_local_stores(self, mock_filter, mock_fetcher):
+        """Test that --columns only narrows the parsed fields when no paper is stored locally."""
+        mock_fetcher.return_value.fetch_papers.return_value = []
+        with tempfile.TemporaryDirectory() as directory:
+            output_file = os.path.join(directory, "out.csv")
+            for options, narrowed in (([], True), (["--corpus", os.path.join(directory, "corpus")], False)):
+                with self.subTest(options=options):
+                    result = self.runner.invoke(
+                        app, ["test query", "--email", "test@example.com", "--columns", "PubmedID,Title",
+                              "-f", output_file, *options]
+                    )
+                    self.assertEqual(result.exit_code, 0)
+                    self.assertEqual("fields" in mock_fetcher.call_args.kwargs, narrowed)
+
+    @patch("cli.main.PubMedFetcher")
+    def test_main_rejects_search_options_with_pmids_file(self, mock_fetcher):
+        """Test that esearch-only options are not silently ignored with --pmids-file."""
+        for options in (["--from", "2020"], ["--to", "2021/06"], ["--company-pushdown"]):
+            with self.subTest(options=options):
+                result = self.runner.invoke(
+                    app, ["--pmids-file", "-", "--email", "test@example.com", *options], input="1\n"
+                )
+                self.assertEqual(result.exit_code, 1)
+        mock_fetcher.assert_not_called()
+
+    @patch("cli.main.PubMedFetcher")
+    def test_main_rejects_invalid_date_options(self, mock_fetcher):
+        """Test that malformed --from/--to/--date-type values are usage errors."""
+        for options in (["--from", "2021/02/30"], ["--to", "last year"], ["--from", "2020", "--date-type", "xdat"]):
+            with self.subTest(options=options):
+                result = self.runner.invoke(app, ["test query", "--email", "test@example.com", *options])
+                self.assertEqual(result.exit_code, 2)
+        mock_fetcher.assert_not_called()
+
+    @patch("cli.main.PubMedFetcher")
+    @patch("cli.main.PaperFilter")
+    @patch("cli.main.PaperExporter")
+    def test_main_with_want_and_pmids_file_feeds_corpus(self, mock_exporter, mock_filter, mock_fetcher):
+        """Test that --want applies to --pmids-file and every fetched paper reaches --corpus."""
+        mock_fetcher.return_value.fetch_details.side_effect = lambda ids: [{"pmid": pmid} for pmid in ids]
+        mock_filter.return_value.filter_papers.side_effect = lambda papers: papers
+
+        with tempfile.TemporaryDirectory() as directory:
+            corpus = os.path.join(directory, "corpus")
+            result = self.runner.invoke(
+                app, ["--pmids-file", "-", "--email", "test@example.com", "--want", "2", "--corpus", corpus],
+                input="1 2 3 4\n",
+            )
+
+            self.assertEqual(result.exit_code, 0)
+            render = mock_exporter.return_value.console_renderer.return_value.render
+            printed = [paper for call in render.call_args_list for paper in call.args[0]]
+            self.assertEqual([paper["pmid"] for paper in printed], ["1", "2"])
+            mock_fetcher.return_value.fetch_pmids.assert_not_called()
+            with CorpusStore(corpus) as store:
+                self.assertEqual(len(store), len(mock_fetcher.return_value.fetch_details.call_args.args[0]))
+
+    @patch("cli.main.PubMedFetcher")
+    @patch("cli.main.PaperFilter")
+    @patch("cli.main.PaperExporter")
+    def test_main_with_want_feeds_cache_db(self, mock_exporter, mock_filter, mock_fetcher):
+        """Test that papers fetched in --want mode are added to --cache-db."""
+        mock_fetcher.return_value.search_ids.return_value = ["1", "2", "3"]
+        mock_fetcher.return_value.fetch_details.side_effect = lambda ids: [
+            {"pmid": pmid, "title": f"Paper {pmid}", "authors": []} for pmid in ids
+        ]
+        mock_filter.return_value.filter_papers.side_effect = lambda papers: papers[:1]
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache_db = os.path.join(directory, "papers.db")
+            result = self.runner.invoke(
+                app, ["test query", "--email", "test@example.com", "--want", "5", "--cache-db", cache_db]
+            )
+
+            self.assertEqual(result.exit_code, 0)
+            index = OfflineIndex(cache_db)
+            self.assertEqual(len(index), 3)
+            index.close()
+
+    @patch("cli.main.PubMedFetcher")
+    @patch("cli.main.PaperFilter")
+    @patch("cli.main.PaperExporter")
+    def test_main_releases_reserved_file_when_export_fails(self, mock_exporter, mock_filter, mock_fetcher):
+        """Test that a failed export removes the file reserved through the output catalog."""
+        mock_filter.return_value.filter_papers.return_value = [{"pmid": "1"}]
+        mock_exporter.return_value.export_to_csv.side_effect = IOError("disk full")
+
+        with tempfile.TemporaryDirectory() as directory:
+            result = self.runner.invoke(
+                app, ["test query", "--email", "test@example.com", "-f", os.path.join(directory, "results")]
+            )
+
+            self.assertEqual(result.exit_code, 1)
+            self.assertEqual(os.listdir(directory), [CATALOG_FILENAME])
+            catalog = OutputCatalog(directory)
+            self.assertEqual(catalog.outputs_for("test query"), [])
+            catalog.close()
+
+    @patch("cli.main.PubMedFetcher")
+    @patch("cli.main.PaperFilter")
+    def test_main_dedup_requires_fixed_output_file(self, mock_filter, mock_fetcher):
+        """Test that --dedup is rejected for generated filenames and appends new PMIDs to a fixed file."""
+        mock_filter.return_value.filter_papers.side_effect = [
+            [{"pmid": "1", "title": "A"}, {"pmid": "2", "title": "B"}],
+            [{"pmid": "2", "title": "B"}, {"pmid": "3", "title": "C"}],
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            result = self.runner.invoke(
+                app, ["test query", "--email", "test@example.com", "--dedup", "-f", os.path.join(directory, "results")]
+            )
+            self.assertEqual(result.exit_code, 1)
+            mock_fetcher.assert_not_called()
+
+            output_file = os.path.join(directory, "results.csv")
+            for _ in range(2):
+                result = self.runner.invoke(
+                    app, ["test query", "--email", "test@example.com", "--columns", "PubmedID", "--dedup",
+                          "-f", output_file]
+                )
+                self.assertEqual(result.exit_code, 0)
+            with open(output_file) as handle:
+                self.assertEqual(handle.read().splitlines(), ['"PubmedID"', '"1"', '"2"', '"3"'])
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
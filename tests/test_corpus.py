@@ -0,0 +1,121 @@
+"""Tests for the corpus module."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from papers_fetcher.corpus import CorpusStore
+from papers_fetcher.filter import PaperFilter
+
+
+class TestCorpusStore(unittest.TestCase):
+    """Test cases for the CorpusStore class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.directory = tempfile.mkdtemp()
+        self.papers = [
+            {
+                "pmid": "12345",
+                "title": "Test Paper 1",
+                "publication_date": "2023 Jan",
+                "authors": [{"name": "Author A", "affiliations": ["Acme Pharmaceuticals Inc., New York, USA"]}],
+                "corresponding_email": "author@example.com",
+            },
+            {
+                "pmid": "67890",
+                "title": "Test Paper 2",
+                "publication_date": "2023 Feb",
+                "authors": [{"name": "Author C", "affiliations": ["Department of Biology, Harvard University"]}],
+                "corresponding_email": "",
+            },
+            {
+                "pmid": "54321",
+                "title": "Test Paper 3",
+                "publication_date": "2023 Mar",
+                "authors": [{"name": "Author D", "affiliations": ["Widget Works, Boston, MA"]}],
+                "corresponding_email": "",
+            },
+        ]
+
+    def tearDown(self):
+        """Remove the corpus directory."""
+        shutil.rmtree(self.directory)
+
+    def test_add_papers_persists_and_deduplicates(self):
+        """Test that papers survive reopening and duplicates are skipped."""
+        store = CorpusStore(self.directory)
+        self.assertEqual(store.add_papers(self.papers[:2]), 2)
+        self.assertEqual(store.add_papers(self.papers), 1)
+        store.close()
+
+        reopened = CorpusStore(self.directory)
+        self.assertEqual(len(reopened), 3)
+        self.assertIn("54321", reopened)
+        self.assertEqual(reopened.get_paper(0)["title"], "Test Paper 1")
+        self.assertEqual(reopened.get_paper(0)["authors"], self.papers[0]["authors"])
+        reopened.close()
+
+    def test_filter_papers_uses_affiliation_index(self):
+        """Test re-filtering the corpus with different keyword sets."""
+        store = CorpusStore(self.directory)
+        store.add_papers(self.papers)
+
+        result = store.filter_papers(PaperFilter())
+        self.assertEqual([paper["pmid"] for paper in result], ["12345"])
+        self.assertEqual(store.candidate_rows(PaperFilter().company_pattern), [0])
+
+        custom_filter = PaperFilter(company_keywords=[r"\b(?:works)\b"])
+        result = store.filter_papers(custom_filter)
+        self.assertEqual([paper["pmid"] for paper in result], ["54321"])
+        store.close()
+
+    def test_candidate_rows_falls_back_for_non_word_patterns(self):
+        """Test that patterns the tokens can't answer never drop a matching row."""
+        papers = [
+            {"pmid": "1", "authors": [{"affiliations": ["Bristol-Myers Squibb, Princeton"]}]},
+            {"pmid": "2", "authors": [{"affiliations": ["Tokyo Co., Ltd."]}]},
+            {"pmid": "3", "authors": [{"affiliations": ["Co Research Unit"]}]},
+        ]
+        with CorpusStore(self.directory) as store:
+            store.add_papers(papers)
+
+            self.assertEqual(store.candidate_rows(r"\bbristol-myers\b"), [0, 1, 2])
+            self.assertEqual(store.candidate_rows(r"\bco\."), [0, 1, 2])
+            self.assertEqual(store.candidate_rows(r"\b(?:co\.)\b"), [1])
+            self.assertEqual(store.candidate_rows(r"\b(?:co|ltd)\b"), [1, 2])
+            self.assertEqual(store.candidate_rows([r"\bsquibb\b", r"\bresearch unit\b"]), [0, 2])
+
+    def test_incremental_adds_merge_index_segments(self):
+        """Test that each add writes a small segment and neighbours of similar size are merged."""
+        with CorpusStore(self.directory) as store:
+            for number in range(8):
+                store.add_papers([{
+                    "pmid": str(100 + number),
+                    "authors": [{"affiliations": [f"Unit {number}, Acme Inc"]}],
+                }])
+            self.assertLessEqual(len(store._segments), 4)
+            self.assertEqual(store.candidate_rows(r"\b(?:inc)\b"), list(range(8)))
+            self.assertEqual(store.candidate_rows(r"\b(?:5)\b"), [5])
+
+        with CorpusStore(self.directory) as reopened:
+            self.assertIn("107", reopened)
+            self.assertEqual(reopened.add_papers([{"pmid": "103"}]), 0)
+            self.assertEqual(reopened.candidate_rows(r"\b(?:acme)\b"), list(range(8)))
+
+    def test_missing_index_is_rebuilt_from_rows(self):
+        """Test that a store without its index files (e.g. an older layout) is reindexed on open."""
+        with CorpusStore(self.directory) as store:
+            store.add_papers(self.papers)
+        for name in os.listdir(self.directory):
+            if name.startswith("segment") or name == "pmids.seen":
+                os.remove(os.path.join(self.directory, name))
+
+        with CorpusStore(self.directory) as reopened:
+            self.assertIn("67890", reopened)
+            self.assertEqual(reopened.candidate_rows(PaperFilter().company_pattern), [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Tests for the dedup module."""
+
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from papers_fetcher.dedup import GROWTH_BYTES, SeenPmids
+from papers_fetcher.export import PaperExporter
+
+
+class TestSeenPmids(unittest.TestCase):
+    """Test cases for the SeenPmids bitmap and deduplicated exports."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "out.csv.seen")
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.directory)
+
+    def test_add_and_persist(self):
+        """Test membership across reopenings and file growth."""
+        seen = SeenPmids(self.path)
+        self.assertNotIn("12345", seen)
+        self.assertTrue(seen.add("12345"))
+        self.assertTrue(seen.add(39000000))
+        self.assertFalse(seen.add("not-a-pmid"))
+        seen.close()
+
+        reopened = SeenPmids(self.path)
+        self.assertIn("12345", reopened)
+        self.assertIn(" 39000000 ", reopened)
+        self.assertNotIn("12346", reopened)
+        self.assertNotIn("not-a-pmid", reopened)
+        self.assertEqual(os.path.getsize(self.path) % GROWTH_BYTES, 0)
+        reopened.close()
+
+    def test_sees_pmids_added_by_another_handle(self):
+        """Test that a set remaps when another writer grew the file."""
+        reader = SeenPmids(self.path)
+        writer = SeenPmids(self.path)
+        writer.add(50000000)
+        writer.flush()
+        self.assertIn("50000000", reader)
+        reader.close()
+        writer.close()
+
+    def test_exporter_appends_only_new_pmids(self):
+        """Test that repeated exports to one output skip PMIDs written before."""
+        output_file = os.path.join(self.directory, "out.csv")
+        exporter = PaperExporter(columns=["PubmedID", "Title"], dedup=True)
+
+        exporter.export_to_csv([{"pmid": "1", "title": "A"}, {"pmid": "2", "title": "B"}], output_file)
+        appended = exporter.append_new_papers(
+            [{"pmid": "2", "title": "B"}, {"pmid": "3", "title": "C"}, {"pmid": "3", "title": "C"}], output_file
+        )
+
+        self.assertEqual(appended, 1)
+        with open(output_file, newline="") as handle:
+            rows = list(csv.reader(handle))
+        self.assertEqual(rows, [["PubmedID", "Title"], ["1", "A"], ["2", "B"], ["3", "C"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
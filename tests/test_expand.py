@@ -0,0 +1,92 @@
+"""Tests for the expand module."""
+
+import unittest
+from unittest.mock import patch, MagicMock
+
+from papers_fetcher.expand import BloomFilter, CitationExpander
+
+
+class TestCitationExpander(unittest.TestCase):
+    """Test cases for the CitationExpander and BloomFilter classes."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        # Citation graph: 1 -> 2, 3; 2 -> 1, 4; 3 -> 5; 4 -> 6
+        self.graph = {"1": ["2", "3"], "2": ["1", "4"], "3": ["5"], "4": ["6"]}
+        self.fetcher = MagicMock()
+        self.fetcher.iter_pmid_batches.side_effect = lambda ids: iter([[{"pmid": pmid} for pmid in ids]])
+        # Papers 3 and 5 are not company-affiliated
+        self.filter = MagicMock()
+        self.filter.filter_papers.side_effect = lambda papers: [
+            paper for paper in papers if paper["pmid"] not in ("3", "5")
+        ]
+
+    def _fake_elink(self, mock_entrez):
+        def elink(dbfrom, db, id, linkname):
+            handle = MagicMock()
+            handle.links = [{"Id": target} for source in id.split(",") for target in self.graph.get(source, [])]
+            return handle
+
+        mock_entrez.elink.side_effect = elink
+        mock_entrez.read.side_effect = lambda handle: [{"LinkSetDb": [{"Link": handle.links}]}]
+
+    @patch("papers_fetcher.expand.Entrez")
+    def test_expand_follows_filtered_frontier_without_refetching(self, mock_entrez):
+        """Test that hops only fetch unseen PMIDs and expand from filtered papers."""
+        self._fake_elink(mock_entrez)
+        expander = CitationExpander(self.fetcher, self.filter)
+
+        result = expander.expand(["1"], depth=2)
+
+        self.assertEqual([paper["pmid"] for paper in result], ["2", "4"])
+        fetched = [call.args[0] for call in self.fetcher.iter_pmid_batches.call_args_list]
+        self.assertEqual(fetched, [["2", "3"], ["4"]])
+
+    @patch("papers_fetcher.expand.Entrez")
+    def test_expand_respects_budget(self, mock_entrez):
+        """Test that no more than budget PMIDs are fetched."""
+        self._fake_elink(mock_entrez)
+        expander = CitationExpander(self.fetcher, self.filter)
+
+        expander.expand(["1"], depth=3, budget=2)
+
+        fetched = [pmid for call in self.fetcher.iter_pmid_batches.call_args_list for pmid in call.args[0]]
+        self.assertEqual(fetched, ["2", "3"])
+
+    @patch("papers_fetcher.expand.Entrez")
+    def test_expand_skips_fetched_pmids_and_keeps_unfetched_ones_unseen(self, mock_entrez):
+        """Test that rejected seeds are not refetched and PMIDs past the budget are not marked seen."""
+        self._fake_elink(mock_entrez)
+        expander = CitationExpander(self.fetcher, self.filter)
+
+        expander.expand(["1"], depth=1, budget=1, fetched_pmids=["2"])
+        self.assertNotIn("5", expander.seen)
+        expander.expand(["2", "3"], depth=1, budget=1)
+
+        fetched = [call.args[0] for call in self.fetcher.iter_pmid_batches.call_args_list]
+        self.assertEqual(fetched, [["3"], ["4"]])
+        self.assertNotIn("5", expander.seen)
+
+    def test_large_expected_size_uses_bloom_filter(self):
+        """Test that the seen-set switches to a Bloom filter for large expansions."""
+        expander = CitationExpander(self.fetcher, self.filter, expected_size=2_000_000)
+        self.assertIsInstance(expander.seen, BloomFilter)
+
+    def test_unknown_link_type(self):
+        """Test that unknown link types are rejected."""
+        with self.assertRaises(ValueError):
+            CitationExpander(self.fetcher, self.filter, links=["cites-me"])
+
+    def test_bloom_filter(self):
+        """Test Bloom filter membership."""
+        bloom = BloomFilter(1000)
+        for i in range(1000):
+            bloom.add(str(i))
+
+        self.assertTrue(all(str(i) in bloom for i in range(1000)))
+        false_positives = sum(str(i) in bloom for i in range(1000, 11000))
+        self.assertLess(false_positives, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,7 @@ import unittest
 from unittest.mock import patch, MagicMock, mock_open
 import io
 
-from papers_fetcher.export import PaperExporter
+from papers_fetcher.export import ConsoleRenderer, PaperExporter, _prompt_more
 
 
 class TestPaperExporter(unittest.TestCase):
@@ -48,6 +48,16 @@ class TestPaperExporter(unittest.TestCase):
         self.assertEqual(result[0]["Company Affiliation(s)"], "Acme Pharmaceuticals Inc.; BioTech Labs Ltd.")
         self.assertEqual(result[1]["Company Affiliation(s)"], "Test Pharma Ltd.")
 
+    def test_column_projection(self):
+        """Test exporting a subset of columns and the fields they require."""
+        exporter = PaperExporter(columns=["PubmedID", "Title"])
+        result = exporter._prepare_data_for_export([{"pmid": "12345", "title": "Test Paper 1"}])
+
+        self.assertEqual(result, [{"PubmedID": "12345", "Title": "Test Paper 1"}])
+        self.assertEqual(exporter.required_fields(), {"pmid", "title"})
+        with self.assertRaises(ValueError):
+            PaperExporter(columns=["Abstract"])
+
     @patch("papers_fetcher.export.pd.DataFrame")
     def test_export_to_csv_file(self, mock_dataframe):
         """Test exporting papers to a CSV file."""
@@ -112,6 +122,42 @@ class TestPaperExporter(unittest.TestCase):
         self.assertEqual(result_string, "")
         self.assertIsNone(result_file)
 
+    def test_console_renderer_streams_compact_rows(self):
+        """Test tab-separated console output, limits and time-to-first-result."""
+        stream = io.StringIO()
+        exporter = PaperExporter(columns=["PubmedID", "Title"])
+        renderer = exporter.console_renderer(stream=stream, compact=True, limit=2)
+
+        self.assertTrue(renderer.render([{"pmid": "1", "title": "Tab\there"}]))
+        self.assertFalse(renderer.render([{"pmid": "2", "title": "B"}, {"pmid": "3", "title": "C"}]))
+        renderer.close()
+
+        self.assertEqual(stream.getvalue(), "PubmedID\tTitle\n1\tTab here\n2\tB\n")
+        self.assertEqual(renderer.count, 2)
+        self.assertIsNotNone(renderer.first_result_ms)
+
+    def test_console_renderer_pages(self):
+        """Test that paging stops when the prompt declines the next page."""
+        stream = io.StringIO()
+        answers = iter([True, False])
+        renderer = ConsoleRenderer(stream=stream, page_size=2, prompt=lambda: next(answers))
+
+        self.assertFalse(renderer.render([{"pmid": str(i), "title": "T"} for i in range(10)]))
+        self.assertEqual(renderer.count, 4)
+        self.assertIn("Paper 4:\n  PubMed ID: 3\n", stream.getvalue())
+
+    @patch("papers_fetcher.export.sys")
+    def test_page_prompt_reads_the_terminal_not_stdin(self, mock_sys):
+        """Test that page prompts are answered on the terminal and skipped without one."""
+        mock_sys.stdin.isatty.return_value = False
+        with patch("papers_fetcher.export.open", mock_open(read_data="q\n"), create=True) as mock_terminal:
+            self.assertFalse(_prompt_more())
+        mock_terminal.assert_called_once_with("/dev/tty", encoding="utf-8")
+
+        with patch("papers_fetcher.export.open", side_effect=OSError, create=True):
+            self.assertTrue(_prompt_more())
+        mock_sys.stdin.readline.assert_not_called()
+
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -1,9 +1,18 @@
 """Tests for the fetch module."""
 
+import asyncio
+import json
+import re
+import sys
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 
-from papers_fetcher.fetch import PubMedFetcher
+from papers_fetcher.fetch import (
+    EMAIL_PATTERN, NON_WORD_PATTERN, LazyPaper, PubMedFetcher, _surname, normalize_date_bound,
+)
 
 
 class TestPubMedFetcher(unittest.TestCase):
@@ -39,6 +48,7 @@ class TestPubMedFetcher(unittest.TestCase):
 
         # Mock the fetch results
         mock_fetch_handle = MagicMock()
+        mock_fetch_handle.read.return_value = ""
         mock_entrez.efetch.return_value = mock_fetch_handle
 
         # Mock the Medline parser
@@ -68,6 +78,303 @@ class TestPubMedFetcher(unittest.TestCase):
         mock_entrez.esearch.assert_called_once()
         mock_entrez.efetch.assert_called_once()
 
+    @patch("papers_fetcher.fetch.http_request")
+    def test_aiter_papers_yields_batches_in_order(self, mock_request):
+        """Test the async iterator fetching papers batch by batch."""
+        medline = {
+            "1": "PMID- 1\nTI  - Paper One\nDP  - 2023 Jan\nAU  - Smith J\nAD  - Acme Pharma Inc.\n",
+            "2": "PMID- 2\nTI  - Paper Two\nDP  - 2023 Feb\nAU  - Doe J\n",
+            "3": "PMID- 3\nTI  - Paper Three\nDP  - 2023 Mar\n",
+        }
+
+        async def fake_request(url, params, timeout=60.0, event=None):
+            if url.endswith("esearch.fcgi"):
+                return json.dumps({"esearchresult": {"idlist": ["1", "2", "3"]}}).encode("utf-8")
+            return "\n".join(medline[pmid] for pmid in params["id"]).encode("utf-8")
+
+        mock_request.side_effect = fake_request
+
+        async def collect():
+            return [paper async for paper in self.fetcher.aiter_papers("q", batch_size=2)]
+
+        result = asyncio.run(collect())
+
+        self.assertEqual([paper["pmid"] for paper in result], ["1", "2", "3"])
+        self.assertEqual(result[0]["authors"][0]["name"], "Smith J")
+        self.assertEqual(mock_request.call_count, 3)
+
+    @patch("papers_fetcher.fetch.http_request")
+    def test_afetch_papers_pushes_date_range_into_esearch(self, mock_request):
+        """Test that afetch_papers passes its date window on to the async esearch."""
+        async def fake_request(url, params, timeout=60.0, event=None):
+            return json.dumps({"esearchresult": {"idlist": []}}).encode("utf-8")
+
+        mock_request.side_effect = fake_request
+
+        result = asyncio.run(self.fetcher.afetch_papers("q", mindate="2020", maxdate="2021/06"))
+
+        self.assertEqual(result, [])
+        params = mock_request.call_args.args[1]
+        self.assertEqual((params["mindate"], params["maxdate"], params["datetype"]), ("2020", "2021/06", "pdat"))
+
+    @patch("papers_fetcher.fetch.Entrez")
+    def test_fetch_papers_pushes_date_range_into_esearch(self, mock_entrez):
+        """Test that --from/--to style bounds are sent to esearch."""
+        mock_entrez.read.return_value = {"IdList": []}
+
+        self.fetcher.fetch_papers("test query", mindate="2020-01", maxdate=None)
+
+        kwargs = mock_entrez.esearch.call_args.kwargs
+        self.assertEqual(kwargs["mindate"], "2020/01")
+        self.assertEqual(kwargs["maxdate"], "3000")
+        self.assertEqual(kwargs["datetype"], "pdat")
+
+    @patch("papers_fetcher.fetch.Entrez")
+    def test_parallel_parsing_matches_serial(self, mock_entrez):
+        """Test that process-pool parsing keeps order and output of serial parsing."""
+        text = "\n\n".join(
+            f"PMID- {i}\nTI  - Paper {i}\nDP  - 2023 Jan\nAU  - Author{i} A\n"
+            f"AD  - Acme Pharma Inc., Boston. author{i}@acme.com\n"
+            for i in range(300)
+        ) + "\n"
+        mock_entrez.efetch.return_value.read.return_value = text
+
+        fetcher = PubMedFetcher(email="test@example.com", parse_workers=2)
+        try:
+            result = fetcher.fetch_details([str(i) for i in range(300)])
+        finally:
+            fetcher.close()
+
+        self.assertEqual(result, self.fetcher._parse_medline(text))
+        self.assertEqual([paper["pmid"] for paper in result], [str(i) for i in range(300)])
+
+    @patch("papers_fetcher.fetch.Entrez")
+    def test_parallel_parsing_keeps_projection(self, mock_entrez):
+        """Test that worker processes only extract the requested fields and return plain dicts."""
+        text = "\n\n".join(
+            f"PMID- {i}\nTI  - Paper {i}\nDP  - 2023 Jan\nAU  - Author{i} A\nAD  - Acme Pharma Inc., Boston.\n"
+            for i in range(300)
+        ) + "\n"
+        mock_entrez.efetch.return_value.read.return_value = text
+
+        fetcher = PubMedFetcher(email="test@example.com", parse_workers=2, fields={"authors"})
+        try:
+            result = fetcher.fetch_details([str(i) for i in range(300)])
+        finally:
+            fetcher.close()
+
+        self.assertNotIsInstance(result[0], LazyPaper)
+        self.assertEqual(set(result[0]), {"pmid", "title", "authors"})
+        self.assertEqual(result[299]["authors"], [{"name": "Author299 A", "affiliations": ["Acme Pharma Inc., Boston."]}])
+
+    @patch("papers_fetcher.fetch.Entrez")
+    @patch("papers_fetcher.fetch.Medline")
+    def test_fetch_pmids_uses_epost_history(self, mock_medline, mock_entrez):
+        """Test fetching a PMID list through epost and history-server efetch."""
+        mock_entrez.read.return_value = {"WebEnv": "ENV", "QueryKey": "1"}
+        mock_entrez.efetch.return_value.read.return_value = ""
+        mock_medline.parse.return_value = [{"PMID": "12345", "TI": "Test Paper 1"}]
+
+        result = self.fetcher.fetch_pmids(["12345", "12345", "67890"])
+
+        self.assertEqual([paper["pmid"] for paper in result], ["12345"])
+        mock_entrez.esearch.assert_not_called()
+        mock_entrez.epost.assert_called_once_with(db="pubmed", id="12345,67890")
+        kwargs = mock_entrez.efetch.call_args.kwargs
+        self.assertEqual((kwargs["webenv"], kwargs["query_key"], kwargs["retstart"]), ("ENV", "1", 0))
+        self.assertNotIn("id", kwargs)
+
+    def test_process_record_computes_fields_lazily(self):
+        """Test that record fields are only extracted when read."""
+        record = {"PMID": "1", "TI": "Paper", "DP": "2023 Jan", "AU": ["Smith J"], "AD": "Acme Inc. a@acme.com"}
+
+        with patch.object(self.fetcher, "_extract_email", return_value="a@acme.com") as mock_email:
+            paper = self.fetcher._process_record(record)
+            self.assertEqual(paper["authors"][0]["name"], "Smith J")
+            mock_email.assert_not_called()
+            self.assertEqual(paper.get("corresponding_email"), "a@acme.com")
+            mock_email.assert_called_once()
+
+        self.assertEqual(paper["publication_date_iso"], "2023-01")
+        self.assertEqual(dict(paper)["date_precision"], "month")
+
+    def test_lazy_paper_is_shared_safely_between_threads(self):
+        """Test that threads encoding one fresh paper at once all see every field."""
+        record = {"PMID": "1", "TI": "Paper", "DP": "2023 Jan", "AU": ["Smith J"], "AD": "Acme Inc. a@acme.com"}
+        expected = json.dumps(dict(self.fetcher._process_record(record).items()), sort_keys=True)
+
+        # Switch threads as often as possible to hit the window between loading and storing a field
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                for _ in range(300):
+                    paper = self.fetcher._process_record(record)
+                    barrier = threading.Barrier(8)
+
+                    def encode(_):
+                        barrier.wait()
+                        return json.dumps(paper, sort_keys=True)
+
+                    self.assertEqual(set(pool.map(encode, range(8))), {expected})
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+    def test_extract_emails_for_batch(self):
+        """Test that emails of a whole batch are found and attributed to their authors."""
+        records = [
+            {
+                "PMID": "1",
+                "AU": ["Smith J", "Jones K"],
+                "AD": [
+                    "Acme Inc., Boston, USA. Electronic address: jsmith@acme.com.",
+                    "Harvard University, Cambridge, USA. kjones@harvard.edu; lab@harvard.edu",
+                ],
+            },
+            {"PMID": "2", "AU": ["Lee A"], "AD": "Globex Pharma, Seoul"},
+            {"PMID": "3", "AU": ["Park B"], "AD": "Initech Ltd (b.park@initech.co.uk)"},
+        ]
+
+        self.assertEqual(self.fetcher._extract_emails(records), [
+            [(0, "jsmith@acme.com"), (1, "kjones@harvard.edu"), (1, "lab@harvard.edu")],
+            [],
+            [(0, "b.park@initech.co.uk")],
+        ])
+
+        papers = self.fetcher._process_records(records)
+        self.assertEqual(papers[0]["corresponding_email"], "jsmith@acme.com")
+        self.assertEqual(papers[0]["emails"], [
+            {"email": "jsmith@acme.com", "authors": ["Smith J"]},
+            {"email": "kjones@harvard.edu", "authors": ["Jones K"]},
+            {"email": "lab@harvard.edu", "authors": []},
+        ])
+        self.assertEqual(papers[1]["corresponding_email"], "")
+        self.assertEqual(papers[2]["emails"], [{"email": "b.park@initech.co.uk", "authors": ["Park B"]}])
+
+    def test_attribute_emails_matches_whole_surnames(self):
+        """Test that short surnames don't match inside words and the local part is checked for every author."""
+        record = {
+            "PMID": "1",
+            "AU": ["Li X", "Wong Y"],
+            "AD": ["Department of Clinical Oncology, Acme Inc. y.wong@acme.com", "Li Lab, Globex. contact@globex.com"],
+        }
+
+        self.assertEqual(self.fetcher._attribute_emails(record), [
+            {"email": "y.wong@acme.com", "authors": ["Wong Y"]},
+            {"email": "contact@globex.com", "authors": ["Li X"]},
+        ])
+
+    def test_attribute_emails_matches_naive_scan(self):
+        """Test that indexed email attribution equals matching every surname with its own pattern."""
+        record = {
+            "PMID": "1",
+            "AU": ["Li X", "van der Berg, Anna", "Smith-Jones K", "O'Brien P", "Smith J", "Berg A", "Li Y"],
+            "AD": [
+                "Li Lab, Van der Berg Institute, Acme Inc. ali@acme.com; obrien@acme.com",
+                "Smith-Jones Clinic, Clinical Unit. ksmithjones@clinic.org",
+                "Department of Medicine, Globex. contact@globex.com; sli@globex.com",
+            ],
+        }
+
+        def naive(record):
+            affiliation_list = record["AD"]
+            surnames = [(name, _surname(name).lower()) for name in record["AU"]]
+            attributed = []
+            for line_index, email in self.fetcher._extract_emails([record])[0]:
+                affiliation = EMAIL_PATTERN.sub("", affiliation_list[line_index]).lower()
+                local_part = NON_WORD_PATTERN.sub("", email.split("@", 1)[0].lower())
+                candidates = [name for name, surname in surnames
+                              if surname and re.search(rf"\b{re.escape(surname)}\b", affiliation)]
+                by_local_part = [name for name, surname in surnames
+                                 if surname and NON_WORD_PATTERN.sub("", surname) in local_part]
+                attributed.append({
+                    "email": email,
+                    "authors": [name for name in by_local_part if name in candidates] or by_local_part or candidates,
+                })
+            return attributed
+
+        self.assertEqual(self.fetcher._attribute_emails(record), naive(record))
+
+    def test_attribute_emails_on_large_record(self):
+        """Test that computing every field, emails included, stays fast with thousands of surnames."""
+        record = {
+            "PMID": "1",
+            "DP": "2023 Jan",
+            "AU": [f"Surname{i:04d} {chr(65 + i % 26)}" for i in range(5000)],
+            "AD": [f"Dept {i}, Surname{i:04d} Institute, Sweden. surname{i:04d}@inst{i}.org" for i in range(300)],
+        }
+
+        start = time.perf_counter()
+        paper = self.fetcher._process_records([record])[0].materialize()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(paper["emails"]), 300)
+        self.assertEqual(paper["emails"][299], {"email": "surname0299@inst299.org", "authors": ["Surname0299 N"]})
+        self.assertLess(elapsed, 1.0)
+
+    def test_extract_authors_matches_naive_scan(self):
+        """Test that indexed author matching equals the author-by-affiliation scan on a large record."""
+        surnames = [f"Surname{i:04d}" for i in range(300)] + ["Li", "Ng", "Smith", "Smithson"]
+        record = {
+            "PMID": "1",
+            "AU": [f"{surnames[i % len(surnames)]}{', ' if i % 2 else ' '}{chr(65 + i % 26)}" for i in range(5000)] + ["", "Nobody X"],
+            "AD": [f"Dept {i}, {surnames[i]} Institute, Linköping, Sweden" for i in range(300)]
+                  + ["Smithson Labs Inc., Nguyen Street, Lille"],
+        }
+
+        def naive(record):
+            affiliation_list = record["AD"]
+            authors = []
+            for author_name in record["AU"]:
+                last_name = author_name.split(",")[0] if "," in author_name else author_name
+                matched = [a for a in affiliation_list if last_name.lower() in a.lower()]
+                authors.append({"name": author_name, "affiliations": matched or affiliation_list})
+            return authors
+
+        start = time.perf_counter()
+        authors = self.fetcher._extract_authors(record)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(authors, naive(record))
+        self.assertLess(elapsed, 1.0)
+
+    def test_process_record_with_projection(self):
+        """Test that fields outside the projection are not produced."""
+        fetcher = PubMedFetcher(email="test@example.com", fields={"authors"})
+        paper = fetcher._process_record({"PMID": "1", "TI": "Paper", "DP": "2023", "AU": ["Smith J"]})
+
+        self.assertEqual(set(paper), {"pmid", "title", "authors"})
+        self.assertEqual(paper.get("publication_date", "N/A"), "N/A")
+
+    def test_parse_date(self):
+        """Test normalizing MEDLINE dates to ISO dates with precision."""
+        test_cases = [
+            ("2022 Aug 4", ("2022-08-04", "day")),
+            ("2021 Apr", ("2021-04", "month")),
+            ("2023 Jan-Feb", ("2023-01", "month")),
+            ("2020 Winter", ("2020-12", "season")),
+            ("2023", ("2023", "year")),
+            ("20230115", ("2023-01-15", "day")),
+            ("2021 Feb 30", ("2021-02", "month")),
+            ("2020 Feb 29", ("2020-02-29", "day")),
+            ("", ("", "")),
+        ]
+
+        for date_str, expected in test_cases:
+            with self.subTest(date_str=date_str):
+                self.assertEqual(self.fetcher._parse_date(date_str), expected)
+
+    def test_normalize_date_bound(self):
+        """Test validating --from/--to style date bounds."""
+        self.assertEqual(normalize_date_bound("2020"), "2020")
+        self.assertEqual(normalize_date_bound("2020-3"), "2020/03")
+        self.assertEqual(normalize_date_bound("2020/03/15"), "2020/03/15")
+        for invalid in ("20", "2020/13", "2021/02/30", "March 2020", "2020/03/15/1"):
+            with self.subTest(value=invalid), self.assertRaises(ValueError):
+                normalize_date_bound(invalid)
+        with self.assertRaises(ValueError):
+            self.fetcher._date_range_params("2020", None, "xdat")
+
     def test_format_date(self):
         """Test the _format_date method."""
         # Test with various date formats
@@ -0,0 +1,84 @@
+"""Tests for the file_naming module."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from papers_fetcher.file_naming import OutputCatalog, clean_search_query, generate_filename, release_filename
+
+
+class TestFileNaming(unittest.TestCase):
+    """Test cases for filename generation and the output catalog."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.directory)
+
+    def test_clean_search_query(self):
+        """Test turning a query into a filename stem."""
+        self.assertEqual(clean_search_query("CRISPR (gene) editing!"), "crispr_gene_editing")
+        self.assertEqual(clean_search_query("***"), "")
+
+    def test_generate_filename_increments_suffix(self):
+        """Test that names get increasing suffixes and are reserved on disk."""
+        names = [generate_filename(self.directory, "Cancer therapy") for _ in range(3)]
+
+        self.assertEqual(names, ["cancer_therapy.csv", "cancer_therapy_1.csv", "cancer_therapy_2.csv"])
+        self.assertTrue(all(os.path.exists(os.path.join(self.directory, name)) for name in names))
+        self.assertEqual(generate_filename(self.directory, "***"), "search_results.csv")
+
+    def test_skips_files_created_outside_the_catalog(self):
+        """Test that existing files are never reused."""
+        for name in ("covid.csv", "covid_1.csv"):
+            open(os.path.join(self.directory, name), "w").close()
+
+        self.assertEqual(generate_filename(self.directory, "covid"), "covid_2.csv")
+
+    def test_concurrent_allocation_is_unique(self):
+        """Test that concurrent writers never receive the same name."""
+        def allocate(_):
+            catalog = OutputCatalog(self.directory)
+            try:
+                return catalog.allocate("shared query")
+            finally:
+                catalog.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            names = list(pool.map(allocate, range(40)))
+
+        self.assertEqual(len(set(names)), 40)
+
+    def test_outputs_for_query(self):
+        """Test looking up earlier outputs of a query without listing the directory."""
+        catalog = OutputCatalog(self.directory)
+        first = catalog.allocate("mRNA vaccine")
+        catalog.allocate("other query")
+        second = catalog.allocate("mRNA vaccine")
+        catalog.record_rows(first, 42)
+
+        outputs = catalog.outputs_for("mRNA vaccine")
+        catalog.close()
+
+        self.assertEqual([output.filename for output in outputs], [first, second])
+        self.assertEqual([output.rows for output in outputs], [42, None])
+
+    def test_release_removes_reserved_file(self):
+        """Test that a released name leaves neither a file nor a catalog entry behind."""
+        name = generate_filename(self.directory, "failed export")
+        release_filename(self.directory, name)
+
+        self.assertFalse(os.path.exists(os.path.join(self.directory, name)))
+        catalog = OutputCatalog(self.directory)
+        self.assertEqual(catalog.outputs_for("failed export"), [])
+        catalog.close()
+        self.assertEqual(generate_filename(self.directory, "failed export"), "failed_export_1.csv")
+
+
+if __name__ == "__main__":
+    unittest.main()
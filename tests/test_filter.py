@@ -1,9 +1,11 @@
 """Tests for the filter module."""
 
+import asyncio
 import unittest
 from unittest.mock import patch, MagicMock
 
-from papers_fetcher.filter import PaperFilter
+from papers_fetcher.filter import PaperFilter, company_affiliation_clause, push_down_affiliation_filter
+from papers_fetcher.rules import RuleSet
 
 
 class TestPaperFilter(unittest.TestCase):
@@ -128,6 +130,45 @@ class TestPaperFilter(unittest.TestCase):
         self.assertIn("Acme Pharmaceuticals Inc.", result[0]["company_affiliations"][0])
         self.assertIn("BioTech Labs Ltd.", result[1]["company_affiliations"][0])
 
+    def test_afilter_papers(self):
+        """Test the async filter stage over an async stream of papers."""
+        papers = [
+            {"pmid": "1", "authors": [{"name": "A", "affiliations": ["Acme Pharmaceuticals Inc., USA"]}]},
+            {"pmid": "2", "authors": [{"name": "B", "affiliations": ["Harvard University, MA"]}]},
+        ]
+
+        async def stream():
+            for paper in papers:
+                yield paper
+
+        async def collect():
+            return [paper async for paper in self.filter.afilter_papers(stream())]
+
+        result = asyncio.run(collect())
+
+        self.assertEqual([paper["pmid"] for paper in result], ["1"])
+        self.assertEqual(result[0]["non_academic_authors"], ["A"])
+
+    def test_push_down_affiliation_filter(self):
+        """Test turning company keywords into an [ad] clause ANDed onto the query."""
+        clause = company_affiliation_clause([r"\b(?:inc|co\.|pharma)\b"])
+        self.assertEqual(clause, '("inc"[ad] OR "co"[ad] OR "pharma"[ad])')
+
+        query = push_down_affiliation_filter("CRISPR OR TALEN", [r"\b(?:inc)\b"])
+        self.assertEqual(query, '(CRISPR OR TALEN) AND ("inc"[ad])')
+
+    def test_push_down_uses_active_rules(self):
+        """Test that pushdown follows a replaced rule set and is skipped for unsearchable rules."""
+        rules = RuleSet.from_keywords([r"\b(?:acme|contract research)\b", r"\bglobex\b"], [r"\buniversity\b"])
+        self.assertEqual(
+            push_down_affiliation_filter("q", rules=rules),
+            '(q) AND ("acme"[ad] OR "contract research"[ad] OR "globex"[ad])',
+        )
+
+        rules = RuleSet.from_keywords([r"\b(?:acme)\b", r"bristol-myers\s+squibb"], [])
+        self.assertIsNone(company_affiliation_clause(rules=rules))
+        self.assertEqual(push_down_affiliation_filter("q", rules=rules), "q")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
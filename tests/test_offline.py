@@ -0,0 +1,57 @@
+"""Tests for the offline module."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from papers_fetcher.offline import OfflineIndex
+
+
+class TestOfflineIndex(unittest.TestCase):
+    """Test cases for the OfflineIndex class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.directory = tempfile.mkdtemp()
+        self.index = OfflineIndex(os.path.join(self.directory, "papers.db"))
+        self.papers = [
+            {
+                "pmid": "12345",
+                "title": "CRISPR screening in tumours",
+                "authors": [{"name": "Smith J", "affiliations": ["Acme Therapeutics Inc., Boston, MA"]}],
+            },
+            {
+                "pmid": "67890",
+                "title": "CRISPR delivery vehicles",
+                "authors": [{"name": "Doe J", "affiliations": ["Department of Biology, Harvard University"]}],
+            },
+        ]
+
+    def tearDown(self):
+        """Close and remove the index."""
+        self.index.close()
+        shutil.rmtree(self.directory)
+
+    def test_search_title_and_affiliations(self):
+        """Test searching cached papers by title and affiliation."""
+        self.index.add_papers(self.papers)
+
+        self.assertEqual({p["pmid"] for p in self.index.search("crispr")}, {"12345", "67890"})
+        self.assertEqual([p["pmid"] for p in self.index.search("affiliations:therapeutics")], ["12345"])
+        self.assertEqual([p["pmid"] for p in self.index.search("authors:doe")], ["67890"])
+        self.assertEqual(len(self.index.search("crispr", limit=1)), 1)
+
+    def test_add_papers_replaces_existing_rows(self):
+        """Test that re-adding a paper refreshes both the cache and the index."""
+        self.index.add_papers(self.papers)
+        updated = dict(self.papers[0], title="Base editing in tumours")
+        self.index.add_papers([updated])
+
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual([p["pmid"] for p in self.index.search("crispr")], ["67890"])
+        self.assertEqual(self.index.search("base")[0]["title"], "Base editing in tumours")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""Tests for the pipeline module."""
+
+import unittest
+from unittest.mock import MagicMock
+
+from papers_fetcher.pipeline import (
+    fetch_company_papers, iter_filtered_batches, _next_batch_size, MIN_BATCH_SIZE, MAX_BATCH_SIZE,
+)
+
+
+class TestPipeline(unittest.TestCase):
+    """Test cases for the batch-by-batch fetch and filter pipeline."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.fetcher = MagicMock()
+        self.fetcher.search_ids.return_value = [str(i) for i in range(1000)]
+        self.fetcher.fetch_details.side_effect = lambda ids: [{"pmid": pmid} for pmid in ids]
+
+        # Every tenth paper is company-affiliated
+        self.filter = MagicMock()
+        self.filter.filter_papers.side_effect = lambda papers: [
+            paper for paper in papers if int(paper["pmid"]) % 10 == 0
+        ]
+
+    def test_stops_fetching_once_enough_papers_found(self):
+        """Test that no further batches are fetched after want matches."""
+        result = fetch_company_papers(self.fetcher, self.filter, "q", max_results=1000, want=12)
+
+        self.assertEqual([paper["pmid"] for paper in result], [str(i) for i in range(0, 120, 10)])
+        fetched = sum(len(call.args[0]) for call in self.fetcher.fetch_details.call_args_list)
+        self.assertLess(fetched, 1000)
+
+    def test_fetches_everything_without_want(self):
+        """Test that all PMIDs are fetched when want is not given."""
+        result = fetch_company_papers(self.fetcher, self.filter, "q", max_results=1000)
+
+        self.assertEqual(len(result), 100)
+        fetched = sum(len(call.args[0]) for call in self.fetcher.fetch_details.call_args_list)
+        self.assertEqual(fetched, 1000)
+
+    def test_on_fetch_sees_every_fetched_paper(self):
+        """Test that on_fetch receives each unfiltered batch, also when stopping early."""
+        fetched = []
+        fetch_company_papers(self.fetcher, self.filter, "q", max_results=1000, want=12, on_fetch=fetched.extend)
+
+        requested = [pmid for call in self.fetcher.fetch_details.call_args_list for pmid in call.args[0]]
+        self.assertEqual([paper["pmid"] for paper in fetched], requested)
+
+    def test_filtered_batches_of_known_pmids_stop_at_want(self):
+        """Test fetching a given PMID list without esearch."""
+        batches = iter_filtered_batches(self.fetcher, self.filter, [str(i) for i in range(500)], want=3)
+
+        self.assertEqual([paper["pmid"] for batch in batches for paper in batch], ["0", "10", "20"])
+        self.fetcher.search_ids.assert_not_called()
+
+    def test_next_batch_size_adapts_to_hit_rate(self):
+        """Test the adaptive batch size estimate and its bounds."""
+        self.assertEqual(_next_batch_size(10, 0.1, 50), 120)
+        self.assertEqual(_next_batch_size(1, 1.0, 50), MIN_BATCH_SIZE)
+        self.assertEqual(_next_batch_size(1000, 0.01, 50), MAX_BATCH_SIZE)
+        self.assertEqual(_next_batch_size(10, 0.0, 50), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""Tests for the rules module."""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import unittest
+
+from papers_fetcher.filter import COMPANY_KEYWORDS, ACADEMIC_KEYWORDS, PaperFilter
+from papers_fetcher.rules import COMPANY, RuleSet, RuleFile
+
+
+class TestRuleSet(unittest.TestCase):
+    """Test cases for the RuleSet and RuleFile classes."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, "cache")
+        self.rules_path = os.path.join(self.directory, "rules.json")
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.directory)
+
+    def _write_rules(self, data):
+        with open(self.rules_path, "w") as handle:
+            json.dump(data, handle)
+
+    def test_matches_keyword_regexes(self):
+        """Test that compiled keyword rules count the same matches as the original regexes."""
+        rules = RuleSet.from_keywords(COMPANY_KEYWORDS, ACADEMIC_KEYWORDS)
+        company = re.compile("|".join(COMPANY_KEYWORDS), re.IGNORECASE)
+        academic = re.compile("|".join(ACADEMIC_KEYWORDS), re.IGNORECASE)
+        affiliations = [
+            "Acme Pharmaceuticals Inc., New York, USA",
+            "Department of Oncology, Memorial Hospital; Pfizer Inc., New York, NY",
+            "Stanford University Medical Center; Genentech Inc.",
+            "Shanghai Co.Ltd, China",
+            "Health Center of the National Ministry",
+        ]
+        for affiliation in affiliations:
+            self.assertEqual(
+                rules.scores(affiliation),
+                (len(company.findall(affiliation)), len(academic.findall(affiliation))),
+                affiliation,
+            )
+            self.assertEqual(rules.first_company_match(affiliation),
+                             company.search(affiliation).span() if company.search(affiliation) else None)
+
+    def test_load_weighted_rules_and_cache(self):
+        """Test loading weighted rules from a file and reusing the compiled cache."""
+        self._write_rules({
+            "company": [r"\b(?:acme|globex)\b", {"pattern": r"\bcontract research\b", "weight": 3}],
+            "academic": [{"pattern": r"\b(?:university)\b", "weight": 2}],
+        })
+        rules = RuleSet.load(self.rules_path, cache_dir=self.cache_dir)
+        self.assertEqual(rules.scores("Acme contract research, University of X"), (4.0, 2.0))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        cached = RuleSet.load(self.rules_path, cache_dir=self.cache_dir)
+        self.assertEqual(cached.compiled, rules.compiled)
+
+    def test_invalid_rules(self):
+        """Test that malformed patterns are rejected."""
+        self._write_rules({"company": ["(unclosed"]})
+        with self.assertRaises(ValueError):
+            RuleSet.load(self.rules_path, cache_dir=None)
+
+        self._write_rules({"company": [r"(?P<name>inc)"]})
+        with self.assertRaises(ValueError):
+            RuleSet.load(self.rules_path, cache_dir=None)
+
+    def test_hot_reload(self):
+        """Test that a PaperFilter picks up an edited rule file."""
+        self._write_rules({"company": [r"\bacme\b"]})
+        paper_filter = PaperFilter(rules_file=self.rules_path)
+        paper_filter.rule_file.cache_dir = self.cache_dir
+        papers = [{"pmid": "1", "authors": [{"name": "A", "affiliations": ["Globex, Springfield"]}]}]
+        self.assertEqual(paper_filter.filter_papers(papers), [])
+
+        self._write_rules({"company": [r"\b(?:acme|globex)\b"]})
+        stat = os.stat(self.rules_path)
+        os.utime(self.rules_path, (stat.st_atime, stat.st_mtime + 1))
+        self.assertEqual(len(paper_filter.filter_papers(papers)), 1)
+
+    def test_reload_keeps_rules_on_error(self):
+        """Test that a broken edit keeps the previous rules."""
+        self._write_rules({"company": [r"\bacme\b"]})
+        rule_file = RuleFile(self.rules_path, cache_dir=None)
+        previous = rule_file.rules
+
+        with open(self.rules_path, "w") as handle:
+            handle.write("{not json")
+        os.utime(self.rules_path, (time.time(), time.time() + 5))
+        self.assertFalse(rule_file.reload_if_changed())
+        self.assertIs(rule_file.rules, previous)
+
+    def test_overlapping_company_and_academic_rules_both_count(self):
+        """Test that a residual match counts for each category whose rule matches it."""
+        rules = RuleSet.from_keywords([r"research\s+institute"], [r"institute\s+of|research\s+institute"])
+        self.assertEqual(rules.scores("Research Institute of Acme"), (1.0, 1.0))
+        self.assertEqual(rules.first_company_match("The Research Institute"), (4, 22))
+
+    def test_cache_is_json(self):
+        """Test that compiled rules are cached as JSON, not pickled."""
+        self._write_rules({"company": [r"\bbio\w+"], "academic": ["university"]})
+        RuleSet.load(self.rules_path, cache_dir=self.cache_dir)
+
+        (cache_file,) = os.listdir(self.cache_dir)
+        self.assertTrue(cache_file.endswith(".json"))
+        with open(os.path.join(self.cache_dir, cache_file)) as handle:
+            self.assertEqual(json.load(handle)["residual"]["company"], r"(?P<c0>\bbio\w+)")
+
+    def test_large_rule_set_single_pass(self):
+        """Test that thousands of word rules compile quickly and still match."""
+        company = [rf"\b(?:vendor{i}|supplier{i})\b" for i in range(5000)]
+        start = time.perf_counter()
+        rules = RuleSet.from_keywords(company, [r"\b(?:university|hospital)\b"])
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertIsNone(rules.residual(COMPANY))
+        self.assertEqual(rules.scores("Supplier4999 Ltd, University of Y"), (1.0, 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""Tests for the server module."""
+
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock
+
+from papers_fetcher.fetch import DEFAULT_BATCH_SIZE
+from papers_fetcher.server import PapersService, create_server
+
+
+class TestPapersService(unittest.TestCase):
+    """Test cases for the PapersService class and HTTP API."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.service = PapersService(email="test@example.com")
+        self.service.fetcher = MagicMock()
+        self.service.fetcher.fetch_details.side_effect = lambda ids: [{"pmid": pmid} for pmid in ids]
+        self.service.filter = MagicMock()
+        self.service.filter.filter_papers.side_effect = lambda papers: papers
+
+    def _serve(self):
+        server = create_server(self.service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address[:2]
+        return f"http://{host}:{port}/query"
+
+    def test_identical_concurrent_queries_are_coalesced(self):
+        """Test that identical in-flight queries trigger a single fetch."""
+        # Without the result cache, only coalescing can keep the second fetch away
+        self.service.cache_ttl = 0
+        started = threading.Event()
+
+        def slow_search(query, max_results=100):
+            started.set()
+            time.sleep(0.2)
+            return ["12345"]
+
+        self.service.fetcher.search_ids.side_effect = slow_search
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(self.service.query("q")))
+        first.start()
+        started.wait()
+        second = threading.Thread(target=lambda: results.append(self.service.query("q")))
+        second.start()
+        first.join()
+        second.join()
+
+        self.assertEqual(self.service.fetcher.search_ids.call_count, 1)
+        self.assertEqual(results, [[{"pmid": "12345"}], [{"pmid": "12345"}]])
+
+        # Once the first fetch is over, the same query goes upstream again
+        self.service.query("q")
+        self.assertEqual(self.service.fetcher.search_ids.call_count, 2)
+
+    def test_failed_query_is_not_cached(self):
+        """Test that errors propagate and the next call retries upstream."""
+        self.service.fetcher.search_ids.side_effect = [RuntimeError("boom"), ["1"]]
+
+        with self.assertRaises(RuntimeError):
+            self.service.query("q")
+        self.assertEqual(self.service.query("q"), [{"pmid": "1"}])
+
+    def test_batches_are_yielded_before_the_fetch_completes(self):
+        """Test that the first filtered batch reaches clients while later batches are fetched."""
+        self.service.fetcher.search_ids.return_value = [str(pmid) for pmid in range(DEFAULT_BATCH_SIZE + 10)]
+        first_read = threading.Event()
+
+        def fetch_details(ids):
+            if ids[0] != "0":
+                self.assertTrue(first_read.wait(5))
+            return [{"pmid": pmid} for pmid in ids]
+
+        self.service.fetcher.fetch_details.side_effect = fetch_details
+
+        batches = self.service.iter_query("q", max_results=DEFAULT_BATCH_SIZE + 10)
+        self.assertEqual(len(next(batches)), DEFAULT_BATCH_SIZE)
+        first_read.set()
+        self.assertEqual([len(batch) for batch in batches], [10])
+
+    def test_cache_is_bounded(self):
+        """Test that the result cache keeps only the most recently used entries."""
+        self.service.cache_size = 2
+        self.service.fetcher.search_ids.return_value = ["1"]
+        for query in ("a", "b", "a", "c"):
+            self.service.query(query)
+
+        self.assertEqual([key[0] for key in self.service._cache], ["a", "c"])
+        self.assertEqual(self.service.fetcher.search_ids.call_count, 3)
+
+    def test_http_query_streams_ndjson(self):
+        """Test a query round-trip over the HTTP API."""
+        self.service.fetcher.search_ids.return_value = ["1", "2"]
+        request = urllib.request.Request(
+            self._serve(), data=json.dumps({"query": "q", "max_results": 5}).encode("utf-8"), method="POST",
+        )
+        with urllib.request.urlopen(request) as response:
+            lines = response.read().decode("utf-8").splitlines()
+
+        self.assertEqual([json.loads(line)["pmid"] for line in lines], ["1", "2"])
+        self.service.fetcher.search_ids.assert_called_once_with("q", max_results=5)
+
+    def test_http_rejects_non_object_body(self):
+        """Test that a JSON body that is not an object is a client error."""
+        url = self._serve()
+        for body in (b"[1, 2]", b'"q"', b'{"query": ["q"]}'):
+            request = urllib.request.Request(url, data=body, method="POST")
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(request)
+            self.assertEqual(context.exception.code, 400)
+            context.exception.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
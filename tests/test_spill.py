@@ -0,0 +1,79 @@
+"""Tests for the spill module."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from papers_fetcher.export import PaperExporter
+from papers_fetcher.spill import SpillBuffer, estimate_size, parse_size
+
+
+class TestSpillBuffer(unittest.TestCase):
+    """Test cases for the SpillBuffer class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.directory = tempfile.mkdtemp()
+        self.papers = [
+            {
+                "pmid": str(pmid),
+                "title": f"Paper {pmid}",
+                "authors": [{"name": "Smith J", "affiliations": ["Acme Inc."]}],
+                "non_academic_authors": ["Smith J"],
+                "company_affiliations": ["Acme Inc."],
+                "corresponding_email": f"author{pmid}@acme.com",
+            }
+            for pmid in range(1000)
+        ]
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.directory)
+
+    def test_spills_past_budget_and_reads_back_in_order(self):
+        """Test that the in-memory part stays under the budget and order is preserved."""
+        budget = 20 * estimate_size(self.papers[0])
+        with SpillBuffer(budget) as buffer:
+            for start in range(0, len(self.papers), 100):
+                buffer.extend(self.papers[start:start + 100])
+
+            self.assertEqual(len(buffer), 1000)
+            self.assertGreater(buffer.spill_count, 0)
+            self.assertLessEqual(buffer.peak_bytes, budget)
+            self.assertEqual(list(buffer), self.papers)
+            self.assertTrue(all(len(batch) <= 300 for batch in buffer.batches(batch_size=300)))
+
+    def test_projects_fields(self):
+        """Test that only the requested fields are kept."""
+        with SpillBuffer(1 << 20, fields=["pmid", "title"]) as buffer:
+            buffer.extend(self.papers[:2])
+            self.assertEqual(list(buffer), [{"pmid": "0", "title": "Paper 0"}, {"pmid": "1", "title": "Paper 1"}])
+
+    def test_export_batches_matches_export_to_csv(self):
+        """Test that exporting spilled batches writes the same file as a single export."""
+        exporter = PaperExporter()
+        expected_file = os.path.join(self.directory, "expected.csv")
+        batched_file = os.path.join(self.directory, "batched.csv")
+        exporter.export_to_csv(self.papers, expected_file)
+
+        with SpillBuffer(16 * 1024, fields=exporter.required_fields()) as buffer:
+            buffer.extend(self.papers)
+            self.assertEqual(exporter.export_batches(buffer.batches(batch_size=64), batched_file), 1000)
+
+        with open(expected_file) as expected, open(batched_file) as batched:
+            self.assertEqual(batched.read(), expected.read())
+
+    def test_parse_size(self):
+        """Test parsing budget sizes with binary unit suffixes."""
+        self.assertEqual(parse_size("65536"), 65536)
+        self.assertEqual(parse_size("512M"), 512 * 1024 * 1024)
+        self.assertEqual(parse_size("1.5g"), 3 * 1024 * 1024 * 1024 // 2)
+        self.assertEqual(parse_size("64KiB"), 64 * 1024)
+        for invalid in ("", "lots", "-1M", "0"):
+            with self.assertRaises(ValueError):
+                parse_size(invalid)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Tests for the trace module."""
+
+import email.message
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import urllib.request
+from unittest.mock import patch, MagicMock
+from urllib.error import HTTPError
+
+from Bio import Entrez
+
+from papers_fetcher import trace
+from papers_fetcher.fetch import PubMedFetcher
+
+
+class TestTrace(unittest.TestCase):
+    """Test cases for trace events and trace summaries."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "trace.jsonl")
+        self.trace_log = trace.TraceLog(self.path)
+        self.previous = trace.set_trace_log(self.trace_log)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        trace.set_trace_log(self.previous)
+        self.trace_log.close()
+        shutil.rmtree(self.directory)
+
+    def _events(self):
+        return list(trace.read_events(self.path))
+
+    def test_request_and_span_events(self):
+        """Test that requests and spans are written as JSON lines, errors included."""
+        with trace.span("filter", papers=3) as event:
+            event["matched"] = 1
+        with self.assertRaises(RuntimeError):
+            with trace.request("efetch", batch_size=500) as event:
+                event["bytes"] = 1024
+                raise RuntimeError("HTTP 429")
+
+        span_event, request_event = self._events()
+        self.assertEqual((span_event["type"], span_event["stage"], span_event["matched"]), ("span", "filter", 1))
+        self.assertIn("duration_ms", span_event)
+        self.assertEqual(request_event["endpoint"], "efetch")
+        self.assertEqual((request_event["batch_size"], request_event["bytes"]), (500, 1024))
+        self.assertEqual(request_event["status"], "error")
+        self.assertEqual(request_event["run"], self.trace_log.run_id)
+
+    @patch("papers_fetcher.fetch.Entrez")
+    def test_fetch_records_eutils_requests(self, mock_entrez):
+        """Test that esearch and efetch calls of a fetch are traced."""
+        mock_entrez.read.return_value = {"IdList": ["1"]}
+        mock_entrez.efetch.return_value = io.StringIO("PMID- 1\nTI  - Paper One\n")
+
+        PubMedFetcher(email="test@example.com").fetch_papers("q", max_results=10)
+
+        events = self._events()
+        requests = [event for event in events if event["type"] == "request"]
+        self.assertEqual([event["endpoint"] for event in requests], ["esearch", "efetch"])
+        self.assertEqual(requests[1]["batch_size"], 1)
+        self.assertEqual(requests[1]["bytes"], len("PMID- 1\nTI  - Paper One\n"))
+        self.assertEqual(events[-1]["stage"], "fetch")
+        self.assertEqual(events[-1]["papers"], 1)
+
+    def test_entrez_request_records_retries_status_and_bytes(self):
+        """Test that Entrez's internal retries, the HTTP status and the UTF-8 size are recorded."""
+        class Response(io.BytesIO):
+            status = 200
+            url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+            headers = email.message.Message()
+
+        Response.headers["Content-Type"] = "text/plain; charset=UTF-8"
+        text = "PMID- 1\nTI  - Caf\u00e9 study\n"
+        urlopen = MagicMock(side_effect=[
+            HTTPError(Response.url, 503, "Service Unavailable", email.message.Message(), None),
+            Response(text.encode("utf-8")),
+        ])
+
+        # Enable tracing after patching, so the counting wrapper wraps the fake urlopen
+        trace.set_trace_log(None)
+        with patch.object(Entrez, "urlopen", urlopen):
+            trace.set_trace_log(self.trace_log)
+            try:
+                papers = PubMedFetcher(email="test@example.com").fetch_details(["1"])
+            finally:
+                trace.set_trace_log(None)
+            self.assertIs(Entrez.urlopen, urlopen)
+
+        request_event = self._events()[-1]
+        self.assertEqual(papers[0]["title"], "Caf\u00e9 study")
+        self.assertEqual(urlopen.call_count, 2)
+        self.assertEqual((request_event["retries"], request_event["status"]), (1, 200))
+        self.assertEqual(request_event["bytes"], len(text.encode("utf-8")))
+
+    def test_entrez_urlopen_is_only_wrapped_while_tracing(self):
+        """Test that Bio.Entrez is left untouched unless a trace log is active."""
+        self.assertIsNot(Entrez.urlopen, urllib.request.urlopen)
+        trace.set_trace_log(None)
+        self.assertIs(Entrez.urlopen, urllib.request.urlopen)
+
+    def test_summarize_trace(self):
+        """Test latency percentiles, histograms and throughput buckets."""
+        with open(self.path, "w") as handle:
+            for i in range(100):
+                handle.write(json.dumps({
+                    "ts": 1000.0 + i, "run": "r1", "type": "request", "endpoint": "efetch",
+                    "batch_size": 10, "bytes": 100, "retries": 0, "status": "ok", "latency_ms": float(i + 1),
+                }) + "\n")
+            # IDs uploaded with epost are not records fetched
+            handle.write(json.dumps({"ts": 1000.5, "run": "r1", "type": "request", "endpoint": "epost",
+                                     "batch_size": 500, "latency_ms": 20.0}) + "\n")
+            handle.write(json.dumps({"ts": 1100.0, "run": "r1", "type": "span", "stage": "filter",
+                                     "duration_ms": 5.0}) + "\n")
+            handle.write("not json\n")
+
+        summary = trace.summarize_trace(self.path, interval=50.0)
+
+        efetch = summary["requests"]["efetch"]
+        self.assertEqual((efetch["count"], efetch["records"], efetch["bytes"]), (100, 1000, 10000))
+        self.assertEqual((efetch["p50_ms"], efetch["p95_ms"], efetch["p99_ms"]), (50.0, 95.0, 99.0))
+        self.assertEqual(sum(efetch["histogram"]), 100)
+        self.assertEqual(efetch["histogram"][:2], [10, 15])
+        self.assertEqual(summary["spans"]["filter"]["count"], 1)
+        self.assertEqual([bucket["requests"] for bucket in summary["throughput"]], [51, 50])
+        self.assertEqual(summary["throughput"][0]["records_per_second"], 10.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
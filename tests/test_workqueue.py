@@ -0,0 +1,127 @@
+"""Tests for the workqueue module."""
+
+import csv
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from papers_fetcher.export import PaperExporter
+from papers_fetcher.filter import PaperFilter
+from papers_fetcher.workqueue import WorkQueue, run_worker, merge_shards
+
+
+class TestWorkQueue(unittest.TestCase):
+    """Test cases for the WorkQueue class and the worker/merge helpers."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.directory = tempfile.mkdtemp()
+        self.queue = WorkQueue(os.path.join(self.directory, "queue.db"))
+        self.fetcher = MagicMock()
+        self.fetcher.search_history.return_value = ("ENV", "1", 1200)
+        self.fetcher.fetch_history.side_effect = lambda webenv, query_key, retstart, retmax: [
+            {
+                "pmid": str(retstart + i),
+                "title": f"Paper {retstart + i}",
+                "authors": [{"name": "Author", "affiliations": ["Acme Pharmaceuticals Inc., USA"]}],
+            }
+            for i in range(0, retmax, 100)
+        ]
+
+    def tearDown(self):
+        """Close and remove the queue."""
+        self.queue.close()
+        shutil.rmtree(self.directory)
+
+    def test_plan_splits_result_set(self):
+        """Test that a job is split into history-server offsets."""
+        job_id = self.queue.plan(self.fetcher, "q", max_results=1200, unit_size=500)
+
+        self.assertEqual(self.queue.progress(job_id), {"pending": 3})
+        units = [self.queue.claim("w1") for _ in range(3)]
+        self.assertEqual([(unit.retstart, unit.retmax) for unit in units], [(0, 500), (500, 500), (1000, 200)])
+        self.assertIsNone(self.queue.claim("w1"))
+
+    def test_expired_lease_is_reassigned(self):
+        """Test that a stalled worker's unit is taken over and its late result discarded."""
+        self.fetcher.search_history.return_value = ("ENV", "1", 500)
+        job_id = self.queue.plan(self.fetcher, "q", max_results=500, unit_size=500)
+
+        stalled = self.queue.claim("stalled", lease_seconds=-1)
+        taken_over = self.queue.claim("healthy")
+
+        self.assertEqual(stalled.id, taken_over.id)
+        self.assertEqual(taken_over.attempts, 2)
+        self.assertFalse(self.queue.complete(stalled.id, "stalled", "late.csv"))
+        self.assertTrue(self.queue.complete(taken_over.id, "healthy", "shard.csv"))
+        self.assertEqual(self.queue.progress(job_id), {"done": 1})
+
+    def test_worker_takes_over_lease_of_crashed_worker(self):
+        """Test that a worker waits for another worker's lease to expire instead of exiting."""
+        self.fetcher.search_history.return_value = ("ENV", "1", 1000)
+        job_id = self.queue.plan(self.fetcher, "q", max_results=1000, unit_size=500)
+        self.queue.claim("crashed", lease_seconds=0.3)
+        shard_dir = os.path.join(self.directory, "shards")
+
+        completed = run_worker(self.queue, self.fetcher, PaperFilter(), PaperExporter(), shard_dir, worker="w2")
+
+        self.assertEqual(completed, 2)
+        self.assertEqual(self.queue.progress(job_id), {"done": 2})
+        self.assertEqual(merge_shards(self.queue, job_id, os.path.join(self.directory, "merged.csv")), 10)
+
+    def test_workers_and_merge(self):
+        """Test draining a job with a worker and merging shards in order."""
+        job_id = self.queue.plan(self.fetcher, "q", max_results=1200, unit_size=500)
+        shard_dir = os.path.join(self.directory, "shards")
+
+        completed = run_worker(self.queue, self.fetcher, PaperFilter(), PaperExporter(), shard_dir, worker="w1")
+        output_file = os.path.join(self.directory, "merged.csv")
+        rows = merge_shards(self.queue, job_id, output_file)
+
+        self.assertEqual(completed, 3)
+        self.assertEqual(rows, 12)
+        with open(output_file, newline="") as handle:
+            pmids = [row["PubmedID"] for row in csv.DictReader(handle)]
+        self.assertEqual(pmids, [str(i) for i in range(0, 1200, 100)])
+
+    def test_failed_unit_is_retried_after_backoff(self):
+        """Test that a failed unit is delayed, then retried by the same worker."""
+        self.fetcher.search_history.return_value = ("ENV", "1", 500)
+        job_id = self.queue.plan(self.fetcher, "q", max_results=500, unit_size=500)
+        fetch_history = self.fetcher.fetch_history.side_effect
+        self.fetcher.fetch_history.side_effect = [RuntimeError("HTTP 429"), fetch_history("ENV", "1", 0, 500)]
+        shard_dir = os.path.join(self.directory, "shards")
+
+        with patch("papers_fetcher.workqueue.RETRY_BASE_SECONDS", 0.2):
+            start = time.monotonic()
+            completed = run_worker(self.queue, self.fetcher, PaperFilter(), PaperExporter(), shard_dir, worker="w1")
+
+        self.assertEqual(completed, 1)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(self.queue.progress(job_id), {"done": 1})
+
+    def test_lease_is_renewed_while_processing(self):
+        """Test that a slow unit keeps its lease through heartbeats."""
+        self.fetcher.search_history.return_value = ("ENV", "1", 500)
+        self.queue.plan(self.fetcher, "q", max_results=500, unit_size=500)
+        fetch_history = self.fetcher.fetch_history.side_effect
+
+        def slow_fetch(*args, **kwargs):
+            time.sleep(0.5)
+            # A second worker can't take over the unit while it is being processed
+            with WorkQueue(self.queue.db_path) as other:
+                self.assertIsNone(other.claim("w2"))
+            return fetch_history(*args, **kwargs)
+
+        self.fetcher.fetch_history.side_effect = slow_fetch
+        completed = run_worker(self.queue, self.fetcher, PaperFilter(), PaperExporter(),
+                               os.path.join(self.directory, "shards"), worker="w1", lease_seconds=0.3)
+
+        self.assertEqual(completed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()